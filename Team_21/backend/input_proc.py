@@ -4,11 +4,30 @@ import json
 import pytesseract
 import os
 import base64
+import hashlib
+import atexit
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Tuple, Dict, Any, Optional
 
 # If Tesseract is not on PATH, set it manually
 # pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
+# OCR stage settings
+OCR_MAX_WORKERS = min(4, os.cpu_count() or 1)  # Upper bound on concurrent tesseract processes
+OCR_MAX_WIDTH = 1600        # Crops wider than this are downscaled before OCR
+OCR_MIN_STRIP_HEIGHT = 6    # Ignore specks thinner than this when splitting lines
+OCR_STRIP_PADDING = 4       # White border kept around each line strip
+OCR_CACHE_SIZE = 512        # Number of OCR'd regions remembered across requests
+OCR_TESSERACT_CONFIG = "--psm 7"   # Each strip is a single text line
+OCR_BLOCK_CONFIG = "--psm 6"       # Whole region, when its lines could not be separated
+
+_ocr_pool: Optional[ProcessPoolExecutor] = None
+_ocr_pool_lock = threading.Lock()
+_ocr_cache: "OrderedDict[str, List[str]]" = OrderedDict()
+_ocr_cache_lock = threading.Lock()
+
 
 def image_to_base64(image: np.ndarray) -> str:
     """Convert OpenCV image to base64 string for API response"""
@@ -45,20 +64,11 @@ def detect_initial_grid(grid_img: np.ndarray, rows: int, cols: int) -> List[List
     h, w = thresh.shape
     cell_h, cell_w = h // rows, w // cols
 
-    grid = []
-    
-    for i in range(rows):
-        row_data = []
-        for j in range(cols):
-            cell = thresh[i * cell_h:(i + 1) * cell_h, j * cell_w:(j + 1) * cell_w]
-            black_ratio = np.sum(cell == 0) / cell.size
-            if black_ratio > 0.5:
-                row_data.append("#")
-            else:
-                row_data.append(" ")
-        grid.append(row_data)
-    
-    return grid
+    # View the grid as (rows, cell_h, cols, cell_w) blocks and classify every cell at once
+    cells = thresh[:rows * cell_h, :cols * cell_w].reshape(rows, cell_h, cols, cell_w)
+    black_ratio = (cells == 0).mean(axis=(1, 3))
+
+    return np.where(black_ratio > 0.5, "#", " ").tolist()
 
 
 def create_grid_preview(grid_img: np.ndarray, grid: List[List[str]], rows: int, cols: int) -> np.ndarray:
@@ -133,18 +143,126 @@ def update_grid_api(grid_img: np.ndarray, grid: List[List[str]], rows: int, cols
     }
 
 
+def _get_ocr_pool() -> ProcessPoolExecutor:
+    """Lazily create the shared, bounded process pool used for OCR"""
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            _ocr_pool = ProcessPoolExecutor(max_workers=OCR_MAX_WORKERS)
+            atexit.register(_ocr_pool.shutdown, wait=False)
+        return _ocr_pool
+
+
+def region_hash(region: np.ndarray) -> str:
+    """Hash raw pixel data (and shape) so identical crops hit the OCR cache"""
+    digest = hashlib.sha1(np.ascontiguousarray(region).tobytes())
+    digest.update(str(region.shape).encode())
+    return digest.hexdigest()
+
+
+def _cache_get(key: str) -> Optional[List[str]]:
+    with _ocr_cache_lock:
+        lines = _ocr_cache.get(key)
+        if lines is not None:
+            _ocr_cache.move_to_end(key)
+        return lines
+
+
+def _cache_put(key: str, lines: List[str]) -> None:
+    with _ocr_cache_lock:
+        _ocr_cache[key] = lines
+        _ocr_cache.move_to_end(key)
+        while len(_ocr_cache) > OCR_CACHE_SIZE:
+            _ocr_cache.popitem(last=False)
+
+
+def preprocess_for_ocr(region: np.ndarray) -> np.ndarray:
+    """Grayscale, downscale and binarize a crop into black text on a white background"""
+    gray = cv2.cvtColor(region, cv2.COLOR_BGR2GRAY) if region.ndim == 3 else region
+
+    h, w = gray.shape
+    if w > OCR_MAX_WIDTH:
+        scale = OCR_MAX_WIDTH / w
+        gray = cv2.resize(gray, (OCR_MAX_WIDTH, max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    # Tesseract expects dark text on a light page
+    if np.mean(binary) < 127:
+        binary = cv2.bitwise_not(binary)
+
+    return binary
+
+
+def split_into_line_strips(binary: np.ndarray) -> List[np.ndarray]:
+    """Split a binarized region into horizontal text-line strips using its row ink profile"""
+    ink_rows = np.any(binary == 0, axis=1)
+    if not ink_rows.any():
+        return []
+
+    # Rising/falling edges of the ink profile mark where each text line starts and ends
+    edges = np.diff(np.concatenate(([0], ink_rows.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    h = binary.shape[0]
+    strips = []
+    for start, end in zip(starts, ends):
+        if end - start < OCR_MIN_STRIP_HEIGHT:
+            continue
+        top = max(0, start - OCR_STRIP_PADDING)
+        bottom = min(h, end + OCR_STRIP_PADDING)
+        strips.append(cv2.copyMakeBorder(binary[top:bottom], OCR_STRIP_PADDING, OCR_STRIP_PADDING,
+                                         OCR_STRIP_PADDING, OCR_STRIP_PADDING,
+                                         cv2.BORDER_CONSTANT, value=255))
+
+    # Fall back to the whole region if the lines touch and could not be separated
+    return strips or [binary]
+
+
+def _ocr_strip(strip: np.ndarray, config: str = OCR_TESSERACT_CONFIG) -> List[str]:
+    """Run tesseract on one line strip (executed inside the OCR process pool)"""
+    text = pytesseract.image_to_string(strip, config=config)
+    return [line.strip() for line in text.strip().split('\n') if line.strip()]
+
+
 def ocr_regions(regions: List[np.ndarray]) -> List[str]:
     """Perform OCR on multiple regions and return extracted text"""
+    keys = [region_hash(region) for region in regions]
+    results: Dict[int, List[str]] = {}
+    pending: Dict[int, List[Any]] = {}
+
+    for i, (region, key) in enumerate(zip(regions, keys)):
+        cached = _cache_get(key)
+        if cached is not None:
+            print(f"♻️ Region {i+1}: using cached OCR result")
+            results[i] = cached
+            continue
+
+        binary = preprocess_for_ocr(region)
+        strips = split_into_line_strips(binary)
+        print(f"Processing region {i+1} ({len(strips)} line strips)...")
+        if not strips:
+            results[i] = []
+            _cache_put(key, [])
+            continue
+        # split_into_line_strips returns the whole region when it could not separate lines
+        config = OCR_BLOCK_CONFIG if strips[0] is binary else OCR_TESSERACT_CONFIG
+        pending[i] = [(strip, config) for strip in strips]
+
+    if pending:
+        pool = _get_ocr_pool()
+        futures = {i: [pool.submit(_ocr_strip, strip, config) for strip, config in strips]
+                   for i, strips in pending.items()}
+        for i, strip_futures in futures.items():
+            lines = [line for future in strip_futures for line in future.result()]
+            results[i] = lines
+            _cache_put(keys[i], lines)
+
     extracted_texts = []
-    
-    for i, region in enumerate(regions):
-        print(f"Processing region {i+1}...")
-        text = pytesseract.image_to_string(region)
-        if text.strip():
-            # Split by lines and clean up
-            lines = [line.strip() for line in text.strip().split('\n') if line.strip()]
-            extracted_texts.extend(lines)
-    
+    for i in range(len(regions)):
+        extracted_texts.extend(results[i])
+
     return extracted_texts
 
 
@@ -84,4 +84,14 @@ app.get('/', (req, res) => {
 const PORT = process.env.PORT || 5000;
 app.listen(PORT, () => {
   console.log(`🚀 Server is running on port ${PORT}`);
+
+  // Load the Python quiz models once at boot instead of on the first quiz request
+  if (process.env.QUIZ_WORKER_WARMUP !== '0') {
+    const advancedQuizService = require('./services/advancedQuizService');
+    const pythonWorkerPool = require('./services/pythonWorkerPool');
+    advancedQuizService.checkPythonEnvironment()
+      .then(pythonPath => pythonWorkerPool.warmUp(pythonPath))
+      .then(() => console.log('🐍 Python quiz worker ready'))
+      .catch(err => console.warn('Python quiz worker warm-up failed, will spawn per request:', err && err.message ? err.message : err));
+  }
 });
@@ -4,6 +4,7 @@ const fs = require('fs').promises;
 const Content = require('../models/Content');
 const mongoose = require('mongoose');
 const fsSync = require('fs');
+const pythonWorkerPool = require('./pythonWorkerPool');
 
 class AdvancedQuizService {
     constructor() {
@@ -87,6 +88,28 @@ class AdvancedQuizService {
         });
     }
 
+    /**
+     * Run the advanced generator on the warm worker pool, falling back to a one-off spawn
+     */
+    async runGenerator(pythonPath, payload, maxQs) {
+        try {
+            const { result, timings } = await pythonWorkerPool.run(pythonPath, 'advanced', { ...payload, max: maxQs });
+            console.log('⏱️ advanced_quiz_generator timings (s):', timings);
+            return Array.isArray(result) ? result : [];
+        } catch (e) {
+            console.warn('Quiz worker unavailable, spawning generator:', e && e.message ? e.message : e);
+        }
+
+        const { stdout, stderr } = await this.executePythonScript(pythonPath, [this.pythonScriptPath, '--max', String(maxQs)], payload);
+        if (stderr && stderr.trim()) console.warn('advanced_quiz_generator stderr:', stderr.trim());
+        try {
+            return JSON.parse(stdout.trim() || '[]');
+        } catch (e) {
+            console.error('Generator stdout:', stdout);
+            throw e;
+        }
+    }
+
     /**
      * Generate cold-start quiz from topics
      */
@@ -145,15 +168,11 @@ class AdvancedQuizService {
 
             // Ask generator for up to topics.length * perTopicQuestions (cap to reasonable limit)
             const maxQs = Math.min(200, Math.max(perTopicQuestions * topics.length, perTopicQuestions));
-            const { stdout, stderr } = await this.executePythonScript(pythonPath, [this.pythonScriptPath, '--max', String(maxQs)], payload);
-            if (stderr && stderr.trim()) console.warn('advanced_quiz_generator stderr:', stderr.trim());
-
             let parsed = [];
             try {
-                parsed = JSON.parse(stdout.trim() || '[]');
+                parsed = await this.runGenerator(pythonPath, payload, maxQs);
             } catch (e) {
                 console.error('Failed to parse generator output:', e.message);
-                console.error('Generator stdout:', stdout);
                 // fallback
                 const fallback = [];
                 for (const t of topics) fallback.push(...this._generateEnhancedQuestions(t, perTopicQuestions));
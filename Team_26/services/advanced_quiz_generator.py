@@ -25,7 +25,9 @@ import json
 import re
 import random
 import argparse
-from typing import List
+import threading
+import time
+from typing import List, Optional
 
 # Try optional imports (handle absence gracefully)
 try:
@@ -45,6 +47,9 @@ except Exception:
     ST_AVAILABLE = False
     _st_model = None
 
+_st_lock = threading.Lock()
+_st_failed = False
+
 
 def log(msg: str):
     try:
@@ -55,6 +60,22 @@ def log(msg: str):
 log(f"Starting generator. NLTK_AVAILABLE={NLTK_AVAILABLE}, ST_AVAILABLE={ST_AVAILABLE}")
 
 
+def get_st_model():
+    """Load the SentenceTransformer once per process (None if unavailable)."""
+    global _st_model, _st_failed
+    if not ST_AVAILABLE or _st_failed:
+        return None
+    if _st_model is None:
+        with _st_lock:
+            if _st_model is None and not _st_failed:
+                try:
+                    _st_model = SentenceTransformer('all-MiniLM-L6-v2')
+                except Exception as e:
+                    log(f"Could not load SentenceTransformer: {e}")
+                    _st_failed = True
+    return _st_model
+
+
 def naive_sent_tokenize(text: str) -> List[str]:
     if NLTK_AVAILABLE:
         try:
@@ -111,7 +132,6 @@ def extract_candidate_answers(sent: str) -> List[str]:
 
 
 def generate_distractors(answer: str, pool: List[str], max_d=3) -> List[str]:
-    global _st_model
     # choose semantically similar or just other items from pool
     pool_candidates = [p for p in pool if p.lower() != answer.lower()]
     random.shuffle(pool_candidates)
@@ -129,15 +149,10 @@ def generate_distractors(answer: str, pool: List[str], max_d=3) -> List[str]:
         distractors.append(p)
 
     # If sentence-transformers available, rank by embedding similarity (closer -> better distractor)
-    if ST_AVAILABLE and _st_model is None:
+    st_model = get_st_model()
+    if st_model is not None and pool_candidates:
         try:
-            _st_model = SentenceTransformer('all-MiniLM-L6-v2')
-        except Exception:
-            _st_model = None
-
-    if ST_AVAILABLE and _st_model is not None and pool_candidates:
-        try:
-            embeddings = _st_model.encode([answer] + pool_candidates, convert_to_tensor=True)
+            embeddings = st_model.encode([answer] + pool_candidates, convert_to_tensor=True)
             sim = util.cos_sim(embeddings[0], embeddings[1:])[0]
             paired = list(zip(pool_candidates, sim.cpu().tolist() if hasattr(sim, 'cpu') else sim.tolist()))
             # prefer distractors that are moderately similar (not identical) -> score between 0.25 and 0.85
@@ -192,9 +207,12 @@ def generate_distractors(answer: str, pool: List[str], max_d=3) -> List[str]:
     return distractors
 
 
-def generate_questions_from_text(text: str, max_questions: int = 10) -> List[dict]:
+def generate_questions_from_text(text: str, max_questions: int = 10, timings: Optional[dict] = None) -> List[dict]:
+    """Generate questions; if `timings` is given, per-stage seconds are recorded into it."""
+    started = time.perf_counter()
     sents = naive_sent_tokenize(text)
     log(f"Tokenized into {len(sents)} sentences")
+    tokenized = time.perf_counter()
     pool = []
     for s in sents:
         pool += extract_candidate_answers(s)
@@ -202,6 +220,10 @@ def generate_questions_from_text(text: str, max_questions: int = 10) -> List[dic
     # unique pool
     pool = list(dict.fromkeys([p for p in pool if len(p) > 0]))
     log(f"Unique candidate pool size: {len(pool)}")
+    pooled = time.perf_counter()
+
+    st_model = get_st_model()
+    loaded = time.perf_counter()
 
     questions = []
     for s in sents:
@@ -228,17 +250,11 @@ def generate_questions_from_text(text: str, max_questions: int = 10) -> List[dic
                 continue
             # If embeddings are available, score candidates by semantic closeness to the sentence
             answer = None
-            if ST_AVAILABLE and _st_model is None:
-                try:
-                    _st_model = SentenceTransformer('all-MiniLM-L6-v2')
-                except Exception:
-                    _st_model = None
-
-            if ST_AVAILABLE and _st_model is not None:
+            if st_model is not None:
                 try:
                     # encode sentence and candidates
                     cand_texts = candidates
-                    enc = _st_model.encode([s] + cand_texts, convert_to_tensor=True)
+                    enc = st_model.encode([s] + cand_texts, convert_to_tensor=True)
                     sims = util.cos_sim(enc[0], enc[1:])[0]
                     sims_list = sims.cpu().tolist() if hasattr(sims, 'cpu') else sims.tolist()
                     # pair candidate with score
@@ -287,8 +303,8 @@ def generate_questions_from_text(text: str, max_questions: int = 10) -> List[dic
             # Confidence: if embeddings available, base on candidate-sentence sim; otherwise default
             confidence = 0.6
             try:
-                if ST_AVAILABLE and _st_model is not None:
-                    enc = _st_model.encode([s, answer], convert_to_tensor=True)
+                if st_model is not None:
+                    enc = st_model.encode([s, answer], convert_to_tensor=True)
                     simv = float(util.cos_sim(enc[0], enc[1]).cpu().item())
                     confidence = max(0.3, min(0.98, 0.4 + simv * 0.6))
             except Exception:
@@ -308,9 +324,31 @@ def generate_questions_from_text(text: str, max_questions: int = 10) -> List[dic
             break
 
     log(f"Generated {len(questions)} questions")
+    if timings is not None:
+        finished = time.perf_counter()
+        timings['tokenize'] = round(tokenized - started, 4)
+        timings['candidate_pool'] = round(pooled - tokenized, 4)
+        timings['model_load'] = round(loaded - pooled, 4)
+        timings['questions'] = round(finished - loaded, 4)
     return questions
 
 
+def payload_to_text(data) -> str:
+    """Pick the raw text out of an ingestion payload ('content', 'transcript' or 'chunks')."""
+    if not data:
+        return ''
+    if isinstance(data, dict):
+        if 'content' in data and isinstance(data['content'], str):
+            return data['content']
+        if 'transcript' in data and isinstance(data['transcript'], str):
+            return data['transcript']
+        if 'chunks' in data and isinstance(data['chunks'], list):
+            return ' '.join([c for c in data['chunks'] if isinstance(c, str)])
+        # last resort: stringify
+        return json.dumps(data)
+    return str(data)
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--text', help='Raw content text')
@@ -325,23 +363,7 @@ def main():
         except Exception:
             data = None
 
-    raw = ''
-    if args.text:
-        raw = args.text
-    elif data:
-        # common keys used by ingestion: 'content', 'transcript', 'chunks'
-        if isinstance(data, dict):
-            if 'content' in data and isinstance(data['content'], str):
-                raw = data['content']
-            elif 'transcript' in data and isinstance(data['transcript'], str):
-                raw = data['transcript']
-            elif 'chunks' in data and isinstance(data['chunks'], list):
-                raw = ' '.join([c for c in data['chunks'] if isinstance(c, str)])
-            else:
-                # last resort: stringify
-                raw = json.dumps(data)
-        else:
-            raw = str(data)
+    raw = args.text or payload_to_text(data)
 
     if not raw or len(raw.strip()) == 0:
         log('No raw content received; outputting empty array')
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark quiz generation throughput (questions/sec) per strategy.
+
+Usage:
+  python services/benchmark_quiz_strategies.py
+  python services/benchmark_quiz_strategies.py --strategies pipeline simple --runs 3 --per-topic 8
+  python services/benchmark_quiz_strategies.py --strategies pipeline --batch-sizes 1 4 8 16
+  python services/benchmark_quiz_strategies.py --strategies pipeline --qg-modes cloze t2t
+
+--qg-modes only differs when the text2text fallback QG model is loaded: "t2t" adds one
+question-generation call per chunk on top of the cloze question.
+
+Run build_subject_index.py first (and set CORPUS_OFFLINE=1) so timings measure generation,
+not network fetches. Model loading is reported separately from generation time.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from quiz_strategies import STRATEGIES, get_strategy
+from subject_corpus import SUBJECT_FILES
+
+DEFAULT_TOPICS = ['Operating System', 'Database Management System', 'Computer Network', 'Machine Learning']
+
+
+def bench(name, topics, per_topic_q, runs, batch_size=None, qg_mode=None):
+    strategy = get_strategy(name)
+    start = time.perf_counter()
+    strategy.load()
+    load_s = time.perf_counter() - start
+
+    options = {'batch_size': batch_size} if batch_size else {}
+    if qg_mode:
+        options['t2t_questions'] = qg_mode == 't2t'
+    durations, counts = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        questions = strategy.generate(topics, per_topic_q=per_topic_q, **options)
+        durations.append(time.perf_counter() - start)
+        counts.append(len(questions))
+
+    total_q, total_s = sum(counts), sum(durations)
+    return {
+        'strategy': name,
+        'batch_size': batch_size,
+        'qg_mode': qg_mode,
+        'load_s': round(load_s, 3),
+        'questions': round(total_q / runs, 1),
+        'mean_s': round(statistics.mean(durations), 3),
+        'questions_per_s': round(total_q / total_s, 2) if total_s > 0 else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark quiz strategies (questions/sec)')
+    parser.add_argument('--strategies', nargs='+', default=list(STRATEGIES), choices=list(STRATEGIES))
+    parser.add_argument('--topics', nargs='+', default=DEFAULT_TOPICS,
+                        help=f"Topics (curated: {', '.join(SUBJECT_FILES.values())})")
+    parser.add_argument('--per-topic', type=int, default=8)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[],
+                        help='Batch sizes to sweep for the pipeline strategy')
+    parser.add_argument('--qg-modes', nargs='+', default=[], choices=['cloze', 't2t'],
+                        help='Text2text question modes to compare for the pipeline strategy')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    rows = []
+    for name in args.strategies:
+        sweep = args.batch_sizes if name == 'pipeline' and args.batch_sizes else [None]
+        qg_modes = args.qg_modes if name == 'pipeline' and args.qg_modes else [None]
+        for qg_mode in qg_modes:
+            for batch_size in sweep:
+                rows.append(bench(name, args.topics, args.per_topic, args.runs, batch_size, qg_mode))
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'strategy':<10} {'qg':>5} {'batch':>5} {'load_s':>8} {'questions':>9} {'mean_s':>8} {'q/s':>8}")
+    for row in rows:
+        print(f"{row['strategy']:<10} {row['qg_mode'] or '-':>5} {row['batch_size'] or '-':>5} {row['load_s']:>8.2f} "
+              f"{row['questions']:>9} {row['mean_s']:>8.2f} {row['questions_per_s'] or 0:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
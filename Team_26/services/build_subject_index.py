@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Build the local subject corpus index used by the quiz generators.
+
+Pre-chunks, pre-summarizes and pre-embeds the curated data/*_subject.md files and
+data/subjectContents.json into the corpus store (services/.cache/subject_corpus.sqlite3),
+and optionally fetches extra topics live so later quiz requests need no network.
+
+Usage:
+  python services/build_subject_index.py                 # index curated subjects (unchanged ones are skipped)
+  python services/build_subject_index.py --force         # rebuild every curated subject
+  python services/build_subject_index.py --fetch "Quantum Computing" "Compilers"
+  python services/build_subject_index.py --list
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from subject_corpus import CURATED, FETCHED, content_hash, get_corpus_store, load_curated_corpora
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def index_curated(generator, store, force: bool = False) -> int:
+    built = 0
+    for subject, text in load_curated_corpora().items():
+        text_hash = content_hash(text)
+        existing = store.get(subject, include_expired=True)
+        if not force and existing and existing['origin'] == CURATED and existing['content_hash'] == text_hash:
+            logger.info(f"{subject}: unchanged, skipping")
+            continue
+        start = time.perf_counter()
+        summary, chunks, embeddings = generator.prepare_material(text)
+        store.put(subject, 'Curated', CURATED, summary, chunks, embeddings, text_hash=text_hash)
+        logger.info(f"{subject}: {len(chunks)} chunks in {time.perf_counter() - start:.1f}s")
+        built += 1
+    return built
+
+
+def index_fetched(generator, store, topics) -> int:
+    built = 0
+    for topic in topics:
+        start = time.perf_counter()
+        raw, src_tag = generator.fetch_learning_material(topic)
+        if not raw.strip():
+            logger.warning(f"{topic}: no material found")
+            continue
+        summary, chunks, embeddings = generator.prepare_material(raw)
+        store.put(topic, src_tag, FETCHED, summary, chunks, embeddings, text_hash=content_hash(raw))
+        logger.info(f"{topic}: {len(chunks)} chunks from {src_tag} in {time.perf_counter() - start:.1f}s")
+        built += 1
+    return built
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the local subject corpus index for quiz generation')
+    parser.add_argument('--force', action='store_true', help='Rebuild curated subjects even if unchanged')
+    parser.add_argument('--fetch', nargs='*', default=[], help='Extra topics to fetch live and store')
+    parser.add_argument('--list', action='store_true', help='List indexed topics and exit')
+    args = parser.parse_args()
+
+    store = get_corpus_store()
+    if args.list:
+        for topic, origin, n_chunks in store.topics():
+            print(f"{topic:<35} {origin:<8} {n_chunks:>4} chunks")
+        return
+
+    from quiz_generator import QuizGenerator
+    generator = QuizGenerator()
+
+    built = index_curated(generator, store, force=args.force)
+    built += index_fetched(generator, store, args.fetch)
+    logger.info(f"Indexed {built} topic(s); store has {len(store.topics())} topic(s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Distractor engine for the quiz generators.
+
+Embeds a document's whole term pool plus all of its answers in one batched encoder call,
+ranks distractors for every answer with a single matrix multiply + top-k, and picks the
+final set with MMR (maximal marginal relevance) so the options are not near-duplicates
+of each other. Term embeddings are kept in a bounded on-disk cache shared across requests.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    "QUIZ_TERM_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "term_embeddings.sqlite3"),
+)
+DEFAULT_CACHE_MAX = int(os.environ.get("QUIZ_TERM_CACHE_MAX", "50000"))
+MEMORY_CACHE_MAX = int(os.environ.get("QUIZ_TERM_MEMORY_MAX", "20000"))
+ENCODE_BATCH_SIZE = int(os.environ.get("QUIZ_ENCODE_BATCH_SIZE", "128"))
+
+
+class TermEmbeddingCache:
+    """Bounded term -> unit vector cache: in-memory LRU in front of a SQLite file."""
+
+    def __init__(self, model_name: str, path: str = DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_CACHE_MAX):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS term_embeddings ("
+                    " model TEXT NOT NULL, term TEXT NOT NULL, dim INTEGER NOT NULL,"
+                    " vec BLOB NOT NULL, used REAL NOT NULL, PRIMARY KEY (model, term))"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS term_embeddings_used ON term_embeddings (used)")
+                self._db.commit()
+            except sqlite3.Error:
+                self._db = None
+
+    def _remember(self, term: str, vec: np.ndarray):
+        self._memory[term] = vec
+        self._memory.move_to_end(term)
+        while len(self._memory) > MEMORY_CACHE_MAX:
+            self._memory.popitem(last=False)
+
+    def get_many(self, terms: Iterable[str]) -> Dict[str, np.ndarray]:
+        found, missing = {}, []
+        with self._lock:
+            for t in terms:
+                if t in self._memory:
+                    self._memory.move_to_end(t)
+                    found[t] = self._memory[t]
+                else:
+                    missing.append(t)
+
+            if missing and self._db is not None:
+                now = time.time()
+                for start in range(0, len(missing), 500):
+                    part = missing[start:start + 500]
+                    rows = self._db.execute(
+                        "SELECT term, dim, vec FROM term_embeddings WHERE model = ? AND term IN (%s)"
+                        % ",".join("?" * len(part)),
+                        [self.model_name, *part],
+                    ).fetchall()
+                    for term, dim, blob in rows:
+                        vec = np.frombuffer(blob, dtype=np.float32, count=dim)
+                        found[term] = vec
+                        self._remember(term, vec)
+                    if rows:
+                        self._db.executemany(
+                            "UPDATE term_embeddings SET used = ? WHERE model = ? AND term = ?",
+                            [(now, self.model_name, r[0]) for r in rows],
+                        )
+                self._db.commit()
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]):
+        if not items:
+            return
+        with self._lock:
+            for term, vec in items.items():
+                self._remember(term, vec)
+            if self._db is None:
+                return
+            now = time.time()
+            self._db.executemany(
+                "INSERT OR REPLACE INTO term_embeddings (model, term, dim, vec, used) VALUES (?, ?, ?, ?, ?)",
+                [(self.model_name, t, v.shape[0], v.astype(np.float32).tobytes(), now) for t, v in items.items()],
+            )
+            (count,) = self._db.execute("SELECT COUNT(*) FROM term_embeddings").fetchone()
+            if count > self.max_entries:
+                # Evict least recently used down to 90% so we don't prune on every insert
+                self._db.execute(
+                    "DELETE FROM term_embeddings WHERE rowid IN ("
+                    " SELECT rowid FROM term_embeddings ORDER BY used ASC LIMIT ?)",
+                    (count - int(self.max_entries * 0.9),),
+                )
+            self._db.commit()
+
+
+class DistractorEngine:
+    """Batched embedding + vectorized distractor ranking for one SentenceTransformer."""
+
+    def __init__(self, embedder, model_name: str, cache: TermEmbeddingCache = None,
+                 batch_size: int = ENCODE_BATCH_SIZE, diversity: float = 0.3):
+        self.embedder = embedder
+        self.cache = cache if cache is not None else TermEmbeddingCache(model_name)
+        self.batch_size = batch_size
+        self.diversity = diversity
+
+    def embed(self, terms: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Unit vectors for terms; only cache misses go to the encoder, in one batched call."""
+        unique = list(dict.fromkeys(t for t in terms if t))
+        vectors = self.cache.get_many(unique)
+        missing = [t for t in unique if t not in vectors]
+        if missing:
+            encoded = self.embedder.encode(
+                missing, batch_size=self.batch_size, convert_to_numpy=True,
+                normalize_embeddings=True, show_progress_bar=False,
+            ).astype(np.float32)
+            fresh = dict(zip(missing, encoded))
+            self.cache.put_many(fresh)
+            vectors.update(fresh)
+        return vectors
+
+    def rank(self, answers: List[str], terms: List[str], k: int = 6) -> List[List[str]]:
+        """
+        For each answer return up to k distractors from terms: most similar first,
+        re-ranked with MMR so picks are also dissimilar from each other.
+        """
+        if not answers:
+            return []
+        pools = []
+        for a in answers:
+            al = a.lower()
+            pools.append([t for t in terms if t.lower() != al and 2 <= len(t) <= 30])
+        pool_terms = list(dict.fromkeys(t for pool in pools for t in pool))
+        if not pool_terms:
+            return [[] for _ in answers]
+
+        vectors = self.embed(list(answers) + pool_terms)
+        term_index = {t: i for i, t in enumerate(pool_terms)}
+        T = np.stack([vectors[t] for t in pool_terms])
+        A = np.stack([vectors[a] for a in answers])
+        sims = A @ T.T  # (answers, terms)
+        term_sims = T @ T.T
+
+        # Mask terms outside each answer's pool (self-matches, bad lengths)
+        allowed = np.zeros_like(sims, dtype=bool)
+        for row, pool in enumerate(pools):
+            allowed[row, [term_index[t] for t in pool]] = True
+        sims = np.where(allowed, sims, -np.inf)
+
+        shortlist = min(len(pool_terms), max(k * 3, k))
+        if shortlist < len(pool_terms):
+            top = np.argpartition(-sims, shortlist - 1, axis=1)[:, :shortlist]
+        else:
+            top = np.tile(np.arange(len(pool_terms)), (len(answers), 1))
+
+        results = []
+        for row in range(len(answers)):
+            cand = top[row][np.isfinite(sims[row, top[row]])]
+            cand = cand[np.argsort(-sims[row, cand])]
+            results.append([pool_terms[i] for i in self._mmr(sims[row], term_sims, cand, k)])
+        return results
+
+    def _mmr(self, relevance: np.ndarray, term_sims: np.ndarray, candidates: np.ndarray, k: int) -> List[int]:
+        if len(candidates) == 0:
+            return []
+        lam = 1.0 - self.diversity
+        chosen = [int(candidates[0])]
+        remaining = list(candidates[1:])
+        while remaining and len(chosen) < k:
+            rem = np.array(remaining)
+            redundancy = term_sims[np.ix_(rem, chosen)].max(axis=1)
+            scores = lam * relevance[rem] - (1.0 - lam) * redundancy
+            best = int(np.argmax(scores))
+            chosen.append(int(rem[best]))
+            remaining.pop(best)
+        return chosen
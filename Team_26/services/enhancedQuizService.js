@@ -1,6 +1,7 @@
 const { spawn } = require('child_process');
 const path = require('path');
 const fs = require('fs').promises;
+const pythonWorkerPool = require('./pythonWorkerPool');
 
 class EnhancedQuizService {
     constructor() {
@@ -31,6 +32,14 @@ class EnhancedQuizService {
                 }
             };
             
+            try {
+                const { result, timings } = await pythonWorkerPool.run(pythonPath, 'enhanced', inputData);
+                console.log(`✅ Generated ${result.length} high-quality questions (worker, ${timings.total}s)`);
+                return result;
+            } catch (e) {
+                console.warn('Quiz worker unavailable, spawning generator:', e && e.message ? e.message : e);
+            }
+            
             const tempInputPath = path.join(__dirname, 'temp_enhanced_input.json');
             await fs.writeFile(tempInputPath, JSON.stringify(inputData));
             
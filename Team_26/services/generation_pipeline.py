@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Batched summarization / question generation helpers shared by the quiz generators.
+
+Texts are sorted by length before batching so each batch pads to similar lengths, run
+through the HF pipeline in batches of QUIZ_BATCH_SIZE, and returned in input order.
+"""
+
+import logging
+import os
+from typing import Callable, Iterator, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.environ.get("QUIZ_BATCH_SIZE", "8"))
+
+
+def length_sorted_batches(texts: Sequence[str], batch_size: int) -> Iterator[Tuple[List[int], List[str]]]:
+    """Yield (original indices, texts) batches of similar length."""
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    for start in range(0, len(order), max(1, batch_size)):
+        idxs = order[start:start + batch_size]
+        yield idxs, [texts[i] for i in idxs]
+
+
+def _first(result):
+    # pipelines return [dict] per input when given a list, or a bare dict for some tasks
+    return result[0] if isinstance(result, list) and result else result
+
+
+def run_batched(pipe: Callable, texts: Sequence[str], batch_size: int = BATCH_SIZE,
+                key: str = "generated_text", fallback: Callable[[str], str] = None, **kwargs) -> List[str]:
+    """
+    Run an HF text2text/summarization pipeline over texts and return `key` from each output.
+    A batch that fails is retried one text at a time; texts that still fail get fallback(text).
+    """
+    out = [None] * len(texts)
+    for idxs, batch in length_sorted_batches(texts, batch_size):
+        try:
+            results = pipe(batch, batch_size=len(batch), truncation=True, **kwargs)
+            for i, r in zip(idxs, results):
+                out[i] = _first(r)[key]
+        except Exception as e:
+            logger.warning(f"Batch of {len(batch)} failed ({e}); retrying individually")
+            for i, text in zip(idxs, batch):
+                try:
+                    out[i] = _first(pipe(text, truncation=True, **kwargs))[key]
+                except Exception as e_one:
+                    logger.warning(f"Generation error: {e_one}")
+                    out[i] = fallback(text) if fallback else text
+    return out
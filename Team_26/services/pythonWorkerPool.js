@@ -0,0 +1,186 @@
+const { spawn } = require('child_process');
+const path = require('path');
+const readline = require('readline');
+
+/**
+ * Pool of long-lived quiz_worker.py processes speaking JSON lines over stdin/stdout.
+ * Models are loaded once per worker process instead of once per request; each worker
+ * also runs jobs concurrently on its own thread pool.
+ */
+class PythonWorker {
+    constructor(pythonPath, options) {
+        this.pythonPath = pythonPath;
+        this.options = options;
+        this.pending = new Map();
+        this.ready = null;
+        this.process = null;
+        this.exited = false;
+    }
+
+    start() {
+        if (this.ready) return this.ready;
+
+        this.ready = new Promise((resolve, reject) => {
+            const args = [this.options.scriptPath, '--threads', String(this.options.threads)];
+            if (this.options.preload) args.push('--preload', this.options.preload);
+
+            const proc = spawn(this.pythonPath, args, {
+                stdio: ['pipe', 'pipe', 'pipe'],
+                cwd: path.dirname(this.options.scriptPath),
+                env: { ...process.env, PYTHONUTF8: '1', PYTHONIOENCODING: 'utf-8' }
+            });
+            this.process = proc;
+
+            const startTimer = setTimeout(() => {
+                reject(new Error('Python worker did not become ready in time'));
+                proc.kill();
+            }, this.options.startTimeoutMs);
+
+            readline.createInterface({ input: proc.stdout }).on('line', (line) => {
+                let message;
+                try {
+                    message = JSON.parse(line);
+                } catch (e) {
+                    console.warn('quiz_worker emitted non-JSON line:', line);
+                    return;
+                }
+                if (message.id === null || message.id === undefined) {
+                    if (message.result && message.result.ready) {
+                        clearTimeout(startTimer);
+                        resolve(this);
+                    } else if (!message.ok) {
+                        console.warn('quiz_worker error:', message.error);
+                    }
+                    return;
+                }
+                const job = this.pending.get(String(message.id));
+                if (!job) return;
+                this.pending.delete(String(message.id));
+                clearTimeout(job.timer);
+                if (message.ok) {
+                    job.resolve({ result: message.result, timings: message.timings || {} });
+                } else {
+                    const err = new Error(`quiz_worker ${job.task} failed: ${message.error}`);
+                    err.timings = message.timings || {};
+                    job.reject(err);
+                }
+            });
+
+            proc.stdin.on('error', (error) => {
+                this._fail(new Error(`Python worker stdin closed: ${error.message}`));
+            });
+
+            proc.stderr.on('data', (data) => {
+                if (this.options.logStderr) process.stderr.write(data);
+            });
+
+            proc.on('error', (error) => {
+                clearTimeout(startTimer);
+                this._fail(new Error(`Failed to start Python worker: ${error.message}`));
+                reject(error);
+            });
+
+            proc.on('exit', (code, signal) => {
+                clearTimeout(startTimer);
+                this._fail(new Error(`Python worker exited (code=${code}, signal=${signal})`));
+                reject(new Error(`Python worker exited before ready (code=${code})`));
+            });
+        });
+
+        return this.ready;
+    }
+
+    _fail(error) {
+        this.exited = true;
+        for (const job of this.pending.values()) {
+            clearTimeout(job.timer);
+            job.reject(error);
+        }
+        this.pending.clear();
+    }
+
+    async call(id, task, payload, timeoutMs) {
+        await this.start();
+        if (this.exited) throw new Error('Python worker is not running');
+
+        return new Promise((resolve, reject) => {
+            const timer = setTimeout(() => {
+                this.pending.delete(id);
+                reject(new Error(`quiz_worker ${task} timed out after ${timeoutMs}ms`));
+            }, timeoutMs);
+            this.pending.set(id, { task, resolve, reject, timer });
+            this.process.stdin.write(JSON.stringify({ id, task, payload }) + '\n');
+        });
+    }
+
+    stop() {
+        if (this.process && !this.exited) {
+            this.process.stdin.end();
+        }
+    }
+}
+
+class PythonWorkerPool {
+    constructor(options = {}) {
+        this.options = {
+            scriptPath: path.join(__dirname, 'quiz_worker.py'),
+            size: parseInt(process.env.QUIZ_WORKER_PROCESSES || '1', 10),
+            threads: parseInt(process.env.QUIZ_WORKER_THREADS || '4', 10),
+            preload: process.env.QUIZ_WORKER_PRELOAD || 'advanced',
+            startTimeoutMs: parseInt(process.env.QUIZ_WORKER_START_TIMEOUT_MS || '180000', 10),
+            requestTimeoutMs: parseInt(process.env.QUIZ_WORKER_REQUEST_TIMEOUT_MS || '300000', 10),
+            logStderr: process.env.QUIZ_WORKER_LOG_STDERR === '1',
+            ...options
+        };
+        this.workers = [];
+        this.nextId = 1;
+        this.disabled = process.env.QUIZ_WORKER_DISABLED === '1';
+    }
+
+    /**
+     * Pick the live worker with the fewest in-flight jobs, (re)spawning dead ones.
+     */
+    _pickWorker(pythonPath) {
+        this.workers = this.workers.filter(w => !w.exited);
+        while (this.workers.length < Math.max(1, this.options.size)) {
+            this.workers.push(new PythonWorker(pythonPath, this.options));
+        }
+        return this.workers.reduce((best, w) => (w.pending.size < best.pending.size ? w : best));
+    }
+
+    /**
+     * Run a task on a warm worker. Resolves { result, timings }.
+     */
+    async run(pythonPath, task, payload = {}, { timeoutMs } = {}) {
+        if (this.disabled) throw new Error('Python worker pool disabled (QUIZ_WORKER_DISABLED=1)');
+        const worker = this._pickWorker(pythonPath);
+        const id = String(this.nextId++);
+        const started = Date.now();
+        const out = await worker.call(id, task, payload, timeoutMs || this.options.requestTimeoutMs);
+        out.timings.roundtrip = (Date.now() - started) / 1000;
+        return out;
+    }
+
+    /**
+     * Start workers ahead of the first request so model loading happens at boot.
+     */
+    async warmUp(pythonPath) {
+        if (this.disabled) return;
+        const size = Math.max(1, this.options.size);
+        while (this.workers.length < size) {
+            this.workers.push(new PythonWorker(pythonPath, this.options));
+        }
+        await Promise.all(this.workers.map(w => w.start()));
+    }
+
+    stop() {
+        for (const w of this.workers) w.stop();
+        this.workers = [];
+    }
+}
+
+const pool = new PythonWorkerPool();
+process.on('exit', () => pool.stop());
+
+module.exports = pool;
+module.exports.PythonWorkerPool = PythonWorkerPool;
@@ -11,6 +11,7 @@ import re
 import random
 import math
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from collections import defaultdict, Counter
 from typing import List, Dict, Tuple, Optional
 
@@ -29,6 +30,10 @@ from sentence_transformers import SentenceTransformer, util
 from transformers import pipeline, AutoTokenizer
 from sklearn.cluster import KMeans
 
+from distractor_engine import DistractorEngine
+from generation_pipeline import BATCH_SIZE, run_batched
+from subject_corpus import FETCHED, OFFLINE, content_hash, get_corpus_store
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -44,7 +49,7 @@ try:
 except Exception as e:
     logger.warning(f"Could not download NLTK data: {e}")
 
-from nltk import pos_tag
+from nltk import pos_tag_sents
 from nltk.corpus import stopwords
 
 # Model configurations
@@ -54,18 +59,24 @@ QG_FALLBACK_MODEL = "iarfmoose/t5-base-question-generator"
 SUMM_MODEL_NAME = "sshleifer/distilbart-cnn-6-6"
 ALT_SUMM_MODEL_NAME = "t5-small"
 
+# With the text2text fallback QG model, also generate a question per chunk (one extra model
+# call each) instead of only the cloze question; off keeps the original cloze-only output
+T2T_QUESTIONS = os.environ.get("QUIZ_T2T_QUESTIONS", "0") == "1"
+
 # Global variables
 rng = random.Random(42)
 np.random.seed(42)
 STOP = set(stopwords.words("english"))
 
 class QuizGenerator:
-    def __init__(self):
+    def __init__(self, batch_size: int = BATCH_SIZE):
         """Initialize the quiz generator with ML models"""
+        self.batch_size = batch_size
         self.embedder = None
         self.summarizer = None
         self.qg = None
         self.qg_mode = None
+        self.distractor_engine = None
         self._initialize_models()
     
     def _initialize_models(self):
@@ -77,6 +88,7 @@ class QuizGenerator:
         except Exception as e:
             logger.error(f"Failed to initialize embedder: {e}")
             raise
+        self.distractor_engine = DistractorEngine(self.embedder, EMB_MODEL_NAME)
         
         # Initialize summarizer
         try:
@@ -187,21 +199,91 @@ class QuizGenerator:
         
         return combined, src
     
+    def prepare_material(self, raw: str) -> Tuple[str, List[str], Optional[np.ndarray]]:
+        """Summarize, chunk and embed raw material (what the corpus store keeps per topic)"""
+        return self.prepare_materials([raw])[0]
+    
+    def prepare_materials(self, raws: List[str], batch_size: Optional[int] = None) -> List[Tuple[str, List[str], Optional[np.ndarray]]]:
+        """Batched prepare_material: one summarizer pass and one encode call for all texts"""
+        summaries = self.summarize_many(raws, batch_size=batch_size)
+        chunk_lists = [self.chunk_text(summary, target_tokens=140) for summary in summaries]
+        flat = [c for chunks in chunk_lists for c in chunks]
+        vecs = self.embedder.encode(flat, batch_size=64, convert_to_numpy=True, show_progress_bar=False) if flat else None
+        
+        out, offset = [], 0
+        for summary, chunks in zip(summaries, chunk_lists):
+            embeddings = vecs[offset:offset + len(chunks)] if chunks else None
+            offset += len(chunks)
+            out.append((summary, chunks, embeddings))
+        return out
+    
+    def load_topic_material(self, topic: str) -> Tuple[List[str], str, Optional[np.ndarray]]:
+        """Chunks for a topic from the local corpus store; live fetch (and store) only on a miss"""
+        return self.load_topics_material([topic])[topic]
+    
+    def load_topics_material(self, topics: List[str], batch_size: Optional[int] = None) -> Dict[str, Tuple[List[str], str, Optional[np.ndarray]]]:
+        """Store lookups for all topics; misses are fetched concurrently and prepared in one batch"""
+        store = get_corpus_store()
+        materials, entries, misses = {}, {}, []
+        for topic in topics:
+            entry = store.get(topic, include_expired=True)
+            entries[topic] = entry
+            if entry and entry["chunks"] and (not entry["expired"] or OFFLINE):
+                logger.info(f"Corpus store hit for {topic} ({entry['origin']}, {len(entry['chunks'])} chunks)")
+                materials[topic] = (entry["chunks"], entry["source"], entry["embeddings"])
+            elif OFFLINE:
+                logger.warning(f"No stored material for {topic} and CORPUS_OFFLINE=1")
+                materials[topic] = ([], "Unknown", None)
+            else:
+                misses.append(topic)
+        
+        if not misses:
+            return materials
+        
+        with ThreadPoolExecutor(max_workers=min(4, len(misses))) as pool:
+            fetched = dict(zip(misses, pool.map(self.fetch_learning_material, misses)))
+        
+        to_prepare = []
+        for topic in misses:
+            raw, src_tag = fetched[topic]
+            entry = entries[topic]
+            if raw.strip():
+                to_prepare.append(topic)
+            elif entry and entry["chunks"]:
+                logger.warning(f"Live fetch empty for {topic}; serving expired stored material")
+                materials[topic] = (entry["chunks"], entry["source"], entry["embeddings"])
+            else:
+                materials[topic] = ([], src_tag, None)
+        
+        prepared = self.prepare_materials([fetched[t][0] for t in to_prepare], batch_size=batch_size) if to_prepare else []
+        for topic, (summary, chunks, embeddings) in zip(to_prepare, prepared):
+            raw, src_tag = fetched[topic]
+            if chunks:
+                store.put(topic, src_tag, FETCHED, summary, chunks, embeddings, text_hash=content_hash(raw))
+            materials[topic] = (chunks, src_tag, embeddings)
+        return materials
+    
     def summarize_text(self, text: str, max_len=220, min_len=80) -> str:
         """Summarize text using ML model"""
+        return self.summarize_many([text], max_len=max_len, min_len=min_len)[0]
+    
+    def summarize_many(self, texts: List[str], max_len=220, min_len=80, batch_size: Optional[int] = None) -> List[str]:
+        """
+        Summarize texts in length-sorted batches; short texts are returned unchanged.
+        batch_size overrides self.batch_size for this call only.
+        """
         if self.summarizer is None:
             logger.warning("Summarization model not loaded. Skipping summarization.")
-            return text
-        
-        if not text or len(self.safe_word_tokenize(text)) < min_len:
-            return text
-        
-        try:
-            summary = self.summarizer(text, max_length=max_len, min_length=min_len, do_sample=False)[0]["summary_text"]
-            return summary
-        except Exception as e:
-            logger.warning(f"Summarization error: {e}. Returning original text.")
-            return text
+            return list(texts)
+        
+        out = list(texts)
+        todo = [i for i, t in enumerate(texts) if t and len(self.safe_word_tokenize(t)) >= min_len]
+        if todo:
+            summaries = run_batched(self.summarizer, [texts[i] for i in todo], batch_size=batch_size or self.batch_size,
+                                    key="summary_text", max_length=max_len, min_length=min_len, do_sample=False)
+            for i, summary in zip(todo, summaries):
+                out[i] = summary
+        return out
     
     def chunk_text(self, text: str, target_tokens: int = 160) -> List[str]:
         """Split text into chunks for processing"""
@@ -223,73 +305,100 @@ class QuizGenerator:
     
     def _normalize_qa_pairs(self, text_chunk: str) -> List[Dict]:
         """Generate question-answer pairs from text"""
+        return self._normalize_qa_pairs_many([text_chunk])[0]
+    
+    def _normalize_qa_pairs_many(self, chunks: List[str], batch_size: Optional[int] = None,
+                                 t2t_questions: Optional[bool] = None) -> List[List[Dict]]:
+        """
+        Question-answer pairs for every chunk of a document.
+        t2t_questions (default T2T_QUESTIONS) turns on model-written questions in text2text mode.
+        """
         if self.qg_mode == "valhalla":
-            try:
-                return [x for x in self.qg(text_chunk) if isinstance(x, dict) and x.get("question") and x.get("answer")]
-            except:
-                return []
-        else:
-            toks = [w for w in self.safe_word_tokenize(text_chunk) if w.isalpha()]
+            # the multitask pipeline takes one passage per call (it batches that passage's sentences itself)
+            out = []
+            for text_chunk in chunks:
+                try:
+                    out.append([x for x in self.qg(text_chunk) if isinstance(x, dict) and x.get("question") and x.get("answer")])
+                except:
+                    out.append([])
+            return out
+        
+        # text2text: pick each chunk's answer from one batched POS-tagging pass; the cloze is
+        # the question unless t2t_questions also generates them in length-sorted batches
+        token_lists = [[w for w in self.safe_word_tokenize(c) if w.isalpha()] for c in chunks]
+        tagged_lists = pos_tag_sents(token_lists)
+        
+        out, prompts, prompt_idx = [[] for _ in chunks], [], []
+        for i, (chunk, toks, tagged) in enumerate(zip(chunks, token_lists, tagged_lists)):
             if len(toks) < 6:
-                return []
-            
-            tagged = pos_tag(toks)
+                continue
             nouns = [w for w, pos in tagged if pos.startswith("NN")]
             answer = nouns[0] if nouns else toks[0]
-            q = text_chunk.replace(answer, "_____")[:512]
-            return [{"question": q, "answer": answer}]
+            out[i] = [{"question": chunk.replace(answer, "_____")[:512], "answer": answer}]
+            prompts.append(f"<answer> {answer} <context> {chunk}")
+            prompt_idx.append(i)
+        
+        if t2t_questions is None:
+            t2t_questions = T2T_QUESTIONS
+        if prompts and t2t_questions:
+            questions = run_batched(self.qg, prompts, batch_size=batch_size or self.batch_size, fallback=lambda _: "", max_length=64)
+            for i, question in zip(prompt_idx, questions):
+                if question and question.strip().endswith("?"):
+                    out[i][0]["question"] = question.strip()
+        return out
     
     def key_terms_from_chunk(self, chunk: str, top_k: int = 8) -> List[str]:
         """Extract key terms from text chunk"""
-        toks = [w for w in self.safe_word_tokenize(chunk) if w.isalpha() and w.lower() not in STOP]
-        tagged = pos_tag(toks)
-        cands = [w for w, pos in tagged if pos.startswith("NN") or pos.startswith("JJ")]
-        freq = Counter([w.lower() for w in cands])
-        return [w for w, _ in freq.most_common(top_k)]
+        return self.key_terms_many([chunk], top_k=top_k)[0]
     
-    def candidate_distractors(self, answer: str, terms: List[str], embeddings_cache: Dict) -> List[str]:
+    def key_terms_many(self, chunks: List[str], top_k: int = 8) -> List[List[str]]:
+        """Key terms for several chunks with a single POS-tagging pass"""
+        token_lists = [[w for w in self.safe_word_tokenize(c) if w.isalpha() and w.lower() not in STOP] for c in chunks]
+        out = []
+        for tagged in pos_tag_sents(token_lists):
+            cands = [w for w, pos in tagged if pos.startswith("NN") or pos.startswith("JJ")]
+            freq = Counter([w.lower() for w in cands])
+            out.append([w for w, _ in freq.most_common(top_k)])
+        return out
+    
+    def candidate_distractors(self, answer: str, terms: List[str]) -> List[str]:
         """Generate candidate distractors using embeddings"""
-        pool = [t for t in terms if t.lower() != answer.lower() and 2 <= len(t) <= 30]
-        if not pool or not answer.strip():
+        if not answer.strip():
             return []
-        
+        return self.candidate_distractors_many([answer], terms)[0]
+    
+    def candidate_distractors_many(self, answers: List[str], terms: List[str], k: int = 6) -> List[List[str]]:
+        """Rank distractors for several answers at once (one encode call, one matrix multiply)"""
         try:
-            if answer not in embeddings_cache:
-                embeddings_cache[answer] = self.embedder.encode(answer, convert_to_tensor=True)
-            ans_emb = embeddings_cache[answer]
-            
-            vecs, keep = [], []
-            for t in pool:
-                if t not in embeddings_cache:
-                    embeddings_cache[t] = self.embedder.encode(t, convert_to_tensor=True)
-                vecs.append(embeddings_cache[t])
-                keep.append(t)
-            
-            sims = [float(util.pytorch_cos_sim(ans_emb, v)[0]) for v in vecs]
-            ranked = [keep[i] for i in np.argsort(sims)[::-1]]
-            return ranked[:6]
+            return self.distractor_engine.rank(answers, terms, k=k)
         except Exception as e:
-            logger.warning(f"Embedding error for '{answer}': {e}")
-            return []
+            logger.warning(f"Embedding error for {answers}: {e}")
+            return [[] for _ in answers]
     
-    def make_mcqs_from_chunk(self, chunk: str, topic_label: str, subtopic: str, source_tag: str, max_q: int = 5) -> List[Dict]:
-        """Generate MCQs from a text chunk"""
+    def make_mcqs_from_chunk(self, chunk: str, topic_label: str, subtopic: str, source_tag: str, max_q: int = 5,
+                             qa_pairs: Optional[List[Dict]] = None, terms: Optional[List[str]] = None) -> List[Dict]:
+        """Generate MCQs from a text chunk (qa_pairs/terms may be precomputed by the caller)"""
         if not chunk.strip():
             return []
         
-        qa_pairs = self._normalize_qa_pairs(chunk)
+        if qa_pairs is None:
+            qa_pairs = self._normalize_qa_pairs(chunk)
         if not qa_pairs:
             return []
         
-        terms, emb_cache = self.key_terms_from_chunk(chunk, top_k=20), {}
+        if terms is None:
+            terms = self.key_terms_from_chunk(chunk, top_k=20)
         mcqs = []
         
+        pairs = []
         for qa in qa_pairs[:max_q]:
             question, answer = qa.get("question", "").strip(), qa.get("answer", "").strip()
-            if not question or not answer or len(answer.split()) > 6:
-                continue
-            
-            dist_cands = self.candidate_distractors(answer, terms, emb_cache)
+            if question and answer and len(answer.split()) <= 6:
+                pairs.append((question, answer))
+        
+        ranked = self.candidate_distractors_many([a for _, a in pairs], terms)
+        
+        for (question, answer), dist_cands in zip(pairs, ranked):
             if len(dist_cands) < 3:
                 words = [w for w in self.safe_word_tokenize(chunk) if w.isalpha()]
                 rng.shuffle(words)
@@ -327,12 +436,13 @@ class QuizGenerator:
         
         return mcqs
     
-    def subtopic_labels(self, chunks: List[str], topic_label: str, k: int = 4) -> List[str]:
+    def subtopic_labels(self, chunks: List[str], topic_label: str, k: int = 4, vecs: Optional[np.ndarray] = None) -> List[str]:
         """Generate subtopic labels using clustering"""
         if not chunks:
             return []
         
-        vecs = self.embedder.encode(chunks, convert_to_tensor=False)
+        if vecs is None:
+            vecs = self.embedder.encode(chunks, convert_to_tensor=False)
         k = min(k, len(chunks)) if len(chunks) > 1 else 1
         
         if k <= 1:
@@ -342,40 +452,61 @@ class QuizGenerator:
         labels = km.fit_predict(vecs)
         names = {}
         
-        for c in range(k):
-            idxs = [i for i, l in enumerate(labels) if l == c]
-            text_join = " ".join([chunks[i] for i in idxs])
-            terms = self.key_terms_from_chunk(text_join, top_k=3)
+        cluster_texts = [" ".join([chunks[i] for i, l in enumerate(labels) if l == c]) for c in range(k)]
+        for c, terms in enumerate(self.key_terms_many(cluster_texts, top_k=3)):
             pretty = ", ".join(terms) if terms else f"Cluster-{c}"
             names[c] = f"{topic_label}::{pretty}"
         
         return [names[l] for l in labels]
     
-    def build_cold_start_quiz(self, selected_topics: List[str], per_topic_q: int = 8) -> List[Dict]:
-        """Build a quiz from scratch using web content"""
-        all_mcqs = []
-        
+    def build_cold_start_quiz(self, selected_topics: List[str], per_topic_q: int = 8,
+                              batch_size: Optional[int] = None,
+                              t2t_questions: Optional[bool] = None) -> List[Dict]:
+        """
+        Build a quiz from scratch using stored or web content.
+        batch_size and t2t_questions apply to this request only; the generator is shared
+        across worker threads, so they are passed down rather than stored on self.
+        """
+        materials = self.load_topics_material(selected_topics, batch_size=batch_size)
+        
+        # Flatten every topic's chunks so QG, POS tagging and embedding run once over the whole request
+        jobs = []
         for topic in selected_topics:
             logger.info(f"Processing topic: {topic}")
-            raw, src_tag = self.fetch_learning_material(topic)
-            
-            if not raw.strip():
-                logger.warning(f"No material found for: {topic}")
-                continue
-            
-            cleaned = self.summarize_text(raw)
-            chunks = self.chunk_text(cleaned, target_tokens=140)
+            chunks, src_tag, chunk_vecs = materials[topic]
             
             if not chunks:
+                logger.warning(f"No material found for: {topic}")
                 continue
             
-            subs = self.subtopic_labels(chunks, topic, k=min(4, max(1, len(chunks) // 2)))
-            
-            for chunk, sub in zip(chunks, subs):
-                all_mcqs.extend(self.make_mcqs_from_chunk(chunk, topic_label=topic, subtopic=sub, source_tag=src_tag, max_q=3))
-            
-            # Limit questions per topic
-            topic_mcqs = [q for q in all_mcqs if q["topic"] == topic]
+            subs = self.subtopic_labels(chunks, topic, k=min(4, max(1, len(chunks) // 2)), vecs=chunk_vecs)
+            jobs.extend((topic, src_tag, chunk, sub) for chunk, sub in zip(chunks, subs))
+        
+        if not jobs:
+            return []
+        
+        all_chunks = [chunk for _, _, chunk, _ in jobs]
+        chunk_qa = self._normalize_qa_pairs_many(all_chunks, batch_size=batch_size, t2t_questions=t2t_questions)
+        chunk_terms = self.key_terms_many(all_chunks, top_k=20)
+        
+        # Embed the whole term pool and all answers in one batched call;
+        # per-chunk ranking below then only does the matrix math against the cache
+        doc_texts = [t for terms in chunk_terms for t in terms]
+        doc_texts += [qa.get("answer", "").strip() for pairs in chunk_qa for qa in pairs[:3]]
+        try:
+            self.distractor_engine.embed(doc_texts)
+        except Exception as e:
+            logger.warning(f"Batch embedding failed: {e}")
+        
+        by_topic = defaultdict(list)
+        for (topic, src_tag, chunk, sub), qa_pairs, terms in zip(jobs, chunk_qa, chunk_terms):
+            by_topic[topic].extend(self.make_mcqs_from_chunk(chunk, topic_label=topic, subtopic=sub, source_tag=src_tag,
+                                                             max_q=3, qa_pairs=qa_pairs, terms=terms))
+        
+        all_mcqs = []
+        for topic in selected_topics:
+            topic_mcqs = by_topic.pop(topic, [])
+            # Limit questions per topic, round-robin across subtopics
             if len(topic_mcqs) > per_topic_q:
                 by_sub = defaultdict(list)
                 for q in topic_mcqs:
@@ -386,8 +517,8 @@ class QuizGenerator:
                     for ksub in list(by_sub.keys()):
                         if by_sub[ksub] and len(picked) < per_topic_q:
                             picked.append(by_sub[ksub].pop(0))
-                
-                all_mcqs = [q for q in all_mcqs if q["topic"] != topic] + picked
+                topic_mcqs = picked
+            all_mcqs.extend(topic_mcqs)
         
         return all_mcqs
     
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+One interface over the quiz generator variants.
+
+    strategy = get_strategy('pipeline')
+    questions = strategy.generate(['Operating System'], per_topic_q=8)
+
+Strategies (all return the same question schema: question, options, correctAnswer, topic,
+subtopic, difficulty, skill, source):
+    pipeline   quiz_generator.QuizGenerator: batched summarizer + QG + embedding distractors
+    simple     simple_quiz_generator.SimpleQuizGenerator: NLTK heuristics, no large models
+    heuristic  advanced_quiz_generator: regex/NLTK candidates, optional sentence-transformers
+    template   enhanced_quiz_generator.MLQuestionEnhancer: curated question bank
+
+Material for topic-based strategies comes from the subject corpus store (subject_corpus.py)
+before any live fetch. Each strategy loads its models once; instances are shared.
+"""
+
+import os
+import sys
+import threading
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from subject_corpus import get_corpus_store, load_curated_corpora, topic_key
+
+
+def normalize_question(q: Dict, topic: str, source: str) -> Dict:
+    """Map any generator's output onto the common question schema."""
+    options = q.get('options') or q.get('choices') or []
+    correct = q.get('correctAnswer')
+    if correct is None and options:
+        idx = q.get('correctIndex')
+        correct = options[idx] if isinstance(idx, int) and 0 <= idx < len(options) else options[0]
+    out = {
+        'question': q.get('question') or q.get('stem') or '',
+        'options': options,
+        'correctAnswer': correct,
+        'topic': q.get('topic') or topic,
+        'subtopic': q.get('subtopic') or topic,
+        'difficulty': q.get('difficulty', 'medium'),
+        'skill': q.get('skill', 'understand'),
+        'source': q.get('source') or q.get('generatedBy') or source,
+    }
+    for extra in ('confidence', 'quality_score', 'explanation'):
+        if extra in q:
+            out[extra] = q[extra]
+    return out
+
+
+class QuizStrategy:
+    """Base class: load() once, then generate() questions for topics."""
+
+    name = 'base'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def load(self):
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+        return self
+
+    def _load(self):
+        pass
+
+    def generate(self, topics: List[str], per_topic_q: int = 8, **options) -> List[Dict]:
+        self.load()
+        return [normalize_question(q, q.get('topic') or (topics[0] if topics else ''), self.name)
+                for q in self._generate(topics, per_topic_q, **options)]
+
+    def _generate(self, topics: List[str], per_topic_q: int, **options) -> List[Dict]:
+        raise NotImplementedError
+
+
+class PipelineStrategy(QuizStrategy):
+    name = 'pipeline'
+
+    def _load(self):
+        from quiz_generator import QuizGenerator
+        self.generator = QuizGenerator()
+
+    def _generate(self, topics, per_topic_q, batch_size=None, t2t_questions=None, **options):
+        return self.generator.build_cold_start_quiz(topics, per_topic_q=per_topic_q, batch_size=batch_size,
+                                                    t2t_questions=t2t_questions)
+
+
+class SimpleStrategy(QuizStrategy):
+    name = 'simple'
+
+    def _load(self):
+        from simple_quiz_generator import SimpleQuizGenerator
+        self.generator = SimpleQuizGenerator()
+
+    def _generate(self, topics, per_topic_q, **options):
+        return self.generator.build_cold_start_quiz(topics, per_topic_q=per_topic_q)
+
+
+class HeuristicStrategy(QuizStrategy):
+    name = 'heuristic'
+
+    def _load(self):
+        import advanced_quiz_generator
+        self.module = advanced_quiz_generator
+        self.module.get_st_model()
+        self.curated = {topic_key(k): v for k, v in load_curated_corpora().items()}
+
+    def _material(self, topic: str) -> str:
+        entry = get_corpus_store().get(topic, include_expired=True)
+        if entry and entry['chunks']:
+            return ' '.join(entry['chunks'])
+        return self.curated.get(topic_key(topic), '')
+
+    def _generate(self, topics, per_topic_q, **options):
+        questions = []
+        for topic in topics:
+            text = self._material(topic)
+            if text.strip():
+                for q in self.module.generate_questions_from_text(text, max_questions=per_topic_q):
+                    questions.append(dict(q, topic=topic))
+        return questions
+
+
+class TemplateStrategy(QuizStrategy):
+    name = 'template'
+
+    def _load(self):
+        from enhanced_quiz_generator import MLQuestionEnhancer
+        self.enhancer = MLQuestionEnhancer()
+
+    def _generate(self, topics, per_topic_q, difficulty='medium', **options):
+        return self.enhancer.generate_questions(topics, difficulty, per_topic_q)
+
+
+STRATEGIES = {cls.name: cls for cls in (PipelineStrategy, SimpleStrategy, HeuristicStrategy, TemplateStrategy)}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_strategy(name: str) -> QuizStrategy:
+    if name not in STRATEGIES:
+        raise ValueError(f"unknown quiz strategy '{name}' (choose from {', '.join(STRATEGIES)})")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = STRATEGIES[name]()
+        return _instances[name]
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+quiz_worker.py
+
+Long-lived quiz generation worker. Node keeps one (or a few) of these running and sends
+jobs over stdin as JSON lines instead of spawning a generator script per request, so
+NLTK, sentence-transformers and the HF pipelines are imported and loaded once.
+
+Request  (one JSON object per line on stdin):
+    {"id": "42", "task": "advanced", "payload": {...}}
+Response (one JSON object per line on stdout, in completion order):
+    {"id": "42", "ok": true, "result": ..., "timings": {"queue": 0.0, "generate": 1.2, "total": 1.2}}
+    {"id": "42", "ok": false, "error": "...", "timings": {...}}
+
+Tasks:
+    ping        -> {"pid": ..., "loaded": [...]}
+    advanced    payload {content|transcript|chunks, max}          -> advanced_quiz_generator questions
+    enhanced    payload {topics, difficulty, question_count}      -> 'template' strategy questions
+    cold_start  payload {topics, per_topic_q}                     -> 'pipeline' strategy MCQ bank
+    generate    payload {strategy, topics, per_topic_q, ...}      -> any quiz_strategies strategy
+    similarity  payload {source_passages, queries}                -> semantic_similarity output
+
+Jobs run concurrently on a thread pool (QUIZ_WORKER_THREADS, default 4). Anything the
+generators print goes to stderr so stdout only carries protocol lines.
+
+Usage:
+    python services/quiz_worker.py [--threads 4] [--preload advanced,pipeline,similarity]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from quiz_strategies import STRATEGIES, get_strategy
+
+# Keep the protocol channel clean: generators log/print freely, that all goes to stderr
+PROTOCOL_OUT = sys.stdout
+sys.stdout = sys.stderr
+
+_write_lock = threading.Lock()
+_load_lock = threading.Lock()
+_loaded = {}
+
+
+def log(msg: str):
+    try:
+        print(f"[quiz_worker] {msg}", file=sys.stderr, flush=True)
+    except Exception:
+        pass
+
+
+def send(message: dict):
+    line = json.dumps(message, ensure_ascii=False)
+    with _write_lock:
+        PROTOCOL_OUT.write(line + '\n')
+        PROTOCOL_OUT.flush()
+
+
+def _load(name: str):
+    """Import/initialize a generator once per process; returns (obj, seconds spent loading)."""
+    if name in _loaded:
+        return _loaded[name], 0.0
+    with _load_lock:
+        if name in _loaded:
+            return _loaded[name], 0.0
+        start = time.perf_counter()
+        if name == 'advanced':
+            import advanced_quiz_generator as obj
+            obj.get_st_model()
+        elif name in STRATEGIES:
+            obj = get_strategy(name).load()
+        elif name == 'similarity':
+            import semantic_similarity as obj
+            obj.load_model()
+        else:
+            raise ValueError(f"unknown task '{name}'")
+        _loaded[name] = obj
+        elapsed = time.perf_counter() - start
+        log(f"Loaded {name} in {elapsed:.2f}s")
+        return obj, elapsed
+
+
+def run_advanced(payload: dict, timings: dict):
+    generator, timings['load'] = _load('advanced')
+    raw = generator.payload_to_text(payload)
+    if not raw or not raw.strip():
+        return []
+    return generator.generate_questions_from_text(
+        raw, max_questions=int(payload.get('max', 10)), timings=timings
+    )
+
+
+def run_strategy(name: str, topics, per_topic_q: int, timings: dict, **options):
+    strategy, timings['load'] = _load(name)
+    start = time.perf_counter()
+    questions = strategy.generate(topics, per_topic_q=per_topic_q, **options)
+    timings['generate'] = round(time.perf_counter() - start, 4)
+    return questions
+
+
+def run_enhanced(payload: dict, timings: dict):
+    return run_strategy('template', payload.get('topics', ['Artificial Intelligence']),
+                        int(payload.get('question_count', 10)), timings,
+                        difficulty=payload.get('difficulty', 'medium'))
+
+
+def run_cold_start(payload: dict, timings: dict):
+    return run_strategy('pipeline', payload.get('topics', []), int(payload.get('per_topic_q', 8)), timings)
+
+
+def run_generate(payload: dict, timings: dict):
+    options = {k: v for k, v in payload.items() if k not in ('strategy', 'topics', 'per_topic_q')}
+    return run_strategy(payload.get('strategy', 'pipeline'), payload.get('topics', []),
+                        int(payload.get('per_topic_q', 8)), timings, **options)
+
+
+def run_similarity(payload: dict, timings: dict):
+    similarity, timings['load'] = _load('similarity')
+    start = time.perf_counter()
+    result = similarity.compute_similarities(payload.get('source_passages') or [], payload.get('queries') or [])
+    timings['similarity'] = round(time.perf_counter() - start, 4)
+    return result
+
+
+TASKS = {
+    'advanced': run_advanced,
+    'enhanced': run_enhanced,
+    'cold_start': run_cold_start,
+    'generate': run_generate,
+    'similarity': run_similarity,
+}
+
+
+def handle(request: dict, received: float):
+    job_id = request.get('id')
+    task = request.get('task')
+    started = time.perf_counter()
+    timings = {'queue': round(started - received, 4)}
+    try:
+        if task == 'ping':
+            result = {'pid': os.getpid(), 'loaded': sorted(_loaded)}
+        elif task in TASKS:
+            result = TASKS[task](request.get('payload') or {}, timings)
+        else:
+            raise ValueError(f"unknown task '{task}'")
+        timings['load'] = round(timings.get('load', 0.0), 4)
+        timings['total'] = round(time.perf_counter() - received, 4)
+        send({'id': job_id, 'ok': True, 'result': result, 'timings': timings})
+    except Exception as e:
+        log(f"Job {job_id} ({task}) failed: {e}\n{traceback.format_exc()}")
+        timings['total'] = round(time.perf_counter() - received, 4)
+        send({'id': job_id, 'ok': False, 'error': str(e), 'timings': timings})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('QUIZ_WORKER_THREADS', '4')))
+    parser.add_argument('--preload', default=os.environ.get('QUIZ_WORKER_PRELOAD', 'advanced'),
+                        help='Comma-separated tasks to load before accepting jobs')
+    args = parser.parse_args()
+
+    for name in [n.strip() for n in args.preload.split(',') if n.strip()]:
+        try:
+            _load(name)
+        except Exception as e:
+            log(f"Preload of {name} failed: {e}")
+
+    send({'id': None, 'ok': True, 'result': {'ready': True, 'pid': os.getpid(), 'loaded': sorted(_loaded)}})
+    log(f"Ready with {args.threads} threads")
+
+    with ThreadPoolExecutor(max_workers=max(1, args.threads)) as pool:
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            received = time.perf_counter()
+            try:
+                request = json.loads(line)
+            except Exception as e:
+                send({'id': None, 'ok': False, 'error': f"invalid request: {e}"})
+                continue
+            pool.submit(handle, request, received)
+
+    log('stdin closed, shutting down')
+
+
+if __name__ == '__main__':
+    main()
@@ -31,24 +31,26 @@ def log(msg: str):
         pass
 
 
-def main():
-    try:
-        payload = json.load(sys.stdin)
-    except Exception as e:
-        print(json.dumps({"error": f"failed to parse stdin: {e}"}))
-        return
+_model = None
 
-    sources = payload.get('source_passages') or []
-    queries = payload.get('queries') or []
 
+def load_model():
+    """Load the embedding model once per process (None when sentence-transformers is missing)."""
+    global _model
+    if ST and _model is None:
+        log('Loading sentence-transformers model all-MiniLM-L6-v2')
+        _model = SentenceTransformer('all-MiniLM-L6-v2')
+    return _model
+
+
+def compute_similarities(sources, queries, model=None):
+    """Return {"similarities": [...], "fallback": bool} for the given passages and queries."""
     if not isinstance(sources, list) or not isinstance(queries, list):
-        print(json.dumps({"error": "source_passages and queries must be lists"}))
-        return
+        return {"error": "source_passages and queries must be lists"}
 
     if ST:
         try:
-            log('Loading sentence-transformers model all-MiniLM-L6-v2')
-            model = SentenceTransformer('all-MiniLM-L6-v2')
+            model = model or load_model()
             # Encode in batches
             src_emb = model.encode(sources, convert_to_tensor=True, show_progress_bar=False)
             qry_emb = model.encode(queries, convert_to_tensor=True, show_progress_bar=False)
@@ -61,8 +63,7 @@ def main():
                 # clamp between 0 and 1
                 max_sim = max(0.0, min(1.0, max_sim))
                 out.append(max_sim)
-            print(json.dumps({"similarities": out, "fallback": False}))
-            return
+            return {"similarities": out, "fallback": False}
         except Exception as e:
             # fall through to fallback mode
             log(f"Model-based similarity failed: {e}")
@@ -83,7 +84,19 @@ def main():
         except Exception:
             out.append(0.0)
 
-    print(json.dumps({"similarities": out, "fallback": True}))
+    return {"similarities": out, "fallback": True}
+
+
+def main():
+    try:
+        payload = json.load(sys.stdin)
+    except Exception as e:
+        print(json.dumps({"error": f"failed to parse stdin: {e}"}))
+        return
+
+    sources = payload.get('source_passages') or []
+    queries = payload.get('queries') or []
+    print(json.dumps(compute_similarities(sources, queries)))
 
 
 if __name__ == '__main__':
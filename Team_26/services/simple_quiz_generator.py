@@ -21,6 +21,8 @@ import requests
 from bs4 import BeautifulSoup
 import wikipediaapi
 
+from subject_corpus import OFFLINE, get_corpus_store
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -102,7 +104,14 @@ class SimpleQuizGenerator:
         return ""
     
     def fetch_learning_material(self, topic: str) -> Tuple[str, str]:
-        """Fetch learning material from multiple sources"""
+        """Fetch learning material: local corpus store first, then multiple live sources"""
+        entry = get_corpus_store().get(topic, include_expired=OFFLINE)
+        if entry and entry["chunks"]:
+            logger.info(f"Corpus store hit for {topic} ({entry['origin']})")
+            return " ".join(entry["chunks"]), entry["source"]
+        if OFFLINE:
+            return "", "Unknown"
+        
         wiki_text = self.fetch_wiki(topic)
         web_text = self.fetch_web_content(topic)
         
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Local subject corpus store for the quiz generators.
+
+Holds pre-chunked, pre-summarized and pre-embedded learning material keyed by topic, built
+offline from the curated data/*_subject.md files and data/subjectContents.json (see
+build_subject_index.py) plus any material fetched live from Wikipedia/arXiv/the web.
+
+Cache policy:
+  - curated entries never expire; re-running the index command rebuilds them only when
+    their source text changed (content hash).
+  - fetched entries expire after CORPUS_FETCH_TTL_DAYS (default 7). An expired entry is
+    refetched on use, but still served if the live fetch comes back empty (stale-if-error).
+  - CORPUS_OFFLINE=1 disables live fetching entirely; misses then yield no material.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+SERVICES_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(SERVICES_DIR, '..', 'data')
+DEFAULT_STORE_PATH = os.environ.get(
+    'CORPUS_STORE_PATH', os.path.join(SERVICES_DIR, '.cache', 'subject_corpus.sqlite3')
+)
+FETCH_TTL_SECONDS = float(os.environ.get('CORPUS_FETCH_TTL_DAYS', '7')) * 86400
+OFFLINE = os.environ.get('CORPUS_OFFLINE') == '1'
+
+CURATED = 'curated'
+FETCHED = 'fetched'
+
+# data/<prefix>_subject.md -> subject name used across the app (matches subjectContents.json)
+SUBJECT_FILES = {
+    'ai': 'Artificial Intelligence',
+    'algorithms': 'Algorithm',
+    'arch': 'Computer Architecture',
+    'cloud': 'Cloud Computing',
+    'cybersec': 'Cybersecurity',
+    'dbms': 'Database Management System',
+    'devops': 'DevOps',
+    'ds': 'Data Structure',
+    'ml': 'Machine Learning',
+    'mobile': 'Mobile Development',
+    'network': 'Computer Network',
+    'os': 'Operating System',
+    'pl': 'Programming Languages',
+    'se': 'Software Engineering',
+    'webdev': 'Web Development',
+}
+_SUBJECT_KEYS = {s.lower() for s in SUBJECT_FILES.values()}
+
+
+def topic_key(topic: str) -> str:
+    """Normalize a topic name ('Operating Systems', 'os', 'operating-system' -> one key)."""
+    key = re.sub(r'[^a-z0-9]+', ' ', (topic or '').lower()).strip()
+    if key in SUBJECT_FILES:
+        key = SUBJECT_FILES[key].lower()
+    return key[:-1] if key.endswith('s') and key[:-1] in _SUBJECT_KEYS else key
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def load_curated_corpora(data_dir: str = DATA_DIR) -> Dict[str, str]:
+    """Subject name -> curated text (the subject .md file followed by its subjectContents description)."""
+    corpora = {}
+    for prefix, subject in SUBJECT_FILES.items():
+        path = os.path.join(data_dir, f'{prefix}_subject.md')
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                corpora[subject] = f.read().strip()
+
+    contents_path = os.path.join(data_dir, 'subjectContents.json')
+    if os.path.exists(contents_path):
+        with open(contents_path, encoding='utf-8') as f:
+            for item in json.load(f):
+                subject, description = item.get('subject'), (item.get('description') or '').strip()
+                if subject and description:
+                    corpora[subject] = f"{corpora.get(subject, '')}\n\n{description}".strip()
+    return corpora
+
+
+class CorpusStore:
+    """SQLite-backed topic -> (summary, chunks, chunk embeddings) store."""
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS topics (
+                key TEXT PRIMARY KEY,
+                topic TEXT NOT NULL,
+                source TEXT NOT NULL,
+                origin TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                built_at REAL NOT NULL,
+                expires_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                key TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                dim INTEGER,
+                embedding BLOB,
+                PRIMARY KEY (key, idx)
+            );
+        """)
+        self._db.commit()
+
+    def get(self, topic: str, include_expired: bool = False) -> Optional[Dict]:
+        key = topic_key(topic)
+        with self._lock:
+            row = self._db.execute(
+                'SELECT topic, source, origin, summary, content_hash, built_at, expires_at FROM topics WHERE key = ?',
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            expired = row[6] is not None and row[6] < time.time()
+            if expired and not include_expired:
+                return None
+            chunk_rows = self._db.execute(
+                'SELECT text, dim, embedding FROM chunks WHERE key = ? ORDER BY idx', (key,)
+            ).fetchall()
+
+        embeddings = None
+        if chunk_rows and all(r[2] is not None for r in chunk_rows):
+            import numpy as np
+            embeddings = np.stack([np.frombuffer(r[2], dtype=np.float32, count=r[1]) for r in chunk_rows])
+
+        return {
+            'topic': row[0],
+            'source': row[1],
+            'origin': row[2],
+            'summary': row[3],
+            'content_hash': row[4],
+            'built_at': row[5],
+            'expired': expired,
+            'chunks': [r[0] for r in chunk_rows],
+            'embeddings': embeddings,
+        }
+
+    def put(self, topic: str, source: str, origin: str, summary: str, chunks: List[str],
+            embeddings=None, text_hash: Optional[str] = None):
+        key = topic_key(topic)
+        now = time.time()
+        expires_at = None if origin == CURATED else now + FETCH_TTL_SECONDS
+        rows = []
+        for i, chunk in enumerate(chunks):
+            vec = embeddings[i] if embeddings is not None else None
+            rows.append((key, i, chunk,
+                         int(vec.shape[0]) if vec is not None else None,
+                         vec.astype('float32').tobytes() if vec is not None else None))
+        with self._lock:
+            self._db.execute('DELETE FROM chunks WHERE key = ?', (key,))
+            self._db.execute(
+                'INSERT OR REPLACE INTO topics (key, topic, source, origin, summary, content_hash, built_at, expires_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, topic, source, origin, summary, text_hash or content_hash(summary), now, expires_at),
+            )
+            self._db.executemany(
+                'INSERT INTO chunks (key, idx, text, dim, embedding) VALUES (?, ?, ?, ?, ?)', rows
+            )
+            self._db.commit()
+
+    def topics(self) -> List[Tuple[str, str, int]]:
+        with self._lock:
+            return self._db.execute(
+                'SELECT t.topic, t.origin, COUNT(c.idx) FROM topics t LEFT JOIN chunks c ON c.key = t.key'
+                ' GROUP BY t.key ORDER BY t.topic'
+            ).fetchall()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_corpus_store() -> CorpusStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CorpusStore()
+    return _store
@@ -19,20 +19,11 @@ import cv2
 import time
 import speech_recognition as sr
 
+from audio_io import speak
+from camera_service import get_camera
 
 
 
-def speak(text, pause=0.7):
-    print(text)
-    try:
-        import pyttsx3
-        engine = pyttsx3.init()
-        engine.say(text)
-        engine.runAndWait()
-        time.sleep(pause)
-    except Exception as e:
-        print(f"[TTS ERROR] {e}")
-
 
 def listen_command():
     r = sr.Recognizer()
@@ -55,11 +46,16 @@ def listen_command():
     
 
 
-def pred_ocr_gemini(image_path):
+def pred_ocr_gemini(image):
+    """image: JPEG bytes from the camera service, or a path to an image file"""
     API_KEY = os.getenv("GEMINI_API_KEY")
     URL = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={API_KEY}"
-    with open(image_path, "rb") as f:
-        img_base64 = base64.b64encode(f.read()).decode("utf-8")
+    if isinstance(image, (bytes, bytearray)):
+        img_bytes = image
+    else:
+        with open(image, "rb") as f:
+            img_bytes = f.read()
+    img_base64 = base64.b64encode(img_bytes).decode("utf-8")
     headers = {
     "Content-Type": "application/json"
     }
@@ -71,7 +67,7 @@ def pred_ocr_gemini(image_path):
                     {"text": "return me the OCR text in the image in a structured format, only the ocr text nothing else exactly how it is."},
                     {
                     "inline_data": {
-                        "mime_type": "image/png",
+                        "mime_type": "image/jpeg",
                         "data": img_base64
                     }
                 }
@@ -100,17 +96,12 @@ def ocr_services(speak):
             speak("Exiting the text recognition system. Goodbye!", pause=1)
             break
         elif 'start' in command:
-            speak("Get ready to show the text to the webcam. Capturing in 3 seconds.")
-            time.sleep(3)
-            cap = cv2.VideoCapture(0)
-            ret, frame = cap.read()
-            cv2.imwrite('temp/captured_image.jpg', frame)
-            
-            cap.release()
-            if not ret:
+            speak("Hold the text steady in front of the camera.")
+            image = get_camera().capture_jpeg()
+            if image is None:
                 speak("Failed to capture image from webcam.")
                 continue
-            pred_text = pred_ocr_gemini('temp/captured_image.jpg')
+            pred_text = pred_ocr_gemini(image)
             if pred_text is not None:
                 speak(f"Predicted text is {pred_text}")
                 return
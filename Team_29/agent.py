@@ -11,30 +11,8 @@ from face.face_recognition_voice import face_services
 import os
 from dotenv import load_dotenv
 load_dotenv()
-from elevenlabs.client import ElevenLabs
-from elevenlabs import play
-
-client = ElevenLabs(
-    api_key=os.getenv("ELEVEN_LABS_API_KEY")
-)
-
-def speak_llm(text, pause=0.7):
-    audio = client.text_to_speech.convert(
-        text=text,
-        voice_id="JBFqnCBsd6RMkjVDRZzb",
-        model_id="eleven_multilingual_v2",
-        output_format="mp3_44100_128",
-    )
-    play(audio)
-
-def speak_google(text):
-    try:
-        import pyttsx3
-        engine = pyttsx3.init()
-        engine.say(text)
-        engine.runAndWait()
-    except Exception as e:
-        print(f"TTS Error: {e}")
+from audio_io import AudioOutput, TextInput, VoiceInput, get_audio
+from intent_router import IntentRouter
 
 # Import your existing modules
 from OCR import ocr_services
@@ -59,17 +37,27 @@ class AgentState(TypedDict):
     error: Optional[str]
 
 class VoiceAgent:
-    def __init__(self, speak_function: Callable[[str], None] = speak_llm):
+    def __init__(self, audio: Optional[AudioOutput] = None, voice_input: Any = None,
+                 speak_function: Optional[Callable[..., None]] = None):
         """
-        Initialize Voice Agent with configurable speak function
+        Initialize Voice Agent
         
         Args:
-            speak_function: Either speak_llm or speak_google
+            audio: Speech output (defaults to the shared AUDIO_BACKEND engine)
+            voice_input: Command source with get_command(); TextInput (stdin) for the null backend
+            speak_function: Blocking speak(text) handed to the services (defaults to audio.speak)
         """
-        self.speak = speak_function
+        self.audio = audio or get_audio()
+        if voice_input is None:
+            voice_input = TextInput() if self.audio.backend.name == "null" else VoiceInput(self.audio)
+        self.voice_input = voice_input
+        self.speak = speak_function or self.audio.speak
         self.mistral_api_key = os.getenv("MISTRAL_API_KEY")
         self.mistral_model = os.getenv("MISTRAL_MODEL_NAME")
         self.gemini_api_key = os.getenv("GEMINI_API_KEY")
+        self.router_timeout = float(os.getenv("MISTRAL_ROUTER_TIMEOUT", "4"))
+        # Keyword fast path first; Mistral only for unclear commands (skipped without a key)
+        self.intent_router = IntentRouter(llm=self.classify_with_mistral if self.mistral_api_key else None)
         self.setup_graph()
         
     def setup_graph(self):
@@ -114,18 +102,12 @@ class VoiceAgent:
         self.graph = workflow.compile()
 
     def listen_command(self) -> Optional[str]:
-        """Voice recognition"""
-        r = sr.Recognizer()
-        with sr.Microphone() as source:
-            print("🎤 Listening...")
-            try:
-                audio = r.listen(source, timeout=5, phrase_time_limit=5)
-                command = r.recognize_google(audio).lower()
-                print(f"🗣️ Heard: {command}")
-                return command
-            except Exception as e:
-                print(f"❌ Voice recognition error: {e}")
-                return None
+        """Voice recognition; starts the latency trace for the command"""
+        command = self.voice_input.get_command()
+        if command:
+            self.audio.begin_trace(command[:30], started=self.voice_input.last_heard_at)
+            self.audio.mark("recognized")
+        return command
 
     def call_mistral_router(self, prompt: str) -> dict:
         """Call Mistral API for routing decisions"""
@@ -158,7 +140,7 @@ class VoiceAgent:
         }
         
         try:
-            response = requests.post(url, headers=headers, json=data)
+            response = requests.post(url, headers=headers, json=data, timeout=self.router_timeout)
             response.raise_for_status()
             result = response.json()
             content = result["choices"][0]["message"]["content"]
@@ -178,6 +160,13 @@ class VoiceAgent:
             print(f"❌ Mistral Router error: {e}")
             return {"success": False, "error": str(e)}
 
+    def classify_with_mistral(self, user_input: str) -> Optional[tuple]:
+        """LLM fallback for IntentRouter: (intent, reasoning), or None if Mistral is unreachable"""
+        result = self.call_mistral_router(f"Classify this input: '{user_input}'")
+        if not result["success"]:
+            return None
+        return result["data"].intent, result["data"].reasoning
+
     def call_gemini_agent(self, user_input: str) -> str:
         """Call Gemini Flash 2.0 for general assistance"""
         url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={self.gemini_api_key}"
@@ -221,7 +210,7 @@ class VoiceAgent:
         return state
 
     def router_node(self, state: AgentState) -> AgentState:
-        """Route user input using Mistral"""
+        """Route user input: local keyword classifier, cached decisions, then Mistral"""
         user_input = state["user_input"]
         
         if state.get("error"):
@@ -229,16 +218,13 @@ class VoiceAgent:
             state["reasoning"] = "Fallback to Gemini due to voice input error"
             return state
         
-        result = self.call_mistral_router(f"Classify this input: '{user_input}'")
-        
-        if result["success"]:
-            state["intent"] = result["data"].intent
-            state["reasoning"] = result["data"].reasoning
-        else:
-            state["intent"] = "gemini"
-            state["reasoning"] = "Fallback to Gemini due to router error"
+        decision = self.intent_router.route(user_input)
+        state["intent"] = decision["intent"]
+        state["reasoning"] = decision["reasoning"]
             
-        print(f"🎯 Routed to: {state['intent']} - {state.get('reasoning', '')}")
+        self.audio.mark("routed")
+        print(f"🎯 Routed to: {state['intent']} - {state.get('reasoning', '')} "
+              f"({decision['source']}, {decision['ms']:.1f} ms)")
         return state
 
     def route_decision(self, state: AgentState) -> str:
@@ -291,18 +277,24 @@ class VoiceAgent:
         """Gemini AI assistant for general questions"""
         user_input = state["user_input"]
         
+        # Queued without waiting so the next listen overlaps with the answer being spoken
         if state.get("error"):
-            self.speak("I'm sorry, I had trouble understanding your request.")
+            self.audio.say("I'm sorry, I had trouble understanding your request.")
         else:
             response = self.call_gemini_agent(user_input)
-            self.speak(response)
+            self.audio.say(response)
             
         state["result"] = "Gemini agent response completed"
         return state
 
     def run(self):
         """Main execution loop"""
-        self.speak("Voice Agent initialized and ready to help!")
+        if os.getenv("SMART_STICK") == "1":
+            # Sensor warnings share the speech queue and pre-empt everything else
+            from sensor import start_monitor
+            start_monitor()
+        self.audio.say("Voice Agent initialized and ready to help!")
+        
         
         while True:
             try:
@@ -321,13 +313,12 @@ class VoiceAgent:
                 # Check for exit commands
                 user_input = result.get("user_input", "").lower()
                 if any(word in user_input for word in ["exit", "quit", "goodbye", "stop", "bye"]):
+                    self.audio.interrupt()
                     self.speak("Goodbye! Have a great day!")
                     break
                 
-                # Brief pause before next interaction
-                time.sleep(1)
-                
             except KeyboardInterrupt:
+                self.audio.interrupt()
                 self.speak("Goodbye!")
                 break
             except Exception as e:
@@ -338,6 +329,8 @@ if __name__ == "__main__":
     # Make sure temp directory exists
     os.makedirs("temp", exist_ok=True)
     
-    # Initialize agent with speak_llm (can also use speak_google)
-    agent = VoiceAgent(speak_function=speak_google)
-    agent.run()
\ No newline at end of file
+    # Speech output follows AUDIO_BACKEND (pyttsx3, elevenlabs, or null for headless runs)
+    agent = VoiceAgent()
+    agent.run()
+    print(agent.intent_router.report())
+    agent.audio.close()
\ No newline at end of file
@@ -0,0 +1,448 @@
+"""
+Audio I/O for the voice agent and the assistive services
+
+A single TTS engine lives on its own thread and speaks from a priority utterance queue:
+    audio = get_audio()
+    audio.say("Reading text")               # queue and return immediately
+    audio.speak("Say start or stop")         # queue and wait until spoken (old speak() behaviour)
+    audio.warn("Obstacle ahead")             # pre-empts normal speech, which resumes afterwards
+
+VoiceInput listens on the microphone while speech may still be playing and drops phrases
+that overlap our own output (echo) unless AUDIO_BARGE_IN=1 (headphones), in which case a
+phrase interrupts the current speech. begin_trace()/mark() record the time from a command
+to the first spoken word of the reply.
+
+AUDIO_BACKEND selects the output: pyttsx3 (default, offline), elevenlabs or null. The null
+backend prints instead of speaking, and TextInput reads commands from stdin, so the agent
+can run headless.
+"""
+
+import heapq
+import itertools
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+AUDIO_BACKEND = os.getenv("AUDIO_BACKEND", "pyttsx3")
+BARGE_IN = os.getenv("AUDIO_BARGE_IN", "0") == "1"
+ECHO_TAIL_SECONDS = float(os.getenv("AUDIO_ECHO_TAIL_SECONDS", "0.3"))
+TTS_RATE = os.getenv("TTS_RATE")
+TTS_VOLUME = os.getenv("TTS_VOLUME")
+
+PRIORITY_URGENT = 0
+PRIORITY_NORMAL = 1
+
+
+# ---------------- output backends ----------------
+# speak(text, on_start, stop) runs on the TTS thread and returns early once the `stop` event
+# is set; stop() is called from other threads to cut off audio that is already playing.
+
+class NullBackend:
+    """Prints utterances and waits roughly as long as speaking them would take"""
+    name = "null"
+
+    def __init__(self, words_per_second=3.0):
+        self.words_per_second = words_per_second
+        self.spoken = []
+
+    def speak(self, text, on_start, stop):
+        on_start()
+        print(f"🔊 {text}")
+        self.spoken.append(text)
+        stop.wait(len(text.split()) / self.words_per_second)
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class Pyttsx3Backend:
+    """One pyttsx3 engine for the whole process, driven with an external loop so it can be stopped"""
+    name = "pyttsx3"
+
+    def __init__(self, rate=TTS_RATE, volume=TTS_VOLUME):
+        self.rate = rate
+        self.volume = volume
+        self._engine = None
+        self._external_loop = False
+        self._finished = threading.Event()
+        self._on_start = None
+
+    def _init(self):
+        import pyttsx3
+        engine = pyttsx3.init()
+        if self.rate:
+            engine.setProperty('rate', int(self.rate))
+        if self.volume:
+            engine.setProperty('volume', float(self.volume))
+        engine.connect('started-utterance', lambda name: self._on_start and self._on_start())
+        engine.connect('finished-utterance', lambda name, completed: self._finished.set())
+        try:
+            engine.startLoop(False)
+            self._external_loop = True
+        except Exception:
+            # driver without an iterable loop: fall back to runAndWait per utterance
+            self._external_loop = False
+        self._engine = engine
+
+    def speak(self, text, on_start, stop):
+        if self._engine is None:
+            self._init()
+        self._finished.clear()
+        self._on_start = on_start
+        self._engine.say(text)
+        if not self._external_loop:
+            on_start()
+            self._engine.runAndWait()
+            return
+
+        stop_deadline = None
+        while not self._finished.is_set():
+            if stop.is_set() and stop_deadline is None:
+                self._engine.stop()
+                stop_deadline = time.time() + 0.5
+            if stop_deadline is not None and time.time() > stop_deadline:
+                break
+            self._engine.iterate()
+            time.sleep(0.01)
+
+    def stop(self):
+        pass  # the iterate loop above polls the utterance's stop event
+
+    def close(self):
+        if self._engine is not None and self._external_loop:
+            try:
+                self._engine.endLoop()
+            except Exception:
+                pass
+
+
+class ElevenLabsBackend:
+    """ElevenLabs synthesis played through ffplay, which is terminated on stop()"""
+    name = "elevenlabs"
+
+    def __init__(self, voice_id="JBFqnCBsd6RMkjVDRZzb", model_id="eleven_multilingual_v2"):
+        from elevenlabs.client import ElevenLabs
+        self.client = ElevenLabs(api_key=os.getenv("ELEVEN_LABS_API_KEY"))
+        self.voice_id = voice_id
+        self.model_id = model_id
+        self._proc = None
+
+    def speak(self, text, on_start, stop):
+        audio = b"".join(self.client.text_to_speech.convert(
+            text=text,
+            voice_id=self.voice_id,
+            model_id=self.model_id,
+            output_format="mp3_44100_128",
+        ))
+        if stop.is_set():
+            return
+        proc = self._proc = subprocess.Popen(
+            ["ffplay", "-autoexit", "-nodisp", "-loglevel", "quiet", "-"],
+            stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        if stop.is_set():
+            proc.terminate()
+        on_start()
+        proc.communicate(audio)
+        self._proc = None
+
+    def stop(self):
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            proc.terminate()
+
+    def close(self):
+        self.stop()
+
+
+BACKENDS = {cls.name: cls for cls in (Pyttsx3Backend, ElevenLabsBackend, NullBackend)}
+
+
+def make_backend(name=AUDIO_BACKEND):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown audio backend '{name}' (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
+
+
+# ---------------- latency trace ----------------
+
+class LatencyTrace:
+    """Stage timestamps relative to the moment the user's command ended"""
+
+    def __init__(self, label="command", started=None):
+        self.label = label
+        self.started = started or time.time()
+        self.marks = {}
+
+    def mark(self, stage, at=None):
+        self.marks.setdefault(stage, (at or time.time()) - self.started)
+
+    @property
+    def first_word(self):
+        return self.marks.get("first_word")
+
+    def summary(self):
+        stages = ", ".join(f"{stage} +{seconds:.2f}s" for stage, seconds in self.marks.items())
+        return f"[LATENCY] {self.label}: {stages}"
+
+
+# ---------------- speech output ----------------
+
+class Utterance:
+    def __init__(self, text, priority, seq):
+        self.text = text
+        self.priority = priority
+        self.seq = seq
+        self.cancelled = False
+        self.stop = threading.Event()
+        self.done = threading.Event()
+
+
+class AudioOutput:
+    def __init__(self, backend=None):
+        self.backend = backend or make_backend()
+        self._queue = []  # heap of (priority, seq, utterance)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._current = None
+        self._speaking_since = None
+        self._last_spoke_until = 0.0
+        self._trace = None
+        self.latencies = deque(maxlen=50)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="tts", daemon=True)
+        self._thread.start()
+
+    def say(self, text, priority=PRIORITY_NORMAL, wait=False, timeout=None):
+        """Queue an utterance; returns it (its .done event is set once spoken or dropped)"""
+        text = str(text).strip()
+        if not text:
+            return None
+        utterance = Utterance(text, priority, next(self._seq))
+        with self._cond:
+            if priority == PRIORITY_URGENT:
+                # a fresh warning replaces any that have not been spoken yet
+                stale = [entry for entry in self._queue if entry[2].priority == PRIORITY_URGENT]
+                for _, _, old in stale:
+                    old.done.set()
+                self._queue = [entry for entry in self._queue if entry[2].priority != PRIORITY_URGENT]
+                heapq.heapify(self._queue)
+                if self._current is not None and self._current.priority > priority:
+                    self._stop_current()
+            heapq.heappush(self._queue, (priority, utterance.seq, utterance))
+            self._cond.notify_all()
+        if wait:
+            utterance.done.wait(timeout)
+        return utterance
+
+    def speak(self, text, pause=0.0, priority=PRIORITY_NORMAL):
+        """Blocking drop-in for the old speak(text, pause) helpers"""
+        self.say(text, priority=priority, wait=True)
+        if pause:
+            time.sleep(pause)
+
+    def warn(self, text):
+        """Urgent warning: interrupts normal speech, which is repeated afterwards"""
+        print(f"⚠️ {text}")
+        return self.say(text, priority=PRIORITY_URGENT)
+
+    def interrupt(self):
+        """Stop the current normal utterance and drop queued ones (barge-in)"""
+        with self._cond:
+            dropped = [entry for entry in self._queue if entry[2].priority != PRIORITY_URGENT]
+            for _, _, utterance in dropped:
+                utterance.done.set()
+            self._queue = [entry for entry in self._queue if entry[2].priority == PRIORITY_URGENT]
+            heapq.heapify(self._queue)
+            if self._current is not None and self._current.priority != PRIORITY_URGENT:
+                self._current.cancelled = True
+                self._stop_current()
+
+    def _stop_current(self):
+        self._current.stop.set()
+        self.backend.stop()
+
+    def is_busy(self):
+        with self._cond:
+            return self._current is not None or bool(self._queue)
+
+    def wait_idle(self, timeout=None):
+        deadline = time.time() + timeout if timeout is not None else None
+        with self._cond:
+            while self._current is not None or self._queue:
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def spoke_during(self, start, end):
+        """Whether our own output was audible at any point between start and end (epoch seconds)"""
+        with self._cond:
+            if self._speaking_since is not None and self._speaking_since < end:
+                return True
+            return self._last_spoke_until + ECHO_TAIL_SECONDS > start
+
+    # ---- latency trace ----
+
+    def begin_trace(self, label="command", started=None):
+        """Start timing a command; the next normal utterance to start closes the trace"""
+        trace = LatencyTrace(label, started)
+        with self._cond:
+            self._trace = trace
+        return trace
+
+    def mark(self, stage):
+        with self._cond:
+            if self._trace is not None:
+                self._trace.mark(stage)
+
+    def _started(self, utterance):
+        with self._cond:
+            self._speaking_since = time.time()
+            trace = self._trace
+            if trace is None or utterance.priority == PRIORITY_URGENT:
+                return
+            self._trace = None
+        trace.mark("first_word")
+        self.latencies.append(trace)
+        print(trace.summary())
+
+    # ---- TTS thread ----
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    break
+                _, _, utterance = heapq.heappop(self._queue)
+                self._current = utterance
+
+            try:
+                self.backend.speak(utterance.text, lambda: self._started(utterance), utterance.stop)
+            except Exception as e:
+                print(f"[TTS ERROR] {e}")
+            completed = not utterance.stop.is_set()
+
+            with self._cond:
+                self._current = None
+                self._speaking_since = None
+                self._last_spoke_until = time.time()
+                if completed or utterance.cancelled:
+                    utterance.done.set()
+                else:
+                    # pre-empted by a warning: keep its place at the front of its priority
+                    utterance.stop = threading.Event()
+                    heapq.heappush(self._queue, (utterance.priority, utterance.seq, utterance))
+                self._cond.notify_all()
+
+    def close(self, timeout=5):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        self.backend.close()
+
+
+_audio = None
+_audio_lock = threading.Lock()
+
+
+def get_audio(backend=None):
+    """Process-wide AudioOutput; `backend` only applies when it is created"""
+    global _audio
+    if _audio is None:
+        with _audio_lock:
+            if _audio is None:
+                _audio = AudioOutput(backend)
+    return _audio
+
+
+def speak(text, pause=0.7):
+    """Module-level helper for the service scripts: print and speak through the shared engine"""
+    print(text)
+    get_audio().speak(text, pause=pause)
+
+
+# ---------------- input ----------------
+
+class VoiceInput:
+    """Microphone commands that can be listened for while our own speech is still playing"""
+
+    def __init__(self, output=None, timeout=5, phrase_time_limit=5, barge_in=BARGE_IN):
+        import speech_recognition as sr
+        self.sr = sr
+        self.recognizer = sr.Recognizer()  # kept so the dynamic energy threshold carries over
+        self.output = output
+        self.timeout = timeout
+        self.phrase_time_limit = phrase_time_limit
+        self.barge_in = barge_in
+        self.last_heard_at = None
+        self.last_recognized_at = None
+
+    def _overlaps_output(self, audio, ended):
+        if self.output is None:
+            return False
+        duration = len(audio.frame_data) / float(audio.sample_rate * audio.sample_width)
+        # the phrase buffer has silence padding before and after the actual speech
+        start = ended - duration + self.recognizer.non_speaking_duration
+        end = ended - self.recognizer.pause_threshold
+        return self.output.spoke_during(start, max(start, end))
+
+    def get_command(self):
+        """Next recognized command (lowercase), or None on silence / recognition errors"""
+        sr = self.sr
+        deadline = time.time() + self.timeout
+        with sr.Microphone() as source:
+            print("🎤 Listening...")
+            while True:
+                if self.output is not None and self.output.is_busy():
+                    # the silence timeout only starts once we stop talking
+                    deadline = time.time() + self.timeout
+                if time.time() > deadline:
+                    return None
+                try:
+                    audio = self.recognizer.listen(source, timeout=1, phrase_time_limit=self.phrase_time_limit)
+                except sr.WaitTimeoutError:
+                    continue
+                ended = time.time()
+                if self._overlaps_output(audio, ended):
+                    if not self.barge_in:
+                        continue  # most likely our own voice
+                    self.output.interrupt()
+                break
+
+        try:
+            command = self.recognizer.recognize_google(audio).lower()
+        except Exception as e:
+            print(f"❌ Voice recognition error: {e}")
+            return None
+        self.last_heard_at = ended
+        self.last_recognized_at = time.time()
+        print(f"🗣️ Heard: {command}")
+        return command
+
+
+class TextInput:
+    """Headless stand-in for VoiceInput: one command per line of a text stream (EOF means exit)"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdin
+        self.last_heard_at = None
+        self.last_recognized_at = None
+
+    def get_command(self):
+        line = self.stream.readline()
+        self.last_heard_at = self.last_recognized_at = time.time()
+        if not line:
+            return "exit"
+        command = line.strip().lower()
+        return command or None
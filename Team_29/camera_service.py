@@ -0,0 +1,142 @@
+"""
+Shared camera capture service for the assistive services (OCR, currency, face, scene)
+
+Keeps cv2.VideoCapture open on a background thread that fills a ring buffer with recent
+frames. A capture request waits briefly for fresh frames and returns the sharpest one
+(variance of the Laplacian), as an in-memory BGR array or JPEG bytes - no temp files.
+The camera is released again after CAMERA_IDLE_SECONDS without requests.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+
+CAMERA_INDEX = int(os.getenv("CAMERA_INDEX", "0"))
+BUFFER_SIZE = int(os.getenv("CAMERA_BUFFER_SIZE", "30"))
+SETTLE_SECONDS = float(os.getenv("CAMERA_SETTLE_SECONDS", "1.0"))
+WINDOW_SECONDS = float(os.getenv("CAMERA_WINDOW_SECONDS", "1.0"))
+IDLE_SECONDS = float(os.getenv("CAMERA_IDLE_SECONDS", "120"))
+
+
+def sharpness(frame):
+    """Blur metric: variance of the Laplacian on a downscaled grayscale copy (higher is sharper)"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    h, w = gray.shape[:2]
+    if w > 640:
+        gray = cv2.resize(gray, (640, int(h * 640 / w)), interpolation=cv2.INTER_AREA)
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+def encode_jpeg(frame, quality=90):
+    ok, buf = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+    if not ok:
+        raise RuntimeError("JPEG encoding failed")
+    return buf.tobytes()
+
+
+class CameraService:
+    def __init__(self, index=CAMERA_INDEX, buffer_size=BUFFER_SIZE, idle_seconds=IDLE_SECONDS):
+        self.index = index
+        self.idle_seconds = idle_seconds
+        self._frames = deque(maxlen=buffer_size)  # (timestamp, frame)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._error = None
+        self._last_request = time.time()
+
+    def start(self):
+        """Open the camera on a background thread (no-op if already running)"""
+        with self._cond:
+            self._last_request = time.time()
+            if self._running:
+                return
+            previous = self._thread
+        if previous is not None:
+            # an idle-stopped thread may still be releasing the device
+            previous.join(timeout=2)
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._error = None
+            self._frames.clear()
+            self._thread = threading.Thread(target=self._run, name="camera-capture", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self):
+        cap = cv2.VideoCapture(self.index)
+        try:
+            if not cap.isOpened():
+                raise RuntimeError(f"Could not open camera {self.index}")
+            while True:
+                with self._cond:
+                    if not self._running or time.time() - self._last_request > self.idle_seconds:
+                        self._running = False
+                        break
+                ret, frame = cap.read()
+                if not ret:
+                    time.sleep(0.01)
+                    continue
+                with self._cond:
+                    self._frames.append((time.time(), frame))
+                    self._cond.notify_all()
+        except Exception as e:
+            with self._cond:
+                self._error = e
+                self._running = False
+                self._cond.notify_all()
+        finally:
+            cap.release()
+
+    def capture(self, settle=SETTLE_SECONDS, window=WINDOW_SECONDS, timeout=5.0):
+        """
+        Sharpest frame captured between `settle` and `settle + window` seconds from now.
+        Returns a BGR numpy array, or None if the camera produced nothing.
+        """
+        self.start()
+        start = time.time() + settle
+        deadline = start + window
+        with self._cond:
+            while time.time() < deadline or not any(ts >= start for ts, _ in self._frames):
+                if self._error is not None:
+                    print(f"[CAMERA ERROR] {self._error}")
+                    return None
+                if time.time() > start + timeout:
+                    break
+                self._cond.wait(timeout=0.05)
+            self._last_request = time.time()
+            fresh = [frame for ts, frame in self._frames if ts >= start]
+
+        if not fresh:
+            return None
+        return max(fresh, key=sharpness)
+
+    def capture_jpeg(self, quality=90, **kwargs):
+        """Sharpest fresh frame as JPEG bytes (None if capture failed)"""
+        frame = self.capture(**kwargs)
+        return encode_jpeg(frame, quality) if frame is not None else None
+
+
+_camera = None
+_camera_lock = threading.Lock()
+
+
+def get_camera():
+    global _camera
+    if _camera is None:
+        with _camera_lock:
+            if _camera is None:
+                _camera = CameraService()
+    return _camera
@@ -18,17 +18,8 @@ import cv2
 import time
 import speech_recognition as sr
 
-
-def speak(text, pause=0.7):
-    print(text)
-    try:
-        import pyttsx3
-        engine = pyttsx3.init()
-        engine.say(text)
-        engine.runAndWait()
-        time.sleep(pause)
-    except Exception as e:
-        print(f"[TTS ERROR] {e}")
+from audio_io import speak
+from camera_service import get_camera
 
 
 def listen_command():
@@ -57,11 +48,16 @@ def listen_command():
     reformed_text= nlp(text[9])
     return reformed_text
 """
-def pred_currency(image_path):
+def pred_currency(image):
+    """image: JPEG bytes from the camera service, or a path to an image file"""
     API_KEY = os.getenv("GEMINI_API_KEY")
     URL = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={API_KEY}"
-    with open(image_path, "rb") as f:
-        img_base64 = base64.b64encode(f.read()).decode("utf-8")
+    if isinstance(image, (bytes, bytearray)):
+        img_bytes = image
+    else:
+        with open(image, "rb") as f:
+            img_bytes = f.read()
+    img_base64 = base64.b64encode(img_bytes).decode("utf-8")
     headers = {
     "Content-Type": "application/json"
     }
@@ -73,7 +69,7 @@ def pred_currency(image_path):
                     {"text": "identify the currency and  give in one word the denomination of the currency shown in the image"},
                     {
                     "inline_data": {
-                        "mime_type": "image/png",
+                        "mime_type": "image/jpeg",
                         "data": img_base64
                     }
                 }
@@ -109,17 +105,12 @@ def currency_services(speak):
             speak("Exiting the currency recognition system. Goodbye!", pause=1)
             break
         elif 'start' in command:
-            speak("Get ready to show the currency to the webcam. Capturing in 3 seconds.")
-            time.sleep(3)
-            cap = cv2.VideoCapture(0)
-            ret, frame = cap.read()
-            cv2.imwrite('temp/captured_image.jpg', frame)
-            
-            cap.release()
-            if not ret:
+            speak("Hold the currency steady in front of the camera.")
+            image = get_camera().capture_jpeg()
+            if image is None:
                 speak("Failed to capture image from webcam.")
                 continue
-            pred_text = pred_currency('temp/captured_image.jpg')
+            pred_text = pred_currency(image)
             if pred_text is not None:
                 speak(f"detected currency  is {pred_text}")
                 return
@@ -1,20 +1,15 @@
 
-import cv2
-import insightface
 import numpy as np
-import sqlite3
 import os
-import pyttsx3
 import speech_recognition as sr
-import time
-# Initialize InsightFace for detection and embedding
-embedder = insightface.app.FaceAnalysis(name='buffalo_l')
-embedder.prepare(ctx_id=0, det_size=(640, 640))
-
-def speak(text):
-    tts_engine = pyttsx3.init()
-    tts_engine.say(text)
-    tts_engine.runAndWait()
+import sys
+try:
+    from face.face_service import get_face_service
+except ImportError:  # run from inside face/
+    from face_service import get_face_service
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audio_io import speak
+from camera_service import get_camera
 
 def listen_command():
     recognizer = sr.Recognizer()
@@ -30,41 +25,16 @@ def listen_command():
         return None
 
 def create_db():
-    conn = sqlite3.connect('faces.db')
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS faces (name TEXT, embedding BLOB)''')
-    conn.commit()
-    conn.close()
+    get_face_service().create_db()
 
 def save_face(name, embedding):
-    conn = sqlite3.connect('faces.db')
-    c = conn.cursor()
-    c.execute('INSERT INTO faces (name, embedding) VALUES (?, ?)', (name, embedding.tobytes()))
-    conn.commit()
-    conn.close()
-
-def load_faces():
-    conn = sqlite3.connect('faces.db')
-    c = conn.cursor()
-    c.execute('SELECT name, embedding FROM faces')
-    data = c.fetchall()
-    conn.close()
-    faces = []
-    for name, emb_blob in data:
-        emb = np.frombuffer(emb_blob, dtype=np.float32)
-        faces.append((name, emb))
-    return faces
-
-def cosine_similarity(a, b):
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+    # Writes to faces.db and updates the in-memory gallery
+    get_face_service().save_face(name, embedding)
 
 def face_services(speak):
-    create_db()
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
-        print("[ERROR] Could not open webcam.")
-        return
-    print("[DEBUG] Webcam opened successfully.")
+    face_service = get_face_service()
+    camera = get_camera()
+    camera.start()
     instructions = (
         "Welcome! You can say one of the following commands:\n"
         "- 'train' to enroll a new face,\n"
@@ -82,13 +52,9 @@ def face_services(speak):
             speak("Exiting the model. Goodbye!")
             break
         elif command == 'train':
-            speak("Get ready for photo in 3 seconds.")
-            for i in range(3, 0, -1):
-                print(f"Capturing photo in {i}...")
-                speak(str(i))
-                time.sleep(1)
-            ret, frame = cap.read()
-            faces = embedder.get(frame)
+            speak("Look at the camera and hold still.")
+            frame = camera.capture()
+            faces = face_service.detect(frame)
             if len(faces) == 0:
                 speak("No face detected. Try again.")
             else:
@@ -101,29 +67,16 @@ def face_services(speak):
                 else:
                     speak("Could not understand the name. Try again.")
         elif command == 'identify':
-            speak("Get ready for photo in 3 seconds.")
-            for i in range(3, 0, -1):
-                print(f"Capturing photo in {i}...")
-                speak(str(i))
-                time.sleep(1)
-            ret, frame = cap.read()
-            faces = embedder.get(frame)
-            if len(faces) == 0:
+            speak("Hold the camera towards the person.")
+            frame = camera.capture()
+            matches = face_service.recognize(frame)
+            if len(matches) == 0:
                 speak("No face detected. Try again.")
             else:
-                known_faces = load_faces()
-                if not known_faces:
+                if not face_service.known_people:
                     speak("No known faces in database.")
                 else:
-                    results = []
-                    for i, face in enumerate(faces):
-                        emb = face.embedding.astype(np.float32)
-                        sims = [cosine_similarity(emb, k[1]) for k in known_faces]
-                        best_idx = np.argmax(sims)
-                        if sims[best_idx] > 0.5:
-                            results.append(known_faces[best_idx][0])
-                        else:
-                            results.append("Unknown person")
+                    results = [name or "Unknown person" for _, name, _ in matches]
                     for idx, name in enumerate(results):
                         print(f"Face {idx+1}: {name}")
                         speak(f"Face {idx+1}: {name}")
@@ -131,9 +84,7 @@ def face_services(speak):
         else:
             speak("Unknown command. Please say 'train', 'identify', or 'stop'.")
     # No repeating of full instructions after the first time
-    cap.release()
-    cv2.destroyAllWindows()
-    print("[DEBUG] Webcam and windows released.")
+    # The shared camera stays open for other services and closes itself when idle
 def main():
     face_services(speak=speak)
 if __name__ == "__main__":
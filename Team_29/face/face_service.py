@@ -0,0 +1,201 @@
+"""
+Shared face service: loads InsightFace once and keeps the face gallery in memory
+
+The gallery is a normalized float32 matrix with one row per person (the mean of that
+person's stored embeddings), so all faces detected in a frame are matched with a single
+matrix multiply. New rows in faces.db are picked up incrementally, and save_face()
+updates the gallery directly. Deletes and updates (by any client) bump a counter through
+SQLite triggers, which makes the next refresh reload the whole gallery.
+"""
+
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+DB_PATH = os.getenv("FACES_DB", "faces.db")
+MODEL_NAME = os.getenv("FACE_MODEL", "buffalo_l")
+DET_SIZE = (640, 640)
+MATCH_THRESHOLD = float(os.getenv("FACE_MATCH_THRESHOLD", "0.5"))
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class FaceService:
+    def __init__(self, db_path=DB_PATH, model_name=MODEL_NAME, threshold=MATCH_THRESHOLD):
+        self.db_path = db_path
+        self.model_name = model_name
+        self.threshold = threshold
+        self._app = None
+        self._model_lock = threading.Lock()
+        self._infer_lock = threading.Lock()
+        self._lock = threading.RLock()
+
+        # name -> [sum of unit embeddings, count]; rows of the gallery follow this order
+        self._people = OrderedDict()
+        self._names = []
+        self._gallery = np.zeros((0, 512), dtype=np.float32)
+        self._last_rowid = 0
+        self._row_count = 0
+        self._changes = None
+
+        self.create_db()
+
+    # ---------------- model ----------------
+
+    @property
+    def app(self):
+        """InsightFace FaceAnalysis, created and prepared on first use only"""
+        if self._app is None:
+            with self._model_lock:
+                if self._app is None:
+                    from insightface.app import FaceAnalysis
+                    app = FaceAnalysis(name=self.model_name, providers=['CPUExecutionProvider'])
+                    app.prepare(ctx_id=0, det_size=DET_SIZE)
+                    self._app = app
+        return self._app
+
+    def detect(self, img):
+        """Detected faces (with .embedding and .bbox) in a BGR image"""
+        if img is None:
+            return []
+        app = self.app  # loads under _model_lock; inference is serialized separately
+        with self._infer_lock:
+            return app.get(img)
+
+    # ---------------- database / gallery ----------------
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def create_db(self):
+        conn = self._connect()
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS faces (name TEXT, embedding BLOB);
+            CREATE TABLE IF NOT EXISTS faces_meta (key TEXT PRIMARY KEY, value INTEGER);
+            INSERT OR IGNORE INTO faces_meta (key, value) VALUES ('changes', 0);
+            CREATE TRIGGER IF NOT EXISTS faces_deleted AFTER DELETE ON faces
+            BEGIN UPDATE faces_meta SET value = value + 1 WHERE key = 'changes'; END;
+            CREATE TRIGGER IF NOT EXISTS faces_updated AFTER UPDATE ON faces
+            BEGIN UPDATE faces_meta SET value = value + 1 WHERE key = 'changes'; END;
+        ''')
+        conn.commit()
+        conn.close()
+
+    def _add_to_gallery(self, rows):
+        changed = set()
+        for name, emb in rows:
+            unit = _normalize(emb)
+            entry = self._people.get(name)
+            if entry is None:
+                self._people[name] = [unit.copy(), 1]
+            else:
+                entry[0] += unit
+                entry[1] += 1
+            changed.add(name)
+
+        if not changed:
+            return
+        self._names = list(self._people)
+        if len(self._names) != len(self._gallery):
+            self._gallery = _normalize(np.stack([s for s, _ in self._people.values()]))
+        else:
+            for i, name in enumerate(self._names):
+                if name in changed:
+                    self._gallery[i] = _normalize(self._people[name][0])
+
+    def refresh(self):
+        """Load rows added since the last refresh; reload everything if rows were deleted or changed"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                (changes,) = conn.execute("SELECT value FROM faces_meta WHERE key = 'changes'").fetchone()
+                # rows already loaded must all still be there (catches delete + insert as well)
+                (loaded,) = conn.execute('SELECT COUNT(*) FROM faces WHERE rowid <= ?', (self._last_rowid,)).fetchone()
+                if changes != self._changes or loaded != self._row_count:
+                    self._people.clear()
+                    self._names = []
+                    self._gallery = np.zeros((0, 512), dtype=np.float32)
+                    self._last_rowid = 0
+                    self._row_count = 0
+                    self._changes = changes
+                rows = conn.execute(
+                    'SELECT rowid, name, embedding FROM faces WHERE rowid > ? ORDER BY rowid',
+                    (self._last_rowid,)
+                ).fetchall()
+            finally:
+                conn.close()
+
+            if rows:
+                self._add_to_gallery((name, np.frombuffer(blob, dtype=np.float32)) for _, name, blob in rows)
+                self._last_rowid = rows[-1][0]
+                self._row_count += len(rows)
+            return len(self._names)
+
+    def save_face(self, name, embedding):
+        embedding = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            self.refresh()
+            conn = self._connect()
+            try:
+                cur = conn.execute('INSERT INTO faces (name, embedding) VALUES (?, ?)', (name, embedding.tobytes()))
+                conn.commit()
+                rowid = cur.lastrowid
+            finally:
+                conn.close()
+            self._add_to_gallery([(name, embedding)])
+            self._last_rowid = max(self._last_rowid, rowid)
+            self._row_count += 1
+
+    @property
+    def known_people(self):
+        with self._lock:
+            return list(self._names)
+
+    # ---------------- matching ----------------
+
+    def match(self, embeddings):
+        """
+        Match embeddings (N x 512) against the gallery in one matrix multiply.
+        Returns [(name or None, similarity)] per embedding.
+        """
+        embeddings = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        if embeddings.size == 0:
+            return []
+        with self._lock:
+            self.refresh()
+            if not self._names:
+                return [(None, 0.0)] * len(embeddings)
+            sims = _normalize(embeddings) @ self._gallery.T
+            names = self._names
+
+        best = sims.argmax(axis=1)
+        scores = sims[np.arange(len(best)), best]
+        return [(names[i] if s > self.threshold else None, float(s)) for i, s in zip(best, scores)]
+
+    def recognize(self, img):
+        """Detect and identify every face in a BGR image: [(face, name or None, similarity)]"""
+        faces = self.detect(img)
+        if not faces:
+            return []
+        matches = self.match(np.stack([f.embedding for f in faces]))
+        return [(face, name, score) for face, (name, score) in zip(faces, matches)]
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_face_service():
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = FaceService()
+    return _service
@@ -0,0 +1,202 @@
+"""
+Local intent router for the voice agent
+
+Common commands ("read this text", "what currency is this", "who is this person",
+"what do you see") are classified locally with weighted keywords in well under a
+millisecond, so they work without a network connection. Only utterances without a clear
+local winner go to the LLM router (Mistral); if that is unreachable the best local guess
+is used when it scored at least ROUTER_MIN_SCORE, and Gemini chat otherwise. Words that no
+keyword explains lower the score, so "describe" opens the camera but "describe quantum
+physics" does not. Recent utterance -> intent decisions are kept in an LRU cache.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+
+INTENTS = ("ocr", "currency", "face", "scene", "gemini")
+
+CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_CONFIDENCE", "0.75"))
+MIN_SCORE = float(os.getenv("ROUTER_MIN_SCORE", "3.0"))
+CACHE_SIZE = int(os.getenv("ROUTER_CACHE_SIZE", "256"))
+
+# score lost per content word that no keyword phrase accounts for
+UNMATCHED_PENALTY = 0.5
+# words that carry no intent of their own ("read THIS", "describe WHAT IS in front of me")
+FILLER_WORDS = frozenset(
+    "a an the this that these those it its is are am be what whats me my i im you your can "
+    "could would please tell to of in on at for with and do does some there here now just".split()
+)
+
+# phrase -> weight; phrases are matched on whole words of the normalized utterance
+KEYWORDS = {
+    "ocr": {
+        "read": 3, "scan": 3, "text": 2, "ocr": 3, "written": 2, "writing": 2, "document": 2,
+        "page": 1, "book": 1, "label": 1.5, "sign": 1, "letter": 1, "menu": 1.5,
+        "newspaper": 2, "words": 1, "what does it say": 3, "what does this say": 3,
+    },
+    "currency": {
+        "currency": 3, "money": 3, "cash": 3, "note": 1.5, "notes": 1.5, "bill": 1.5,
+        "bills": 1.5, "rupee": 3, "rupees": 3, "dollar": 3, "dollars": 3, "euro": 3,
+        "denomination": 3, "coin": 2, "coins": 2, "how much": 1.5,
+    },
+    "face": {
+        "face": 3, "faces": 3, "who": 2, "person": 2, "people": 1.5, "recognize": 1.5,
+        "identify": 1.5, "remember": 1.5, "train": 1, "someone": 1.5, "friend": 1,
+        "whos this": 3, "who is this": 3, "who is in front": 3,
+    },
+    "scene": {
+        "scene": 3, "describe": 3, "see": 1.5, "around": 2, "surroundings": 3,
+        "front of me": 1.5, "environment": 2, "room": 1.5, "look": 1, "happening": 1.5,
+        "objects": 2, "what do you see": 3, "whats around": 3, "what is in front of me": 3,
+    },
+    "gemini": {
+        "weather": 3, "why": 1.5, "explain": 2, "tell me about": 2, "joke": 3,
+        "news": 2, "meaning": 2, "how do": 1.5, "how to": 1.5, "question": 1.5,
+    },
+}
+
+
+def normalize(text):
+    """Lowercase words with apostrophes dropped: "What's this?" -> "whats this" """
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower().replace("'", "")))
+
+
+class IntentRouter:
+    def __init__(self, llm=None, keywords=KEYWORDS, threshold=CONFIDENCE_THRESHOLD,
+                 min_score=MIN_SCORE, cache_size=CACHE_SIZE):
+        """
+        Args:
+            llm: Optional callable(text) -> (intent, reasoning) or None on failure
+        """
+        self.llm = llm
+        self.keywords = keywords
+        self.threshold = threshold
+        self.min_score = min_score
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.sources = Counter()
+        self.intents = Counter()
+        self._latencies = {}
+
+    # ---------------- local classifier ----------------
+
+    def scores(self, text):
+        padded = f" {normalize(text)} "
+        return {
+            intent: sum(weight for phrase, weight in phrases.items() if f" {phrase} " in padded)
+            for intent, phrases in self.keywords.items()
+        }
+
+    def unmatched_words(self, text):
+        """Content words not covered by any matched keyword phrase"""
+        words = normalize(text).split()
+        padded = f" {' '.join(words)} "
+        covered = {
+            word
+            for phrases in self.keywords.values()
+            for phrase in phrases if f" {phrase} " in padded
+            for word in phrase.split()
+        }
+        return [w for w in words if w not in covered and w not in FILLER_WORDS]
+
+    def classify(self, text):
+        """Local guess: (intent or None, confidence 0-1, matched score less unmatched-word penalty)"""
+        ranked = sorted(self.scores(text).items(), key=lambda item: item[1], reverse=True)
+        (best, best_score), (_, second_score) = ranked[0], ranked[1]
+        if best_score <= 0:
+            return None, 0.0, 0.0
+        margin = (best_score - second_score) / best_score
+        score = best_score - UNMATCHED_PENALTY * len(self.unmatched_words(text))
+        if score <= 0:
+            return None, 0.0, 0.0
+        confidence = min(1.0, score / self.min_score) * margin
+        return best, round(confidence, 3), score
+
+    # ---------------- routing ----------------
+
+    def route(self, text):
+        """
+        Decide the intent for an utterance.
+        Returns {"intent", "reasoning", "source", "confidence", "ms"} where source is
+        cache, local, llm or fallback.
+        """
+        start = time.perf_counter()
+        key = normalize(text)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        if cached is not None:
+            return self._record(dict(cached, source="cache"), start)
+
+        intent, confidence, score = self.classify(text)
+        if intent is not None and score >= self.min_score and confidence >= self.threshold:
+            decision = {"intent": intent, "confidence": confidence,
+                        "reasoning": f"Keyword match (score {score:g})"}
+            self._remember(key, decision)
+            return self._record(dict(decision, source="local"), start)
+
+        answer = self.llm(text) if self.llm is not None else None
+        if answer is not None and answer[0] in INTENTS:
+            decision = {"intent": answer[0], "confidence": None, "reasoning": answer[1]}
+            self._remember(key, decision)
+            return self._record(dict(decision, source="llm"), start)
+
+        # LLM unavailable (offline) or unusable: trust the local guess only if it scored enough,
+        # otherwise answer conversationally rather than opening a camera service.
+        # Not cached, so the LLM is retried next time.
+        if intent is not None and score >= self.min_score:
+            decision = {"intent": intent, "confidence": confidence,
+                        "reasoning": f"Ambiguous keyword match (score {score:g}), LLM unavailable"}
+        else:
+            decision = {"intent": "gemini", "confidence": confidence,
+                        "reasoning": "No confident keyword match, LLM unavailable"}
+        return self._record(dict(decision, source="fallback"), start)
+
+    def _remember(self, key, decision):
+        with self._lock:
+            self._cache[key] = decision
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # ---------------- metrics ----------------
+
+    def _record(self, decision, start):
+        decision["ms"] = round((time.perf_counter() - start) * 1000, 3)
+        with self._lock:
+            self.sources[decision["source"]] += 1
+            self.intents[decision["intent"]] += 1
+            self._latencies.setdefault(decision["source"], deque(maxlen=500)).append(decision["ms"])
+        return decision
+
+    def metrics(self):
+        with self._lock:
+            total = sum(self.sources.values())
+            latency = {}
+            for source, values in self._latencies.items():
+                ordered = sorted(values)
+                latency[source] = {
+                    "avg_ms": round(sum(ordered) / len(ordered), 3),
+                    "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                }
+            return {
+                "total": total,
+                "by_source": dict(self.sources),
+                "by_intent": dict(self.intents),
+                "offline_rate": round((self.sources["cache"] + self.sources["local"]) / total, 3) if total else None,
+                "latency": latency,
+                "cache_entries": len(self._cache),
+            }
+
+    def report(self):
+        m = self.metrics()
+        sources = ", ".join(f"{source} {count}" for source, count in sorted(m["by_source"].items()))
+        latency = ", ".join(f"{source} {v['avg_ms']:.2f}ms" for source, v in sorted(m["latency"].items()))
+        rate = f"{m['offline_rate']:.0%}" if m["offline_rate"] is not None else "-"
+        return f"[ROUTER] {m['total']} commands ({sources}); answered without LLM {rate}; avg {latency or '-'}"
@@ -10,33 +10,14 @@ import cv2
 import numpy as np
 import base64
 import requests
-import sqlite3
 import os
 import time
 import speech_recognition as sr
-from insightface.app import FaceAnalysis
 
-from elevenlabs.client import ElevenLabs
-from elevenlabs import play
+from audio_io import speak
+from camera_service import encode_jpeg, get_camera
+from face.face_service import get_face_service
 
-client = ElevenLabs(
-    api_key=os.getenv("ELEVEN_LABS_API_KEY")
-)
-
-def speak(text, pause=0.7):
-    """Text-to-speech using ElevenLabs"""
-    print(f"🔊 {text}")
-    try:
-        audio = client.text_to_speech.convert(
-            text=text,
-            voice_id="JBFqnCBsd6RMkjVDRZzb",
-            model_id="eleven_multilingual_v2",
-            output_format="mp3_44100_128",
-        )
-        play(audio)
-        time.sleep(pause)
-    except Exception as e:
-        print(f"[TTS ERROR] {e}")
 
 def listen_command():
     """Voice recognition"""
@@ -58,65 +39,41 @@ def listen_command():
         speak(f"Error: {str(e)}")
         return None
 
-def get_faces_in_scene(image_path):
+def get_faces_in_scene(image):
     """
     Detect and recognize faces in the scene
     
+    Args:
+        image: BGR frame from the camera service, or a path to an image file
+    
     Returns:
         List of recognized people with their positions and confidence scores
     """
     try:
-        # Initialize InsightFace
-        app = FaceAnalysis(name='buffalo_l', providers=['CPUExecutionProvider'])
-        app.prepare(ctx_id=0, det_size=(640, 640))
-        
         # Load image
-        img = cv2.imread(image_path)
+        img = cv2.imread(image) if isinstance(image, str) else image
         if img is None:
             print("❌ Failed to load image")
             return []
         
-        # Detect faces
-        faces = app.get(img)
+        # Detect faces and match them all against the in-memory gallery at once
+        face_service = get_face_service()
+        matches = face_service.recognize(img)
         
-        if len(faces) == 0:
+        if len(matches) == 0:
             print("ℹ️ No faces detected in the scene")
             return []
         
-        print(f"👤 Detected {len(faces)} face(s)")
-        
-        # Connect to face database
-        conn = sqlite3.connect('faces.db')
-        c = conn.cursor()
-        c.execute('SELECT name, embedding FROM faces')
-        stored_faces = c.fetchall()
-        conn.close()
+        print(f"👤 Detected {len(matches)} face(s)")
         
-        if not stored_faces:
+        if not face_service.known_people:
             print("ℹ️ No faces in database to compare")
             return []
         
         recognized_people = []
         img_height, img_width = img.shape[:2]
         
-        for idx, face in enumerate(faces):
-            detected_embedding = face.embedding.astype(np.float32)
-            best_match = None
-            best_similarity = 0.0
-            
-            # Compare with stored faces
-            for name, stored_embedding_blob in stored_faces:
-                stored_embedding = np.frombuffer(stored_embedding_blob, dtype=np.float32)
-                
-                # Cosine similarity
-                similarity = np.dot(detected_embedding, stored_embedding) / (
-                    np.linalg.norm(detected_embedding) * np.linalg.norm(stored_embedding)
-                )
-                
-                if similarity > best_similarity and similarity > 0.5:
-                    best_similarity = similarity
-                    best_match = name
-            
+        for idx, (face, best_match, best_similarity) in enumerate(matches):
             if best_match:
                 # Get face bounding box
                 bbox = face.bbox.astype(int)
@@ -153,12 +110,15 @@ def get_faces_in_scene(image_path):
         print(f"❌ Error in face recognition: {e}")
         return []
 
-def get_basic_scene_description(image_path):
-    """Get basic scene description from SmolVLM"""
+def get_basic_scene_description(image):
+    """Get basic scene description from SmolVLM (image: JPEG bytes or a file path)"""
     VLM_URL = os.getenv("VLM_URL", "http://localhost:1234")
     
-    with open(image_path, "rb") as image_file:
-        encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
+    if isinstance(image, (bytes, bytearray)):
+        encoded_string = base64.b64encode(image).decode('utf-8')
+    else:
+        with open(image, "rb") as image_file:
+            encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
     
     URL = f"{VLM_URL}/v1/chat/completions"
     headers = {"Content-Type": "application/json"}
@@ -263,21 +223,27 @@ Keep the description concise (2-3 sentences) and focus on the most important det
         names = [p['name'] for p in recognized_people]
         return f"I can see {', '.join(names)} in this scene. {scene_description}"
 
-def enhanced_scene_description(image_path):
+def enhanced_scene_description(frame):
     """
     Main function: Get complete scene description with face recognition
+    
+    Args:
+        frame: BGR frame from the camera service, or a path to an image file
     """
+    if isinstance(frame, str):
+        frame = cv2.imread(frame)
+    
     print("\n" + "="*50)
     print("🎬 ENHANCED SCENE ANALYSIS")
     print("="*50)
     
     # Step 1: Recognize faces
     print("\n👤 Step 1: Face Recognition...")
-    recognized_people = get_faces_in_scene(image_path)
+    recognized_people = get_faces_in_scene(frame)
     
     # Step 2: Get basic scene description
     print("\n🖼️ Step 2: Scene Understanding...")
-    scene_description = get_basic_scene_description(image_path)
+    scene_description = get_basic_scene_description(encode_jpeg(frame))
     
     # Step 3: Enhance with face information
     print("\n✨ Step 3: Creating Personalized Description...")
@@ -312,25 +278,17 @@ def scene_describe_service(speak_func):
             break
             
         elif 'start' in command:
-            speak_func("Get ready to show the scene to the camera. Capturing in 3 seconds.")
-            time.sleep(3)
+            speak_func("Point the camera at the scene and hold steady.")
             
-            # Capture image
-            cap = cv2.VideoCapture(0)
-            ret, frame = cap.read()
-            cap.release()
+            # Sharpest fresh frame from the shared camera, kept in memory
+            frame = get_camera().capture()
             
-            if not ret:
+            if frame is None:
                 speak_func("Failed to capture image from webcam.")
                 continue
             
-            # Save image
-            image_path = 'temp/enhanced_scene.jpg'
-            os.makedirs('temp', exist_ok=True)
-            cv2.imwrite(image_path, frame)
-            
             # Get enhanced description
-            description = enhanced_scene_description(image_path)
+            description = enhanced_scene_description(frame)
             
             # Speak the description
             speak_func(description)
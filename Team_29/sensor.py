@@ -1,14 +1,8 @@
 import RPi.GPIO as GPIO
+import threading
 import time
-import pyttsx3
 
-# Initialize Text-to-Speech
-engine = pyttsx3.init()
-engine.setProperty('rate', 150)  # Speed of speech
-engine.setProperty('volume', 1.0)  # Volume (0.0 to 1.0)
-
-GPIO.setmode(GPIO.BCM)
-GPIO.setwarnings(False)
+from audio_io import Pyttsx3Backend, get_audio
 
 # ---------------------------
 # PIN SETUP (Updated)
@@ -27,25 +21,32 @@ BUZZER = 18    # Pin 12 (IO pin)
 
 # Power pins (5V, GND) are directly wired, no code needed
 
-GPIO.setup(TRIG, GPIO.OUT)
-GPIO.setup(ECHO, GPIO.IN)
-GPIO.setup(FLAME, GPIO.IN)
-GPIO.setup(WATER, GPIO.IN)
-GPIO.setup(BUZZER, GPIO.OUT)
+def setup_gpio():
+    GPIO.setmode(GPIO.BCM)
+    GPIO.setwarnings(False)
+
+    GPIO.setup(TRIG, GPIO.OUT)
+    GPIO.setup(ECHO, GPIO.IN)
+    GPIO.setup(FLAME, GPIO.IN)
+    GPIO.setup(WATER, GPIO.IN)
+    GPIO.setup(BUZZER, GPIO.OUT)
 
-# Initialize buzzer to OFF state
-GPIO.output(BUZZER, False)
-GPIO.output(TRIG, False)
+    # Initialize buzzer to OFF state
+    GPIO.output(BUZZER, False)
+    GPIO.output(TRIG, False)
 
 # ---------------------------
 # BUZZER PATTERNS
 # ---------------------------
 
 def speak(text):
-    """Text-to-speech output"""
+    """Text-to-speech output (waits until spoken)"""
     print(f"🔊 {text}")
-    engine.say(text)
-    engine.runAndWait()
+    get_audio().speak(text)
+
+def warn(text):
+    """Hazard alert: queued ahead of (and interrupting) any other speech, without blocking the loop"""
+    get_audio().warn(text)
 
 def beep(pattern):
     for on, off in pattern:
@@ -97,23 +98,17 @@ def get_distance():
     return distance
 
 # ---------------------------
-# MAIN LOOP
+# MONITOR LOOP
 # ---------------------------
 
-speak("Smart Stick System Starting")
-print("⏳ Warming up sensors...")
-time.sleep(2)  # Give sensors time to stabilize
-GPIO.output(BUZZER, False)  # Ensure buzzer is off
-speak("System Ready")
-print("✅ System Ready!\n")
-
-# State tracking for coordinated alerts
-last_alert_time = 0
-alert_cooldown = 3  # seconds between voice alerts
-previous_state = {"obstacle": False, "water": False, "fire": False}
+def monitor(stop_event=None):
+    """Poll the sensors until stop_event is set; alerts go through the shared speech queue"""
+    # State tracking for coordinated alerts
+    last_alert_time = 0
+    alert_cooldown = 3  # seconds between voice alerts
+    previous_state = {"obstacle": False, "water": False, "fire": False}
 
-try:
-    while True:
+    while not (stop_event and stop_event.is_set()):
         dist = get_distance()
         fire = GPIO.input(FLAME) == 0  # Active LOW
         water = GPIO.input(WATER) == 0  # Active LOW
@@ -121,7 +116,7 @@ try:
 
         current_time = time.time()
         current_state = {"obstacle": obstacle, "water": water, "fire": fire}
-        
+    
         # Check if state changed
         state_changed = current_state != previous_state
         can_alert = (current_time - last_alert_time) >= alert_cooldown
@@ -133,49 +128,49 @@ try:
             print("🔥💧🚧 MULTIPLE DANGERS")
             beep(fire_water_obstacle_pattern)
             if state_changed or can_alert:
-                speak("Critical alert! Fire, water, and obstacle detected ahead. Stop immediately!")
+                warn("Critical alert! Fire, water, and obstacle detected ahead. Stop immediately!")
                 last_alert_time = current_time
 
         elif fire and water:
             print("🔥💧 FIRE + WATER")
             beep(fire_water_pattern)
             if state_changed or can_alert:
-                speak("Warning! Fire and water detected. Danger ahead!")
+                warn("Warning! Fire and water detected. Danger ahead!")
                 last_alert_time = current_time
 
         elif fire and obstacle:
             print("🔥🚧 FIRE + OBSTACLE")
             beep(fire_pattern)
             if state_changed or can_alert:
-                speak(f"Fire detected with obstacle at {int(dist)} centimeters. Move carefully!")
+                warn(f"Fire detected with obstacle at {int(dist)} centimeters. Move carefully!")
                 last_alert_time = current_time
 
         elif water and obstacle:
             print("💧🚧 WATER + OBSTACLE")
             beep(water_pattern)
             if state_changed or can_alert:
-                speak(f"Water and obstacle detected at {int(dist)} centimeters ahead.")
+                warn(f"Water and obstacle detected at {int(dist)} centimeters ahead.")
                 last_alert_time = current_time
 
         elif fire:
             print("🔥 FIRE DETECTED")
             beep(fire_pattern)
             if state_changed or can_alert:
-                speak("Fire detected! Danger ahead!")
+                warn("Fire detected! Danger ahead!")
                 last_alert_time = current_time
 
         elif water:
             print("💧 WATER DETECTED")
             beep(water_pattern)
             if state_changed or can_alert:
-                speak("Water detected on the ground.")
+                warn("Water detected on the ground.")
                 last_alert_time = current_time
 
         elif obstacle:
             print("🚧 OBSTACLE DETECTED")
             beep(obstacle_pattern)
             if state_changed or can_alert:
-                speak(f"Obstacle detected at {int(dist)} centimeters ahead.")
+                warn(f"Obstacle detected at {int(dist)} centimeters ahead.")
                 last_alert_time = current_time
 
         else:
@@ -183,16 +178,43 @@ try:
             GPIO.output(BUZZER, False)
             # Announce clear path occasionally
             if previous_state != current_state and any(previous_state.values()):
-                speak("Path is clear")
+                get_audio().say("Path is clear")
                 last_alert_time = current_time
 
         previous_state = current_state.copy()
         time.sleep(0.5)  # Increased to 0.5s for better voice coordination
 
-except KeyboardInterrupt:
-    print("\n⏹️  Stopping Smart Stick System...")
-    speak("Stopping Smart Stick System")
-    GPIO.output(BUZZER, False)  # Turn off buzzer before cleanup
-    GPIO.cleanup()
-    print("✅ System stopped. Goodbye!")
-    speak("Goodbye")
+
+def start_monitor():
+    """Run the sensor loop on a background thread (used by agent.py); returns its stop event"""
+    setup_gpio()
+    stop_event = threading.Event()
+    threading.Thread(target=monitor, args=(stop_event,), name="smart-stick", daemon=True).start()
+    return stop_event
+
+
+# ---------------------------
+# MAIN
+# ---------------------------
+
+if __name__ == "__main__":
+    get_audio(Pyttsx3Backend(rate=150, volume=1.0))
+    setup_gpio()
+
+    speak("Smart Stick System Starting")
+    print("⏳ Warming up sensors...")
+    time.sleep(2)  # Give sensors time to stabilize
+    GPIO.output(BUZZER, False)  # Ensure buzzer is off
+    speak("System Ready")
+    print("✅ System Ready!\n")
+
+    try:
+        monitor()
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopping Smart Stick System...")
+        get_audio().interrupt()
+        speak("Stopping Smart Stick System")
+        GPIO.output(BUZZER, False)  # Turn off buzzer before cleanup
+        GPIO.cleanup()
+        print("✅ System stopped. Goodbye!")
+        speak("Goodbye")
@@ -0,0 +1,99 @@
+# tests/test_face_service.py
+import os
+import sys
+import threading
+import types
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+class FakeFace:
+    def __init__(self, embedding):
+        self.embedding = np.asarray(embedding, dtype=np.float32)
+        self.bbox = [0, 0, 10, 10]
+
+
+class FakeFaceAnalysis:
+    """Stands in for insightface's FaceAnalysis: one fixed face per image"""
+    def __init__(self, name=None, providers=None):
+        self.prepared = False
+
+    def prepare(self, ctx_id=0, det_size=None):
+        self.prepared = True
+
+    def get(self, img):
+        embedding = np.zeros(512, dtype=np.float32)
+        embedding[0] = 1.0
+        return [FakeFace(embedding)]
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    insightface = types.ModuleType("insightface")
+    insightface_app = types.ModuleType("insightface.app")
+    insightface_app.FaceAnalysis = FakeFaceAnalysis
+    insightface.app = insightface_app
+    monkeypatch.setitem(sys.modules, "insightface", insightface)
+    monkeypatch.setitem(sys.modules, "insightface.app", insightface_app)
+
+    from face.face_service import FaceService
+    return FaceService(db_path=str(tmp_path / "faces.db"))
+
+
+def run_with_timeout(fn, timeout=5):
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault("value", fn()), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "call did not return (deadlock?)"
+    return result["value"]
+
+
+def test_detect_on_fresh_service_loads_model_and_returns(service):
+    faces = run_with_timeout(lambda: service.detect(np.zeros((4, 4, 3), dtype=np.uint8)))
+    assert len(faces) == 1
+    assert service.app.prepared
+
+
+def test_detect_none_image(service):
+    assert service.detect(None) == []
+
+
+def test_recognize_matches_saved_face(service):
+    embedding = np.zeros(512, dtype=np.float32)
+    embedding[0] = 1.0
+    service.save_face("alice", embedding)
+
+    matches = run_with_timeout(lambda: service.recognize(np.zeros((4, 4, 3), dtype=np.uint8)))
+    assert [(name, round(score, 3)) for _, name, score in matches] == [("alice", 1.0)]
+
+
+def unit(index):
+    embedding = np.zeros(512, dtype=np.float32)
+    embedding[index] = 1.0
+    return embedding
+
+
+def test_delete_then_insert_by_another_client_reloads_gallery(service):
+    import sqlite3
+
+    service.save_face("alice", unit(0))
+    service.save_face("bob", unit(1))
+    assert service.known_people == ["alice", "bob"]
+
+    # re-enrol bob by hand: delete his row (the newest, so SQLite reuses its rowid) and insert again
+    conn = sqlite3.connect(service.db_path)
+    conn.execute("DELETE FROM faces WHERE name = 'bob'")
+    conn.execute("INSERT INTO faces (name, embedding) VALUES (?, ?)", ("carol", unit(2).tobytes()))
+    conn.commit()
+    conn.close()
+
+    service.refresh()
+    assert service.known_people == ["alice", "carol"]
+    assert service.match(unit(1)) == [(None, 0.0)]
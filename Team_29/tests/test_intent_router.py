@@ -0,0 +1,131 @@
+# tests/test_intent_router.py
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from intent_router import IntentRouter, normalize
+
+
+class FakeLLM:
+    def __init__(self, answer=None):
+        self.answer = answer
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return self.answer
+
+
+def test_normalize():
+    assert normalize("What's THIS?") == "whats this"
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("Can you read this text?", "ocr"),
+    ("What currency is this?", "currency"),
+    ("Who is this person?", "face"),
+    ("What do you see?", "scene"),
+    ("What's the weather?", "gemini"),
+    ("read this", "ocr"),
+    ("read", "ocr"),
+    ("scan the text", "ocr"),
+    ("what does this say", "ocr"),
+    ("describe", "scene"),
+    ("what is in front of me", "scene"),
+])
+def test_common_commands_route_locally_without_llm(text, intent):
+    llm = FakeLLM(("gemini", "should not be called"))
+    decision = IntentRouter(llm=llm).route(text)
+    assert decision["intent"] == intent
+    assert decision["source"] == "local"
+    assert llm.calls == []
+
+
+@pytest.mark.parametrize("text", [
+    "who won the world cup",
+    "who invented the telephone",
+    "describe quantum physics",
+    "read me a story",
+])
+def test_weak_keyword_match_without_llm_goes_to_gemini(text):
+    decision = IntentRouter(llm=None).route(text)
+    assert decision["intent"] == "gemini"
+    assert decision["source"] == "fallback"
+
+
+def test_unmatched_words_lower_the_score():
+    router = IntentRouter()
+    assert router.unmatched_words("describe quantum physics") == ["quantum", "physics"]
+    assert router.classify("describe")[2] > router.classify("describe quantum physics")[2]
+
+
+def test_weak_keyword_match_with_failing_llm_goes_to_gemini():
+    llm = FakeLLM(None)
+    decision = IntentRouter(llm=llm).route("who won the world cup")
+    assert llm.calls == ["who won the world cup"]
+    assert decision["intent"] == "gemini"
+    assert decision["source"] == "fallback"
+
+
+def test_ambiguous_but_strong_match_keeps_local_guess_offline():
+    # face and scene both score >= min_score, so confidence is low but the guess is usable
+    router = IntentRouter(llm=None)
+    intent, confidence, score = router.classify("who is the person in this room around me")
+    assert score >= router.min_score and confidence < router.threshold
+
+    decision = router.route("who is the person in this room around me")
+    assert decision["intent"] == intent
+    assert decision["source"] == "fallback"
+
+
+def test_low_confidence_uses_llm_answer_and_caches_it():
+    llm = FakeLLM(("gemini", "general knowledge"))
+    router = IntentRouter(llm=llm)
+
+    first = router.route("who won the world cup")
+    second = router.route("Who won the world cup?")
+
+    assert first["intent"] == "gemini" and first["source"] == "llm"
+    assert second["source"] == "cache"
+    assert len(llm.calls) == 1
+
+
+def test_invalid_llm_intent_is_ignored():
+    decision = IntentRouter(llm=FakeLLM(("weather", "not an intent"))).route("read me a story")
+    assert decision["intent"] == "gemini"
+    assert decision["source"] == "fallback"
+
+
+def test_fallback_is_not_cached():
+    llm = FakeLLM(None)
+    router = IntentRouter(llm=llm)
+    router.route("read me a story")
+    router.route("read me a story")
+    assert len(llm.calls) == 2
+
+
+def test_cache_is_bounded_lru():
+    router = IntentRouter(cache_size=2)
+    router.route("read this text")
+    router.route("what currency is this")
+    router.route("read this text")          # refresh
+    router.route("who is this person")      # evicts the currency entry
+    assert router.route("read this text")["source"] == "cache"
+    assert router.route("what currency is this")["source"] == "local"
+
+
+def test_metrics_report():
+    router = IntentRouter(llm=None)
+    router.route("read this text")
+    router.route("read this text")
+    router.route("read me a story")
+    m = router.metrics()
+    assert m["total"] == 3
+    assert m["by_source"] == {"local": 1, "cache": 1, "fallback": 1}
+    assert m["offline_rate"] == pytest.approx(0.667)
+    assert router.report().startswith("[ROUTER] 3 commands")
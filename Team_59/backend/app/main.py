@@ -9,7 +9,7 @@ import os
 
 from .services.medical_image_service import get_medical_image_service
 from .services.prediction_service import get_prediction_service
-from .models.model_loader import get_model_loader
+from .models.model_registry import get_model_registry
 from .db import Base, engine
 from .routers import auth, courses,lessons
 
@@ -32,6 +32,11 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 DEFAULT_MODEL_TYPE = os.getenv("MODEL_TYPE", "mobilenetv2").lower()
+PRELOAD_MODELS = [
+    m.strip().lower()
+    for m in os.getenv("PRELOAD_MODELS", "mobilenetv2,hybrid_cnn_vit").split(",")
+    if m.strip()
+]
 
 
 @asynccontextmanager
@@ -43,16 +48,13 @@ async def lifespan(app: FastAPI):
         # For larger systems, consider Alembic migrations instead.
         Base.metadata.create_all(bind=engine)
 
-        model_loader = get_model_loader(
-            model_path=(
-                "trained_models/mobilenetv2_small_model.pth"
-                if DEFAULT_MODEL_TYPE == "mobilenetv2"
-                else "trained_models/enhanced_hybrid_model.pth"
-            ),
-            model_type=DEFAULT_MODEL_TYPE,
+        # Keep every model resident; load them in parallel with warm-up passes
+        models_to_load = sorted(set(PRELOAD_MODELS) | {DEFAULT_MODEL_TYPE})
+        get_model_registry().load_all(
+            model_types=models_to_load,
+            required=[DEFAULT_MODEL_TYPE],
         )
-        model_loader.load_model()
-        logger.info("%s classifier loaded successfully", DEFAULT_MODEL_TYPE)
+        logger.info("Classifiers loaded: %s", ", ".join(models_to_load))
         yield
 
     except Exception as e:
@@ -61,6 +63,7 @@ async def lifespan(app: FastAPI):
 
     finally:
         logger.info("Shutting down services...")
+        get_model_registry().shutdown()
 
 
 app = FastAPI(
@@ -186,6 +189,7 @@ async def get_model_information(
 ):
     try:
         prediction_service = get_prediction_service(model_type=model_type)
+        await prediction_service.ensure_loaded()
         model_info = prediction_service.get_model_info()
         return model_info
     except Exception as e:
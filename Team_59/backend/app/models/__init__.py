@@ -10,6 +10,7 @@ __app_name__ = "Healthcare AR Platform"
 from .hybrid_cnn_vit import ImprovedHybridCNNViT
 from .gradcam import GradCAM
 from .model_loader import ModelLoader
+from .model_registry import ModelRegistry, get_model_registry
 from .user import User
 from .course import Course
 from .enrollment import Enrollment
@@ -18,6 +19,8 @@ __all__ = [
     'ImprovedHybridCNNViT',
     'GradCAM',
     'ModelLoader',
+    'ModelRegistry',
+    'get_model_registry',
     "User",
     "Course",
     "Enrollment",
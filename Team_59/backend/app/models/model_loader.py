@@ -1,7 +1,9 @@
 import torch
 import logging
+import os
+import threading
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
 import json
 
 from .hybrid_cnn_vit import ImprovedHybridCNNViT
@@ -9,6 +11,12 @@ from .mobilenetv2_model import SmallMedNet  # Your new MobileNetV2 model class
 
 logger = logging.getLogger(__name__)
 
+# Checkpoint used for each supported model type
+MODEL_CHECKPOINTS = {
+    "mobilenetv2": "trained_models/mobilenetv2_small_model.pth",
+    "hybrid_cnn_vit": "trained_models/enhanced_hybrid_model.pth",
+}
+
 class ModelLoader:
     """Manages model loading and caching"""
 
@@ -17,13 +25,16 @@ class ModelLoader:
         model_path: str,
         device: Optional[str] = None,
         model_type: str = "mobilenetv2",  # 'mobilenetv2' or 'hybrid_cnn_vit'
+        runtime: Optional[str] = None,  # 'eager', 'torchscript' or 'onnx'
     ):
         self.model_path = Path(model_path)
         self.device = device or ('cuda' if torch.cuda.is_available() else 'cpu')
         self.model = None
         self.model_info = {}
         self.model_type = model_type.lower()
-        logger.info(f"ModelLoader initialized - Device: {self.device}, Model type: {self.model_type}")
+        self.runtime = (runtime or os.getenv("INFERENCE_RUNTIME", "eager")).lower()
+        self._inference_fn = None
+        logger.info(f"ModelLoader initialized - Device: {self.device}, Model type: {self.model_type}, Runtime: {self.runtime}")
 
     def load_model(self, num_classes: int = 2):
         logger.info(f"Loading model from {self.model_path} of type {self.model_type}")
@@ -65,6 +76,51 @@ class ModelLoader:
             self.load_model()
         return self.model
 
+    def get_inference_fn(self) -> Callable[[torch.Tensor], torch.Tensor]:
+        """
+        Batch -> logits callable for the configured runtime
+
+        Uses an exported TorchScript/ONNX artefact (see optimized_export.py) when
+        INFERENCE_RUNTIME asks for one and it exists; otherwise the eager model.
+        """
+        if self._inference_fn is None:
+            self._inference_fn = self._build_inference_fn()
+        return self._inference_fn
+
+    def _build_inference_fn(self) -> Callable[[torch.Tensor], torch.Tensor]:
+        if self.runtime in ("torchscript", "onnx"):
+            from .optimized_export import find_artifact, load_inference_fn
+
+            artifact = find_artifact(self.model_type, self.runtime)
+            if artifact is not None:
+                logger.info(f"Serving {self.model_type} from optimized artefact {artifact}")
+                return load_inference_fn(artifact)
+            logger.warning(
+                f"No {self.runtime} artefact for {self.model_type}; falling back to eager. "
+                f"Run: python -m app.models.optimized_export --model-type {self.model_type} --format {self.runtime}"
+            )
+        elif self.runtime != "eager":
+            raise ValueError(f"Unsupported inference runtime: {self.runtime}")
+
+        model = self.get_model()
+
+        def run_eager(batch: torch.Tensor) -> torch.Tensor:
+            output = model(batch.to(self.device))
+            if isinstance(output, (tuple, list)):
+                return output[0]  # hybrid model: (logits, attention_weights, cnn_features)
+            return output
+
+        return run_eager
+
+    def warm_up(self, batch_size: int = 1):
+        """Run a dummy forward pass so the first real request doesn't pay for lazy init"""
+        dummy = torch.zeros(batch_size, 3, 224, 224, device=self.device)
+        with torch.inference_mode():
+            self.get_model()(dummy)
+            if self.runtime != "eager":
+                self.get_inference_fn()(dummy)
+        logger.info(f"{self.model_type} warm-up pass completed")
+
     def get_model_info(self) -> Dict[str, Any]:
         return self.model_info
 
@@ -90,18 +146,22 @@ class ModelLoader:
         logger.info(f"Model metadata saved to {output_path}")
 
 
-# Singleton instance - You may want to support multiple loaders separately if needed
-_model_loader = None
+# One loader per (model type, checkpoint) so alternating model types never reload
+_model_loaders: Dict[tuple, ModelLoader] = {}
+_model_loaders_lock = threading.Lock()
 
 def get_model_loader(
-    model_path="trained_models/mobilenetv2_small_model.pth",
+    model_path=None,
     device=None,
     model_type="mobilenetv2"
 ) -> ModelLoader:
-    global _model_loader
-    if _model_loader is None or _model_loader.model_type != model_type or str(_model_loader.model_path) != model_path:
-        _model_loader = ModelLoader(model_path=model_path, device=device, model_type=model_type)
-    return _model_loader
+    model_type = model_type.lower()
+    model_path = str(model_path or MODEL_CHECKPOINTS[model_type])
+    key = (model_type, model_path)
+    with _model_loaders_lock:
+        if key not in _model_loaders:
+            _model_loaders[key] = ModelLoader(model_path=model_path, device=device, model_type=model_type)
+        return _model_loaders[key]
 
 # # Load Hybrid CNN-ViT
 # loader_hybrid = get_model_loader(
@@ -0,0 +1,112 @@
+"""
+Model Registry
+Keeps every supported classifier resident and gives each one a dedicated
+inference executor, so requests for different model types never evict or
+block each other.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+import torch
+
+from .model_loader import MODEL_CHECKPOINTS, ModelLoader, get_model_loader
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """Loads all models once (in parallel) and serves them from per-model executors"""
+
+    def __init__(self, checkpoints: Optional[Dict[str, str]] = None, device: Optional[str] = None):
+        self.checkpoints = dict(checkpoints or MODEL_CHECKPOINTS)
+        self.device = device or ('cuda' if torch.cuda.is_available() else 'cpu')
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._load_locks = {model_type: threading.Lock() for model_type in self.checkpoints}
+        self._lock = threading.Lock()
+        logger.info(f"ModelRegistry initialized - Device: {self.device}, Models: {list(self.checkpoints)}")
+
+    def get_loader(self, model_type: str) -> ModelLoader:
+        model_type = model_type.lower()
+        if model_type not in self.checkpoints:
+            raise ValueError(f"Unsupported model type: {model_type}")
+        return get_model_loader(
+            model_path=self.checkpoints[model_type],
+            device=self.device,
+            model_type=model_type
+        )
+
+    def load(self, model_type: str) -> torch.nn.Module:
+        """Load one model (no-op if already resident) and run a warm-up pass"""
+        loader = self.get_loader(model_type)
+        with self._load_locks[loader.model_type]:
+            if loader.model is None:
+                loader.load_model()
+                loader.warm_up()
+        return loader.model
+
+    def load_all(self, model_types: Optional[Iterable[str]] = None, required: Iterable[str] = ()):
+        """
+        Load several models concurrently at startup
+
+        Args:
+            model_types: Models to load (defaults to every known checkpoint)
+            required: Models whose failure should abort startup; others only log a warning
+        """
+        model_types = [m.lower() for m in (model_types or self.checkpoints)]
+        required = {m.lower() for m in required}
+
+        with ThreadPoolExecutor(max_workers=len(model_types) or 1, thread_name_prefix="model-load") as pool:
+            futures = {model_type: pool.submit(self.load, model_type) for model_type in model_types}
+
+        for model_type, future in futures.items():
+            error = future.exception()
+            if error is None:
+                logger.info(f"{model_type} resident and warmed up")
+            elif model_type in required:
+                raise error
+            else:
+                logger.warning(f"Could not preload {model_type}: {error}")
+
+    def get_model(self, model_type: str) -> torch.nn.Module:
+        return self.load(model_type)
+
+    def is_loaded(self, model_type: str) -> bool:
+        return self.get_loader(model_type).model is not None
+
+    def get_executor(self, model_type: str) -> ThreadPoolExecutor:
+        """Single-worker executor per model for cold-start loading and Grad-CAM.
+
+        It serializes Grad-CAM calls, which share the GradCAM object's
+        activations/gradients and write the parameters' .grad. Batched forwards run
+        concurrently on the InferenceBatcher thread; that is safe because they run
+        under inference_mode on an eval-mode model (no module state is written), and
+        Grad-CAM hooks only the activation tensor of its own forward pass rather than
+        registering module hooks that other forwards would trigger."""
+        model_type = model_type.lower()
+        with self._lock:
+            if model_type not in self._executors:
+                self._executors[model_type] = ThreadPoolExecutor(
+                    max_workers=1,
+                    thread_name_prefix=f"infer-{model_type}"
+                )
+            return self._executors[model_type]
+
+    def shutdown(self):
+        with self._lock:
+            for executor in self._executors.values():
+                executor.shutdown(wait=False)
+            self._executors.clear()
+
+
+# Global registry instance
+_model_registry = None
+
+def get_model_registry() -> ModelRegistry:
+    """Get singleton model registry"""
+    global _model_registry
+    if _model_registry is None:
+        _model_registry = ModelRegistry()
+    return _model_registry
@@ -0,0 +1,330 @@
+"""
+Optimized CPU Inference Export
+Produces TorchScript or ONNX artefacts (optionally dynamic-int8 quantized,
+channels-last) for SmallMedNet and the hybrid CNN-ViT, validates their
+predictions against the eager model on sample images and benchmarks
+latency/throughput
+
+Usage:
+    python -m app.models.optimized_export --model-type hybrid_cnn_vit --format torchscript --validation-dir data/validation
+    python -m app.models.optimized_export --model-type mobilenetv2 --format onnx --no-quantize
+"""
+
+import argparse
+import copy
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import torch
+import torch.nn as nn
+
+logger = logging.getLogger(__name__)
+
+OPTIMIZED_DIR = Path("trained_models/optimized")
+BENCHMARK_BATCH_SIZES = [1, 2, 4, 8, 16, 32]
+
+# Held-out / sample lesion images (JPEG/PNG, searched recursively) used to validate exports
+VALIDATION_DIR = Path(os.getenv("EXPORT_VALIDATION_DIR", "data/validation"))
+VALIDATION_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+MAX_VALIDATION_IMAGES = 256
+MIN_VALIDATION_IMAGES = 16
+
+# int8 is accepted only if its top-1 class matches the eager float32 model on real images;
+# float32 exports must also reproduce the eager logits
+MIN_TOP1_AGREEMENT = 0.99
+MAX_ABS_LOGIT_DIFF = 0.05
+
+FORMAT_SUFFIX = {"torchscript": ".pt", "onnx": ".onnx"}
+
+
+def artifact_path(model_type: str, fmt: str, quantized: bool, output_dir: Path = OPTIMIZED_DIR) -> Path:
+    precision = "int8" if quantized else "fp32"
+    return Path(output_dir) / f"{model_type}_{precision}{FORMAT_SUFFIX[fmt]}"
+
+
+def find_artifact(model_type: str, fmt: str, output_dir: Path = OPTIMIZED_DIR) -> Optional[Path]:
+    """Return the preferred exported artefact for a model (int8 first), if any"""
+    for quantized in (True, False):
+        path = artifact_path(model_type, fmt, quantized, output_dir)
+        if path.exists():
+            return path
+    return None
+
+
+class LogitsOnly(nn.Module):
+    """Wraps a model so tracing/export sees a single logits output"""
+
+    def __init__(self, model: nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        output = self.model(x)
+        if isinstance(output, (tuple, list)):
+            return output[0]
+        return output
+
+
+def _example_input(batch_size: int = 1) -> torch.Tensor:
+    return torch.randn(batch_size, 3, 224, 224).contiguous(memory_format=torch.channels_last)
+
+
+def prepare_for_cpu(model: nn.Module, quantize: bool) -> nn.Module:
+    """Logits-only, channels-last copy of the model with optional dynamic int8 Linear layers"""
+    wrapped = LogitsOnly(copy.deepcopy(model)).cpu().eval()
+    wrapped = wrapped.to(memory_format=torch.channels_last)
+    if quantize:
+        # Dynamic quantization only touches Linear layers: the ViT/attention/classifier
+        # blocks of the hybrid model, and the classifier head of SmallMedNet
+        wrapped = torch.ao.quantization.quantize_dynamic(wrapped, {nn.Linear}, dtype=torch.qint8)
+    return wrapped
+
+
+def export_torchscript(model: nn.Module, path: Path) -> None:
+    with torch.inference_mode():
+        traced = torch.jit.trace(model, _example_input(), strict=False, check_trace=False)
+        traced = torch.jit.freeze(traced.eval())
+    traced.save(str(path))
+
+
+def export_onnx(model: nn.Module, path: Path, quantize: bool) -> None:
+    fp32_path = path.with_name(path.name.replace("_int8", "_fp32")) if quantize else path
+    torch.onnx.export(
+        model,
+        _example_input(),
+        str(fp32_path),
+        input_names=["input"],
+        output_names=["logits"],
+        dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=17,
+    )
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(str(fp32_path), str(path), weight_type=QuantType.QInt8)
+
+
+def load_inference_fn(path: Path, num_threads: Optional[int] = None) -> Callable[[torch.Tensor], torch.Tensor]:
+    """Load an exported artefact as a batch -> logits callable"""
+    path = Path(path)
+    if path.suffix == ".onnx":
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+
+        def run_onnx(batch: torch.Tensor) -> torch.Tensor:
+            logits = session.run(["logits"], {"input": batch.detach().cpu().contiguous().numpy()})[0]
+            return torch.from_numpy(logits)
+
+        return run_onnx
+
+    module = torch.jit.load(str(path), map_location="cpu").eval()
+
+    def run_torchscript(batch: torch.Tensor) -> torch.Tensor:
+        with torch.inference_mode():
+            return module(batch.cpu().contiguous(memory_format=torch.channels_last))
+
+    return run_torchscript
+
+
+def load_validation_images(
+    directory: Path = VALIDATION_DIR,
+    limit: int = MAX_VALIDATION_IMAGES,
+) -> Optional[torch.Tensor]:
+    """
+    Decode sample images with the serving preprocessing into one [N, 3, 224, 224] batch
+
+    Returns None if the directory is missing or has no usable images.
+    """
+    from ..services.preprocessing_service import get_preprocessing_service
+
+    directory = Path(directory)
+    if not directory.is_dir():
+        return None
+
+    preprocessing = get_preprocessing_service()
+    tensors = []
+    for path in sorted(directory.rglob("*")):
+        if path.suffix.lower() not in VALIDATION_EXTENSIONS:
+            continue
+        try:
+            tensors.append(preprocessing.decode(path.read_bytes()).tensor)
+        except ValueError as e:
+            logger.warning(f"Skipping validation image {path}: {e}")
+            continue
+        if len(tensors) >= limit:
+            break
+    return torch.cat(tensors) if tensors else None
+
+
+def compare_logits(
+    reference: Callable[[torch.Tensor], torch.Tensor],
+    candidate: Callable[[torch.Tensor], torch.Tensor],
+    images: torch.Tensor,
+    batch_size: int = 16,
+) -> Dict[str, float]:
+    """Compare candidate logits and top-1 predictions against the eager reference on images"""
+    max_diff, agree, total = 0.0, 0, 0
+    with torch.inference_mode():
+        for start in range(0, len(images), batch_size):
+            x = images[start:start + batch_size]
+            ref = reference(x)
+            out = candidate(x)
+            max_diff = max(max_diff, (ref - out).abs().max().item())
+            agree += (ref.argmax(dim=1) == out.argmax(dim=1)).sum().item()
+            total += len(x)
+    return {"max_abs_logit_diff": max_diff, "top1_agreement": agree / total, "num_images": total}
+
+
+def benchmark(
+    fn: Callable[[torch.Tensor], torch.Tensor],
+    batch_sizes: List[int] = BENCHMARK_BATCH_SIZES,
+    iterations: int = 10,
+    warmup: int = 2,
+) -> List[Dict[str, float]]:
+    """Measure latency and throughput for each batch size"""
+    results = []
+    with torch.inference_mode():
+        for batch_size in batch_sizes:
+            x = torch.randn(batch_size, 3, 224, 224)
+            for _ in range(warmup):
+                fn(x)
+            start = time.perf_counter()
+            for _ in range(iterations):
+                fn(x)
+            elapsed = (time.perf_counter() - start) / iterations
+            results.append({
+                "batch_size": batch_size,
+                "latency_ms": round(elapsed * 1000, 2),
+                "images_per_sec": round(batch_size / elapsed, 1),
+            })
+    return results
+
+
+def export_optimized(
+    model_type: str,
+    fmt: str = "torchscript",
+    quantize: bool = True,
+    output_dir: Path = OPTIMIZED_DIR,
+    run_benchmark: bool = True,
+    validation_dir: Path = VALIDATION_DIR,
+) -> Dict[str, Any]:
+    """
+    Export, validate and benchmark an optimized artefact for one model type
+
+    The int8 artefact is kept only if validation_dir holds at least
+    MIN_VALIDATION_IMAGES images and its top-1 predictions on them agree with the
+    eager model at MIN_TOP1_AGREEMENT; otherwise it is discarded and a float32
+    artefact is exported instead. Without sample images the float32 export is
+    checked on random inputs, which only shows that it reproduces the eager logits.
+    A float32 artefact that fails its check is deleted and RuntimeError is raised.
+    """
+    from .model_loader import get_model_loader
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    eager_model = get_model_loader(model_type=model_type, device="cpu").get_model()
+    reference = LogitsOnly(eager_model).eval()
+
+    report: Dict[str, Any] = {"model_type": model_type, "format": fmt}
+
+    images = load_validation_images(validation_dir)
+    have_images = images is not None and len(images) >= MIN_VALIDATION_IMAGES
+    if not have_images:
+        logger.warning(
+            f"Only {0 if images is None else len(images)} validation images in {validation_dir} "
+            f"(need {MIN_VALIDATION_IMAGES}); int8 will not be exported"
+        )
+        images = torch.randn(64, 3, 224, 224, generator=torch.Generator().manual_seed(0))
+
+    try_int8 = quantize and have_images
+    if not try_int8:
+        # an int8 artefact from an earlier run would otherwise still be preferred by ModelLoader
+        artifact_path(model_type, fmt, True, output_dir).unlink(missing_ok=True)
+
+    for use_int8 in ([True, False] if try_int8 else [False]):
+        path = artifact_path(model_type, fmt, use_int8, output_dir)
+        if fmt == "onnx":
+            # ONNX can't export torch-quantized modules; onnxruntime quantizes the fp32 graph instead
+            export_onnx(prepare_for_cpu(eager_model, quantize=False), path, use_int8)
+        else:
+            export_torchscript(prepare_for_cpu(eager_model, quantize=use_int8), path)
+
+        candidate = load_inference_fn(path)
+        validation = compare_logits(reference, candidate, images)
+        validation["inputs"] = "images" if have_images else "random"
+        passed = (validation["top1_agreement"] >= MIN_TOP1_AGREEMENT
+                  and (use_int8 or validation["max_abs_logit_diff"] <= MAX_ABS_LOGIT_DIFF))
+        logger.info(f"{path.name}: {validation} -> {'accepted' if passed else 'rejected'}")
+
+        if passed:
+            report.update({
+                "artifact": str(path),
+                "quantized": use_int8,
+                "validation": validation,
+                "validation_passed": passed,
+            })
+            break
+
+        # drifted too far: drop it so ModelLoader doesn't pick it up
+        path.unlink(missing_ok=True)
+        if not use_int8:
+            raise RuntimeError(f"{path.name} does not match the eager model ({validation}); nothing exported")
+
+    if run_benchmark:
+        report["benchmark"] = {
+            "eager": benchmark(lambda x: reference(x)),
+            "optimized": benchmark(load_inference_fn(Path(report["artifact"]))),
+        }
+
+    report_path = output_dir / f"{model_type}_{fmt}_report.json"
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Export report saved to {report_path}")
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export optimized CPU inference artefacts")
+    parser.add_argument("--model-type", choices=["mobilenetv2", "hybrid_cnn_vit"], default="mobilenetv2")
+    parser.add_argument("--format", choices=["torchscript", "onnx"], default="torchscript")
+    parser.add_argument("--no-quantize", action="store_true", help="Export float32 only")
+    parser.add_argument("--no-benchmark", action="store_true")
+    parser.add_argument("--output-dir", default=str(OPTIMIZED_DIR))
+    parser.add_argument("--validation-dir", default=str(VALIDATION_DIR),
+                        help="Sample/held-out images the int8 artefact must agree on")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        report = export_optimized(
+            args.model_type,
+            fmt=args.format,
+            quantize=not args.no_quantize,
+            output_dir=Path(args.output_dir),
+            run_benchmark=not args.no_benchmark,
+            validation_dir=Path(args.validation_dir),
+        )
+    except RuntimeError as e:
+        logger.error(str(e))
+        raise SystemExit(1)
+
+    print(f"Artefact: {report['artifact']} (int8={report['quantized']})")
+    print(f"Validation: {report['validation']}")
+    for name, rows in report.get("benchmark", {}).items():
+        print(f"\n{name}")
+        print(f"{'batch':>6} {'latency_ms':>12} {'images/s':>10}")
+        for row in rows:
+            print(f"{row['batch_size']:>6} {row['latency_ms']:>12} {row['images_per_sec']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,12 @@ from .medical_image_service import get_medical_image_service
 from .prediction_service import get_prediction_service
 from .preprocessing_service import get_preprocessing_service
 from .gradcam_service import get_gradcam_service
+from .prediction_cache import get_prediction_cache
 
 __all__ = [
     'get_medical_image_service',
     'get_prediction_service',
     'get_preprocessing_service',
     'get_gradcam_service',
+    'get_prediction_cache',
 ]
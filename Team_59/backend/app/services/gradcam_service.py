@@ -36,7 +36,6 @@ class GradCAMService:
             # Normalize heatmap to [0,1] for full contrast
             heatmap = cv2.normalize(heatmap, None, 0, 1, cv2.NORM_MINMAX)
             logger.info(f"Generated and normalized heatmap for class {target_class}")
-            print("DEBUG heatmap shape:", heatmap.shape, "min/max:", heatmap.min(), heatmap.max())
             return heatmap
         except Exception as e:
             logger.error(f"Heatmap generation failed: {e}")
@@ -44,19 +43,20 @@ class GradCAMService:
 
     def create_overlay(
         self,
-        original_image: Image.Image,
+        image: Image.Image,
         heatmap: np.ndarray,
         alpha: float = 0.75,  # Increased default for more visible GradCAM
         colormap: int = cv2.COLORMAP_JET
     ) -> Tuple[Image.Image, Image.Image]:
         """
-        Create heatmap overlay on original image
+        Create heatmap overlay on the image
+
+        Pass the already-resized 224x224 image from the decode step to skip resizing.
         """
         try:
-            # Resize original image to 224x224 with bilinear interpolation
-            img_resized = original_image.resize((224, 224), Image.BILINEAR)
-            img_array = np.array(img_resized)
-            print("DEBUG img_array shape:", img_array.shape, "dtype:", img_array.dtype, "min/max:", img_array.min(), img_array.max())
+            if image.size != (224, 224):
+                image = image.resize((224, 224), Image.BILINEAR)
+            img_array = np.asarray(image)
 
             # Convert normalized heatmap to [0,255] uint8
             heatmap_uint8 = np.uint8(255 * heatmap)
@@ -64,19 +64,12 @@ class GradCAMService:
             heatmap_colored = cv2.cvtColor(heatmap_colored, cv2.COLOR_BGR2RGB)
 
             # Sharper Grad-CAM overlay
-            superimposed = (
-                alpha * heatmap_colored + (1 - alpha) * img_array
-            ).astype(np.uint8)
+            superimposed = cv2.addWeighted(heatmap_colored, alpha, img_array, 1 - alpha, 0)
 
             # Convert both images to PIL format
             heatmap_img = Image.fromarray(heatmap_colored)
             superimposed_img = Image.fromarray(superimposed)
 
-            # Save images for manual debug (delete later in prod)
-            heatmap_img.save("debug_heatmap.png")
-            superimposed_img.save("debug_superimposed.png")
-            print("Saved debug PNGs. Image sizes:", heatmap_img.size, superimposed_img.size)
-
             logger.info("Overlay created successfully")
 
             return heatmap_img, superimposed_img
@@ -84,28 +77,31 @@ class GradCAMService:
             logger.error(f"Overlay creation failed: {e}")
             raise
 
-    def image_to_base64(self, image: Image.Image) -> str:
+    def image_to_base64(self, image: Image.Image, image_format: str = "PNG") -> str:
         """
-        Convert PIL image to base64 string
+        Encode PIL image in memory as a base64 data URI (PNG or WEBP)
         """
         try:
+            image_format = image_format.upper()
             buffer = io.BytesIO()
-            image.save(buffer, format='PNG')
-            img_bytes = buffer.getvalue()
-            print("DEBUG encoded PNG size:", len(img_bytes), "First bytes:", img_bytes[:20])
-            base64_str = base64.b64encode(img_bytes).decode('utf-8')
-            return f"data:image/png;base64,{base64_str}"
+            if image_format == "WEBP":
+                image.save(buffer, format="WEBP", quality=85, method=4)
+            else:
+                image.save(buffer, format="PNG", compress_level=1)
+            base64_str = base64.b64encode(buffer.getvalue()).decode('utf-8')
+            return f"data:image/{image_format.lower()};base64,{base64_str}"
         except Exception as e:
             logger.error(f"Base64 encoding failed: {e}")
             raise
 
     def generate_explanation(
         self,
-        original_image: Image.Image,
+        image: Image.Image,
         image_tensor: torch.Tensor,
         predicted_class: int,
         confidence: float,
-        class_names: list
+        class_names: list,
+        image_format: str = "PNG"
     ) -> dict:
         """
         Generate complete explanation package
@@ -116,13 +112,13 @@ class GradCAMService:
 
             # Create overlays
             heatmap_img, superimposed_img = self.create_overlay(
-                original_image,
+                image,
                 heatmap
             )
 
-            # Convert both images to base64
-            heatmap_b64 = self.image_to_base64(heatmap_img)
-            superimposed_b64 = self.image_to_base64(superimposed_img)
+            # Encode both images in memory
+            heatmap_b64 = self.image_to_base64(heatmap_img, image_format)
+            superimposed_b64 = self.image_to_base64(superimposed_img, image_format)
 
             # Generate textual explanation
             explanation_text = self._generate_explanation_text(
@@ -177,12 +173,12 @@ class GradCAMService:
         return explanation
 
 
-# Global service instance
-_gradcam_service = None
+# One service per model instance
+_gradcam_services = {}
 
 def get_gradcam_service(model: torch.nn.Module) -> GradCAMService:
-    """Get or create GradCAM service"""
-    global _gradcam_service
-    if _gradcam_service is None:
-        _gradcam_service = GradCAMService(model)
-    return _gradcam_service
+    """Get or create GradCAM service for the given model"""
+    key = id(model)
+    if key not in _gradcam_services:
+        _gradcam_services[key] = GradCAMService(model)
+    return _gradcam_services[key]
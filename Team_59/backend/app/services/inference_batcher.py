@@ -0,0 +1,94 @@
+"""
+Dynamic Batching for Model Inference
+Collects concurrent single-image requests into one stacked tensor so the
+model runs a single forward pass per micro-batch
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Tuple
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+class InferenceBatcher:
+    """
+    Micro-batching queue in front of a model
+
+    Items are queued as [1, C, H, W] tensors. A worker thread takes the first
+    waiting item, keeps collecting until max_batch_size items are queued or
+    max_wait_ms has passed, runs one forward pass and resolves each item's
+    future with its own row of the output.
+    """
+
+    def __init__(
+        self,
+        forward_fn: Callable[[torch.Tensor], torch.Tensor],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+        name: str = "model"
+    ):
+        """
+        Args:
+            forward_fn: Maps a [B, C, H, W] batch to [B, num_classes] logits
+            max_batch_size: Upper bound on items per forward pass
+            max_wait_ms: How long to wait for more items after the first arrives
+            name: Used for the worker thread name and logs
+        """
+        self.forward_fn = forward_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self._queue: "queue.Queue[Tuple[torch.Tensor, Future]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name=f"batcher-{name}", daemon=True)
+        self._worker.start()
+        logger.info(f"InferenceBatcher[{name}] started (max_batch_size={max_batch_size}, max_wait_ms={max_wait_ms})")
+
+    def submit(self, image_tensor: torch.Tensor) -> Future:
+        """Queue one [1, C, H, W] tensor; the future resolves to its [num_classes] logits"""
+        future: Future = Future()
+        self._queue.put((image_tensor, future))
+        return future
+
+    def _collect(self) -> List[Tuple[torch.Tensor, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Drop items whose caller already gave up (e.g. client disconnected)
+            batch = [(tensor, future) for tensor, future in self._collect()
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            tensors = [tensor for tensor, _ in batch]
+            futures = [future for _, future in batch]
+
+            try:
+                stacked = torch.cat(tensors, dim=0)
+                with torch.inference_mode():
+                    logits = self.forward_fn(stacked)
+                logits = logits.detach().cpu()
+            except Exception as e:
+                logger.error(f"Batched inference failed for {len(batch)} items: {e}")
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            for i, future in enumerate(futures):
+                future.set_result(logits[i])
+
+            logger.debug(f"InferenceBatcher[{self.name}] ran batch of {len(batch)}")
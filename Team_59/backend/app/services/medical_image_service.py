@@ -109,7 +109,8 @@ class MedicalImageService:
                     'preprocessing': 'active',
                     'gradcam': 'active'
                 },
-                'model_info': model_info
+                'model_info': model_info,
+                'prediction_cache': self.prediction_service.cache.stats()
             }
             
             return status
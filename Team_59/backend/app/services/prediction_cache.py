@@ -0,0 +1,83 @@
+"""
+Prediction Cache
+LRU cache of prediction responses keyed by image content hash and model type,
+so re-submitting the same X-ray returns instantly
+"""
+
+import copy
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Response fields that only exist when a Grad-CAM explanation was generated
+EXPLANATION_KEYS = ('heatmap', 'superimposed', 'explanation', 'predicted_class')
+
+class PredictionCache:
+    """Thread-safe, size-bounded LRU cache of prediction responses"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        logger.info(f"PredictionCache initialized (max_entries={max_entries})")
+
+    @staticmethod
+    def image_key(image_bytes: bytes) -> str:
+        return hashlib.sha256(image_bytes).hexdigest()
+
+    def get(self, image_hash: str, model_type: str, need_explanation: bool) -> Optional[Dict[str, Any]]:
+        """
+        Return a copy of the cached response, or None
+
+        A cached response without an explanation can't serve a request that
+        wants one; a cached explanation is stripped for requests that don't.
+        """
+        key = (image_hash, model_type)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (need_explanation and 'heatmap' not in entry):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        response = copy.copy(entry)
+        if not need_explanation:
+            for field in EXPLANATION_KEYS:
+                response.pop(field, None)
+        return response
+
+    def put(self, image_hash: str, model_type: str, response: Dict[str, Any]):
+        key = (image_hash, model_type)
+        with self._lock:
+            existing = self._entries.get(key)
+            # Never replace an entry that has an explanation with one that doesn't
+            if existing is not None and 'heatmap' in existing and 'heatmap' not in response:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = copy.copy(response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# Global cache instance
+_prediction_cache = None
+
+def get_prediction_cache() -> PredictionCache:
+    """Get singleton prediction cache"""
+    global _prediction_cache
+    if _prediction_cache is None:
+        _prediction_cache = PredictionCache(max_entries=int(os.getenv("PREDICTION_CACHE_SIZE", "256")))
+    return _prediction_cache
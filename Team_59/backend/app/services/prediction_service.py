@@ -1,16 +1,30 @@
 import torch
 import torch.nn.functional as F
 from typing import Dict, Any, List
+import asyncio
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 import time
 
-from ..models.model_loader import get_model_loader
+from ..models.model_registry import get_model_registry
 from .preprocessing_service import get_preprocessing_service
 from .gradcam_service import get_gradcam_service
+from .inference_batcher import InferenceBatcher
+from .prediction_cache import get_prediction_cache
 
 logger = logging.getLogger(__name__)
 
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "16"))
+MAX_BATCH_WAIT_MS = float(os.getenv("MAX_BATCH_WAIT_MS", "10"))
+
+# Shared pool for decoding/validating uploads in parallel, off the event loop
+_decode_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DECODE_WORKERS", str(min(8, os.cpu_count() or 1)))),
+    thread_name_prefix="image-decode"
+)
+
 class PredictionService:
     def __init__(self, model_type: str = "mobilenetv2"):
         """
@@ -21,78 +35,91 @@ class PredictionService:
         """
         self.model_type = model_type.lower()
         self.class_names = ['Normal', 'Pneumonia']  # Update if your classes differ
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        self.model_loader = None
+        self.registry = get_model_registry()
+        self.device = torch.device(self.registry.device)
+        self.model_loader = self.registry.get_loader(self.model_type)
+        self.executor = self.registry.get_executor(self.model_type)
         self.model = None
         self.gradcam_service = None
         self.preprocessing_service = get_preprocessing_service()
+        self.cache = get_prediction_cache()
+        self.batcher = InferenceBatcher(
+            self._forward_batch,
+            max_batch_size=MAX_BATCH_SIZE,
+            max_wait_ms=MAX_BATCH_WAIT_MS,
+            name=self.model_type
+        )
         logger.info(f"PredictionService initialized on {self.device} with model type {self.model_type}")
 
     def load_model(self):
-        if self.model_loader is None or self.model_loader.model_type != self.model_type:
-            # Define appropriate checkpoint path per model type
-            if self.model_type == "hybrid_cnn_vit":
-                checkpoint_path = "trained_models/enhanced_hybrid_model.pth"
-            elif self.model_type == "mobilenetv2":
-                checkpoint_path = "trained_models/mobilenetv2_small_model.pth"
-            else:
-                raise ValueError(f"Unsupported model type: {self.model_type}")
-
-            self.model_loader = get_model_loader(
-                model_path=checkpoint_path,
-                device=str(self.device),
-                model_type=self.model_type
-            )
-            self.model = self.model_loader.get_model()
+        if self.model is None:
+            self.model = self.registry.get_model(self.model_type)
             if self.model_type == "hybrid_cnn_vit":
                 self.gradcam_service = get_gradcam_service(self.model)
             else:
                 self.gradcam_service = None  # Not implemented for MobileNetV2 yet
             logger.info("Model and auxiliary services loaded")
 
-    async def predict_from_bytes(self, image_bytes: bytes, generate_explanation: bool = True) -> Dict[str, Any]:
-        start_time = time.time()
-        self.load_model()
-
-        if not self.preprocessing_service.validate_image(image_bytes):
-            raise ValueError("Invalid image format or content")
-
-        original_image, resized_image = self.preprocessing_service.load_image_from_bytes(image_bytes)
-        image_tensor = self.preprocessing_service.preprocess_for_model(resized_image)
-        image_tensor = image_tensor.to(self.device)
+    async def ensure_loaded(self):
+        """Load the model on its executor on a cold start, never on the event loop"""
+        if self.model is None:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.load_model)
 
-        with torch.no_grad():
-            if self.model_type == "hybrid_cnn_vit":
-                logits, attention_weights, _ = self.model(image_tensor)
-            else:  # MobileNetV2 returns only logits
-                logits = self.model(image_tensor)
-                attention_weights = None
+    def _forward_batch(self, batch: torch.Tensor) -> torch.Tensor:
+        """Run one stacked batch through the model and return its logits"""
+        self.load_model()
+        return self.model_loader.get_inference_fn()(batch)
 
-            probabilities = F.softmax(logits, dim=1)
-            predicted_class = torch.argmax(probabilities, dim=1).item()
-            confidence = probabilities[0, predicted_class].item()
+    async def predict_from_bytes(self, image_bytes: bytes, generate_explanation: bool = True) -> Dict[str, Any]:
+        start_time = time.time()
+        loop = asyncio.get_running_loop()
+        await self.ensure_loaded()
+
+        # Same image + model type already answered: serve it from the LRU cache
+        image_hash = self.cache.image_key(image_bytes)
+        want_explanation = generate_explanation and self.gradcam_service is not None
+        cached = self.cache.get(image_hash, self.model_type, want_explanation)
+        if cached is not None:
+            cached['cached'] = True
+            cached['inference_time_ms'] = round((time.time() - start_time) * 1000, 2)
+            logger.info(f"Prediction cache hit: {cached['class_name']} ({self.model_type})")
+            return cached
+
+        # Decode once in parallel threads, then join the model's micro-batch queue
+        decoded = await loop.run_in_executor(_decode_pool, self.preprocessing_service.decode, image_bytes)
+        logits = await asyncio.wrap_future(self.batcher.submit(decoded.tensor))
+
+        probabilities = F.softmax(logits, dim=0)
+        predicted_class = torch.argmax(probabilities).item()
+        confidence = probabilities[predicted_class].item()
 
         response = {
             'success': True,
             'prediction': int(predicted_class),
             'class_name': self.class_names[predicted_class],
             'confidence': float(confidence),
-            'probabilities': {name: float(prob) for name, prob in zip(self.class_names, probabilities[0].cpu().tolist())},
+            'probabilities': {name: float(prob) for name, prob in zip(self.class_names, probabilities.tolist())},
             'inference_time_ms': 0
         }
 
-        if generate_explanation and self.gradcam_service and attention_weights is not None:
-            explanation_data = self.gradcam_service.generate_explanation(
-                original_image,
-                image_tensor,
+        # Grad-CAM needs its own forward/backward, so only pay for it when asked
+        if want_explanation:
+            explanation_data = await loop.run_in_executor(
+                self.executor,
+                self.gradcam_service.generate_explanation,
+                decoded.resized,
+                decoded.tensor.to(self.device),
                 predicted_class,
                 confidence,
                 self.class_names
             )
             response.update(explanation_data)
 
+        self.cache.put(image_hash, self.model_type, response)
+
         total_time = (time.time() - start_time) * 1000
         response['inference_time_ms'] = round(total_time, 2)
+        response['cached'] = False
 
         logger.info(f"Prediction: {response['class_name']} ({confidence*100:.1f}%) in {total_time:.0f} ms")
         return response
@@ -113,29 +140,36 @@ class PredictionService:
 
         return {
             'model_type': self.model_type,
+            'runtime': self.model_loader.runtime,
             'architecture': architecture,
             'training_info': model_info,
             'classes': self.class_names,
             'device': str(self.device)
         }
 
-    def batch_predict(self, image_bytes_list: List[bytes], generate_explanations: bool = False) -> List[Dict[str, Any]]:
+    async def batch_predict(self, image_bytes_list: List[bytes], generate_explanations: bool = False) -> List[Dict[str, Any]]:
+        # All items enter the batch queue together, so they share forward passes
+        outcomes = await asyncio.gather(
+            *(self.predict_from_bytes(image_bytes, generate_explanations) for image_bytes in image_bytes_list),
+            return_exceptions=True
+        )
+
         results = []
-        for i, image_bytes in enumerate(image_bytes_list):
-            try:
-                result = torch.run(self.predict_from_bytes(image_bytes, generate_explanations))
-                results.append(result)
-                logger.info(f"Batch prediction {i+1}/{len(image_bytes_list)} completed")
-            except Exception as e:
-                logger.error(f"Batch prediction {i+1} failed: {e}")
-                results.append({'success': False, 'error': str(e)})
+        for i, outcome in enumerate(outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Batch prediction {i+1} failed: {outcome}")
+                results.append({'success': False, 'error': str(outcome)})
+            else:
+                results.append(outcome)
+        logger.info(f"Batch prediction completed for {len(image_bytes_list)} images")
         return results
 
 
-_prediction_service = None
+# One service per model type; the underlying models are shared via the registry
+_prediction_services: Dict[str, PredictionService] = {}
 
 def get_prediction_service(model_type: str = "mobilenetv2") -> PredictionService:
-    global _prediction_service
-    if _prediction_service is None or _prediction_service.model_type != model_type:
-        _prediction_service = PredictionService(model_type=model_type)
-    return _prediction_service
+    model_type = model_type.lower()
+    if model_type not in _prediction_services:
+        _prediction_services[model_type] = PredictionService(model_type=model_type)
+    return _prediction_services[model_type]
@@ -9,11 +9,19 @@ from PIL import Image
 import io
 import cv2
 from torchvision import transforms
-from typing import Union, Tuple, Optional
+from typing import Union, Optional, NamedTuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+MODEL_INPUT_SIZE = (224, 224)
+
+class DecodedImage(NamedTuple):
+    """Everything downstream needs from one upload, produced by a single decode"""
+    original: Image.Image   # RGB at source resolution
+    resized: Image.Image    # RGB at MODEL_INPUT_SIZE (also used for Grad-CAM overlays)
+    tensor: torch.Tensor    # Normalized model input [1, 3, 224, 224]
+
 class ImagePreprocessingService:
     """Handles preprocessing of medical images for model inference"""
     
@@ -35,73 +43,56 @@ class ImagePreprocessingService:
             transforms.ToTensor()
         ])
         
+        # Normalization only, for images that are already resized
+        self.normalize = transforms.Compose([
+            transforms.ToTensor(),
+            transforms.Normalize(
+                mean=[0.485, 0.456, 0.406],
+                std=[0.229, 0.224, 0.225]
+            )
+        ])
+        
         logger.info("ImagePreprocessingService initialized")
     
-    def validate_image(self, image_bytes: bytes) -> bool:
+    def decode(self, image_bytes: bytes) -> DecodedImage:
         """
-        Validate image format and content
+        Validate and decode image bytes once
         
         Args:
             image_bytes: Raw image bytes
             
         Returns:
-            bool: True if valid
+            DecodedImage: original image, 224x224 image and normalized tensor
+            
+        Raises:
+            ValueError: If the image is unsupported, too small or corrupted
         """
         try:
             img = Image.open(io.BytesIO(image_bytes))
             
-            # Check format
             if img.format not in ['JPEG', 'PNG', 'JPG']:
-                logger.warning(f"Unsupported format: {img.format}")
-                return False
+                raise ValueError(f"Unsupported format: {img.format}")
             
-            # Check size
             if img.size[0] < 50 or img.size[1] < 50:
-                logger.warning(f"Image too small: {img.size}")
-                return False
+                raise ValueError(f"Image too small: {img.size}")
             
-            # Check if corrupted
-            img.verify()
+            # Full decode; raises on truncated/corrupted data
+            img.load()
             
-            return True
-            
-        except Exception as e:
-            logger.error(f"Image validation failed: {e}")
-            return False
-    
-    def load_image_from_bytes(
-        self, 
-        image_bytes: bytes
-    ) -> Tuple[Image.Image, Image.Image]:
-        """
-        Load image from bytes
-        
-        Args:
-            image_bytes: Raw image bytes
-            
-        Returns:
-            tuple: (original_image, resized_image)
-        """
-        try:
-            # Load image
-            img = Image.open(io.BytesIO(image_bytes))
-            
-            # Convert to RGB if needed
             if img.mode != 'RGB':
                 img = img.convert('RGB')
             
-            # Keep original
-            original = img.copy()
-            
-            # Resize for processing
-            resized = img.resize((224, 224), Image.BILINEAR)
+            resized = img.resize(MODEL_INPUT_SIZE, Image.BILINEAR)
+            tensor = self.normalize(resized).unsqueeze(0)
             
-            logger.info(f"Image loaded: {original.size} -> {resized.size}")
+            logger.info(f"Image decoded: {img.size} -> {resized.size}")
             
-            return original, resized
+            return DecodedImage(img, resized, tensor)
             
+        except ValueError:
+            raise
         except Exception as e:
-            logger.error(f"Failed to load image: {e}")
+            logger.error(f"Image decode failed: {e}")
             raise ValueError(f"Invalid image data: {e}")
     
     def preprocess_for_model(
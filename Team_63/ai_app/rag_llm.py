@@ -1,8 +1,12 @@
 import os
 import json
-import voyageai
-from pinecone import Pinecone
-from openai import OpenAI
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
 
 # ---------------------------
 # CONFIG (FROM AZURE ENV VARS)
@@ -20,66 +24,71 @@ HF_MODEL = os.environ.get("HF_MODEL", "ganeshaMD/roadmap-ai")
 
 TOP_K = int(os.environ.get("TOP_K", 5))
 
+# Answer cache: near-identical questions (cosine >= threshold) reuse an earlier answer
+RAG_CACHE_THRESHOLD = float(os.environ.get("RAG_CACHE_THRESHOLD", 0.95))
+RAG_CACHE_TTL = int(os.environ.get("RAG_CACHE_TTL", 6 * 60 * 60))
+RAG_CACHE_SIZE = int(os.environ.get("RAG_CACHE_SIZE", 1000))
+EMBEDDING_CACHE_SIZE = int(os.environ.get("EMBEDDING_CACHE_SIZE", 5000))
+RETRIEVAL_CACHE_TTL = int(os.environ.get("RETRIEVAL_CACHE_TTL", 24 * 60 * 60))
+
 
 # ---------------------------
-# VALIDATION (OPTIONAL BUT SAFE)
+# CLIENT INTERFACES
 # ---------------------------
 
-if not all([
-    PINECONE_API_KEY,
-    PINECONE_INDEX_HOST,
-    VOYAGE_API_KEY,
-    HF_API_KEY,
-    HF_BASE_URL
-]):
-    raise RuntimeError("❌ One or more required environment variables are missing")
+class Embedder:
+    """Turns a query into a vector."""
 
+    def embed(self, text: str):
+        raise NotImplementedError
 
-# ---------------------------
-# INIT CLIENTS
-# ---------------------------
 
-pc = Pinecone(api_key=PINECONE_API_KEY)
-index = pc.Index(host=PINECONE_INDEX_HOST)
+class VectorIndex:
+    """Returns the text of the top_k matches for a vector."""
+
+    def query(self, vector, top_k: int):
+        raise NotImplementedError
 
-vo = voyageai.Client(api_key=VOYAGE_API_KEY)
 
-hf_client = OpenAI(
-    base_url=HF_BASE_URL,
-    api_key=HF_API_KEY
-)
+class LLM:
+    """Generates an answer for a prompt, whole or as a stream of text pieces."""
+
+    def generate(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    def stream(self, prompt: str):
+        yield self.generate(prompt)
 
 
 # ---------------------------
-# EMBEDDING FUNCTION
+# VENDOR CLIENTS
 # ---------------------------
 
-def embed_query(text: str):
-    try:
-        res = vo.embed(
-            model="voyage-3",
+class VoyageEmbedder(Embedder):
+    def __init__(self, api_key, model="voyage-3"):
+        import voyageai
+        self.client = voyageai.Client(api_key=api_key)
+        self.model = model
+
+    def embed(self, text: str):
+        res = self.client.embed(
+            model=self.model,
             texts=[text]
         )
         return res.embeddings[0]
-    except Exception as e:
-        print("Embedding error:", e)
-        return None
 
 
-# ---------------------------
-# PINECONE RETRIEVAL
-# ---------------------------
-
-def retrieve_context(query: str):
-    vector = embed_query(query)
-    if vector is None:
-        return []
+class PineconeIndex(VectorIndex):
+    def __init__(self, api_key, host, namespace):
+        from pinecone import Pinecone
+        self.index = Pinecone(api_key=api_key).Index(host=host)
+        self.namespace = namespace
 
-    try:
-        results = index.query(
+    def query(self, vector, top_k: int):
+        results = self.index.query(
             vector=vector,
-            top_k=TOP_K,
-            namespace=PINECONE_NAMESPACE,
+            top_k=top_k,
+            namespace=self.namespace,
             include_metadata=True
         )
 
@@ -92,9 +101,196 @@ def retrieve_context(query: str):
 
         return contexts
 
-    except Exception as e:
-        print("Pinecone Query Error:", e)
-        return []
+
+class HFChatLLM(LLM):
+    """OpenAI-compatible chat endpoint (Hugging Face router); one pooled HTTP client."""
+
+    def __init__(self, api_key, base_url, model):
+        from openai import OpenAI
+        self.client = OpenAI(base_url=base_url, api_key=api_key)
+        self.model = model
+
+    def generate(self, prompt: str) -> str:
+        resp = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return resp.choices[0].message.content
+
+    def stream(self, prompt: str):
+        resp = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True
+        )
+        for chunk in resp:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+# ---------------------------
+# LOCAL FAKES (TESTS / OFFLINE)
+# ---------------------------
+
+class FakeEmbedder(Embedder):
+    """Deterministic bag-of-words hashing embedder."""
+
+    def __init__(self, dim=256):
+        self.dim = dim
+        self.calls = 0
+
+    def embed(self, text: str):
+        self.calls += 1
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            vector[zlib.crc32(token.encode("utf-8")) % self.dim] += 1.0
+        return vector.tolist()
+
+
+class FakeVectorIndex(VectorIndex):
+    def __init__(self, documents=None):
+        self.documents = list(documents or [])
+        self.calls = 0
+
+    def query(self, vector, top_k: int):
+        self.calls += 1
+        return self.documents[:top_k]
+
+
+class FakeLLM(LLM):
+    def __init__(self, reply="Day 1 → Basics"):
+        self.reply = reply
+        self.calls = 0
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        return self.reply
+
+    def stream(self, prompt: str):
+        self.calls += 1
+        for word in self.reply.split(" "):
+            yield word + " "
+
+
+# ---------------------------
+# CACHES
+# ---------------------------
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so trivial variants share cache keys."""
+    query = re.sub(r"[^\w\s+#.]", " ", query.lower())
+    query = re.sub(r"\.(?=\s|$)", " ", query)
+    return " ".join(query.split())
+
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU map with per-entry expiry."""
+
+    def __init__(self, max_entries, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SemanticCache:
+    """
+    Answers keyed by query embedding. A lookup hits when the best cosine
+    similarity to a live entry is >= threshold. Oldest-used entries are
+    evicted past max_entries; entries expire after ttl seconds.
+    """
+
+    def __init__(self, threshold=RAG_CACHE_THRESHOLD, ttl=RAG_CACHE_TTL, max_entries=RAG_CACHE_SIZE):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._keys = []
+        self._vectors = []
+        self._answers = []
+        self._stored_at = []
+        self._last_used = []
+        self._matrix = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _unit(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _drop(self, i):
+        for column in (self._keys, self._vectors, self._answers, self._stored_at, self._last_used):
+            del column[i]
+        self._matrix = None
+
+    def _expire(self, now):
+        for i in range(len(self._keys) - 1, -1, -1):
+            if now - self._stored_at[i] > self.ttl:
+                self._drop(i)
+
+    def get(self, key, vector):
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if key in self._keys:
+                i = self._keys.index(key)
+            elif self._vectors:
+                if self._matrix is None:
+                    self._matrix = np.vstack(self._vectors)
+                scores = self._matrix @ self._unit(vector)
+                i = int(np.argmax(scores))
+                if scores[i] < self.threshold:
+                    self.misses += 1
+                    return None
+            else:
+                self.misses += 1
+                return None
+
+            self._last_used[i] = now
+            self.hits += 1
+            return self._answers[i]
+
+    def put(self, key, vector, answer):
+        now = time.monotonic()
+        with self._lock:
+            if key in self._keys:
+                self._drop(self._keys.index(key))
+            self._keys.append(key)
+            self._vectors.append(self._unit(vector))
+            self._answers.append(answer)
+            self._stored_at.append(now)
+            self._last_used.append(now)
+            self._matrix = None
+            while len(self._keys) > self.max_entries:
+                self._drop(int(np.argmin(self._last_used)))
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._keys), "hits": self.hits, "misses": self.misses}
 
 
 # ---------------------------
@@ -109,10 +305,10 @@ def format_context(context_blocks):
 
 
 # ---------------------------
-# HF LLM GENERATION
+# PROMPT
 # ---------------------------
 
-def generate_answer(query: str, context_text: str):
+def build_prompt(query: str, context_text: str):
 
     prompt = f"""
 You are an expert roadmap generator specializing in creating highly detailed learning plans.
@@ -155,16 +351,136 @@ USER QUESTION:
 Generate the full roadmap:
 """
 
-    try:
-        resp = hf_client.chat.completions.create(
-            model=HF_MODEL,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return resp.choices[0].message.content
+    return prompt
 
-    except Exception as e:
-        print("LLM Error:", e)
-        return "Error generating LLM answer."
+
+# ---------------------------
+# RAG PIPELINE
+# ---------------------------
+
+class RagPipeline:
+    """Embedding -> retrieval -> generation, with a cache in front of each stage."""
+
+    def __init__(self, embedder: Embedder, index: VectorIndex, llm: LLM, top_k=TOP_K,
+                 answer_cache=None, embedding_cache=None, retrieval_cache=None):
+        self.embedder = embedder
+        self.index = index
+        self.llm = llm
+        self.top_k = top_k
+        self.answer_cache = answer_cache or SemanticCache()
+        self.embedding_cache = embedding_cache or TTLCache(EMBEDDING_CACHE_SIZE)
+        self.retrieval_cache = retrieval_cache or TTLCache(EMBEDDING_CACHE_SIZE, ttl=RETRIEVAL_CACHE_TTL)
+
+    def embed_query(self, key: str):
+        vector = self.embedding_cache.get(key)
+        if vector is None:
+            try:
+                vector = self.embedder.embed(key)
+            except Exception as e:
+                print("Embedding error:", e)
+                return None
+            self.embedding_cache.put(key, vector)
+        return vector
+
+    def retrieve_context(self, key: str, vector):
+        if vector is None:
+            return []
+
+        contexts = self.retrieval_cache.get(key)
+        if contexts is None:
+            try:
+                contexts = self.index.query(vector, self.top_k)
+            except Exception as e:
+                print("Pinecone Query Error:", e)
+                return []
+            self.retrieval_cache.put(key, contexts)
+        return contexts
+
+    def _prepare(self, query: str):
+        """Returns (key, vector, cached_answer, prompt); prompt is None on a cache hit."""
+        key = normalize_query(query)
+        vector = self.embed_query(key)
+
+        if vector is not None:
+            cached = self.answer_cache.get(key, vector)
+            if cached is not None:
+                return key, vector, cached, None
+
+        context = format_context(self.retrieve_context(key, vector))
+        return key, vector, None, build_prompt(query, context)
+
+    def answer(self, query: str) -> str:
+        key, vector, cached, prompt = self._prepare(query)
+        if cached is not None:
+            return cached
+
+        try:
+            answer = self.llm.generate(prompt)
+        except Exception as e:
+            print("LLM Error:", e)
+            return "Error generating LLM answer."
+
+        if vector is not None and answer:
+            self.answer_cache.put(key, vector, answer)
+        return answer
+
+    def stream(self, query: str):
+        """Yield the answer in pieces as the LLM produces them (one piece on a cache hit)."""
+        key, vector, cached, prompt = self._prepare(query)
+        if cached is not None:
+            yield cached
+            return
+
+        pieces = []
+        try:
+            for piece in self.llm.stream(prompt):
+                pieces.append(piece)
+                yield piece
+        except Exception as e:
+            print("LLM Error:", e)
+            yield "Error generating LLM answer."
+            return
+
+        answer = "".join(pieces)
+        if vector is not None and answer:
+            self.answer_cache.put(key, vector, answer)
+
+
+# ---------------------------
+# INIT CLIENTS (LAZY)
+# ---------------------------
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_rag_pipeline():
+    """Build the vendor-backed pipeline once; clients are reused across requests."""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            if not all([
+                PINECONE_API_KEY,
+                PINECONE_INDEX_HOST,
+                VOYAGE_API_KEY,
+                HF_API_KEY,
+                HF_BASE_URL
+            ]):
+                raise RuntimeError("❌ One or more required environment variables are missing")
+
+            _pipeline = RagPipeline(
+                embedder=VoyageEmbedder(VOYAGE_API_KEY),
+                index=PineconeIndex(PINECONE_API_KEY, PINECONE_INDEX_HOST, PINECONE_NAMESPACE),
+                llm=HFChatLLM(HF_API_KEY, HF_BASE_URL, HF_MODEL),
+            )
+        return _pipeline
+
+
+def set_rag_pipeline(pipeline):
+    """Swap in another pipeline (e.g. one built from fakes in tests)."""
+    global _pipeline
+    with _pipeline_lock:
+        _pipeline = pipeline
 
 
 # ---------------------------
@@ -173,10 +489,15 @@ Generate the full roadmap:
 
 def rag_answer(query: str):
     try:
-        context_blocks = retrieve_context(query)
-        context = format_context(context_blocks)
-        answer = generate_answer(query, context)
-        return answer
+        return get_rag_pipeline().answer(query)
 
     except Exception as e:
         return f"[RAG SYSTEM ERROR] {e}"
+
+
+def rag_answer_stream(query: str):
+    try:
+        yield from get_rag_pipeline().stream(query)
+
+    except Exception as e:
+        yield f"[RAG SYSTEM ERROR] {e}"
@@ -1,3 +1,85 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from .rag_llm import (
+    FakeEmbedder,
+    FakeLLM,
+    FakeVectorIndex,
+    RagPipeline,
+    SemanticCache,
+    normalize_query,
+)
+
+
+def make_pipeline(**cache_options):
+    return RagPipeline(
+        embedder=FakeEmbedder(),
+        index=FakeVectorIndex(["Python basics", "Django"]),
+        llm=FakeLLM("Day 1 → Python basics"),
+        answer_cache=SemanticCache(**cache_options) if cache_options else None,
+    )
+
+
+class NormalizeQueryTests(SimpleTestCase):
+    def test_collapses_case_punctuation_and_spaces(self):
+        self.assertEqual(normalize_query("  Roadmap for PYTHON?! "), "roadmap for python")
+
+    def test_keeps_language_symbols(self):
+        self.assertEqual(normalize_query("Roadmap for C++ and Node.js."), "roadmap for c++ and node.js")
+
+
+class RagPipelineCacheTests(SimpleTestCase):
+    def test_repeated_question_is_served_from_cache(self):
+        pipeline = make_pipeline()
+
+        first = pipeline.answer("Roadmap for Python")
+        second = pipeline.answer("roadmap for python?")
+
+        self.assertEqual(first, second)
+        self.assertEqual(pipeline.llm.calls, 1)
+
+    def test_different_topic_misses(self):
+        pipeline = make_pipeline()
+
+        pipeline.answer("Roadmap for Python")
+        pipeline.answer("Roadmap for Kubernetes networking")
+
+        self.assertEqual(pipeline.llm.calls, 2)
+
+    def test_embedding_and_retrieval_cached_separately(self):
+        # threshold above 1 disables answer reuse, so only the lower caches help
+        pipeline = make_pipeline(threshold=1.01)
+
+        pipeline.answer("Roadmap for Python")
+        pipeline.answer("Roadmap for Python")
+
+        self.assertEqual(pipeline.llm.calls, 2)
+        self.assertEqual(pipeline.embedder.calls, 1)
+        self.assertEqual(pipeline.index.calls, 1)
+
+    def test_expired_answers_are_regenerated(self):
+        pipeline = make_pipeline(ttl=-1)
+
+        pipeline.answer("Roadmap for Python")
+        pipeline.answer("Roadmap for Python")
+
+        self.assertEqual(pipeline.llm.calls, 2)
+
+    def test_cache_is_size_bounded(self):
+        cache = SemanticCache(threshold=0.99, max_entries=2)
+        embedder = FakeEmbedder()
+
+        for topic in ("python", "rust", "golang"):
+            cache.put(topic, embedder.embed(topic), f"answer {topic}")
+
+        self.assertEqual(cache.stats()["entries"], 2)
+        self.assertIsNone(cache.get("python", embedder.embed("python")))
+
+    def test_stream_yields_pieces_and_caches_answer(self):
+        pipeline = make_pipeline()
+
+        streamed = "".join(pipeline.stream("Roadmap for Python"))
+        cached = pipeline.answer("Roadmap for Python")
+
+        self.assertEqual(streamed.strip(), "Day 1 → Python basics")
+        self.assertEqual(cached, streamed)
+        self.assertEqual(pipeline.llm.calls, 1)
@@ -3,7 +3,7 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.models import User
 from django.template.loader import render_to_string
@@ -13,7 +13,7 @@ from django.utils import timezone
 
 from .forms import RegisterForm
 from .models import Chat, UserProfile, GuestSession, Subscription
-from .rag_llm import rag_answer
+from .rag_llm import rag_answer, rag_answer_stream
 
 from django.core.mail import EmailMultiAlternatives
 from email.mime.image import MIMEImage
@@ -208,19 +208,7 @@ def rag_chat_api(request):
     if not query:
         return JsonResponse({"error": "Empty message"}, status=400)
 
-    if request.user.is_authenticated:
-        profile = UserProfile.objects.get(user=request.user)
-        profile.request_count += 1
-        profile.save()
-        user_or_none = request.user
-        session_id = None
-    else:
-        sid = request.session.get("guest_id")
-        guest = GuestSession.objects.get(session_id=sid)
-        guest.request_count += 1
-        guest.save()
-        user_or_none = None
-        session_id = sid
+    user_or_none, session_id = _count_rag_request(request)
 
     answer = rag_answer(query)
 
@@ -234,6 +222,53 @@ def rag_chat_api(request):
     return JsonResponse({"answer": answer})
 
 
+# Streaming RAG API (plain-text chunks as the LLM produces them)
+@csrf_exempt
+def rag_chat_stream_api(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "POST only"}, status=400)
+
+    data = json.loads(request.body.decode("utf-8"))
+    query = data.get("query")
+
+    if not query:
+        return JsonResponse({"error": "Empty message"}, status=400)
+
+    user_or_none, session_id = _count_rag_request(request)
+
+    def stream():
+        pieces = []
+        for piece in rag_answer_stream(query):
+            pieces.append(piece)
+            yield piece
+
+        Chat.objects.create(
+            user=user_or_none,
+            session_id=session_id,
+            message=query,
+            response="".join(pieces)
+        )
+
+    response = StreamingHttpResponse(stream(), content_type="text/plain; charset=utf-8")
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def _count_rag_request(request):
+    """Bump the caller's request counter; returns (user_or_none, session_id)."""
+    if request.user.is_authenticated:
+        profile = UserProfile.objects.get(user=request.user)
+        profile.request_count += 1
+        profile.save()
+        return request.user, None
+
+    sid = request.session.get("guest_id")
+    guest = GuestSession.objects.get(session_id=sid)
+    guest.request_count += 1
+    guest.save()
+    return None, sid
+
+
 # ==============================
 # CHAT: New / Clear
 # ==============================
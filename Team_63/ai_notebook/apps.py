@@ -5,3 +5,6 @@ class AiNotebookConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "ai_notebook"
     verbose_name = "AI Notebook"
+
+    def ready(self):
+        from . import signals  # noqa: F401
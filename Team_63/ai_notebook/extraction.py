@@ -0,0 +1,138 @@
+# ai_notebook/extraction.py — DB-backed background extraction jobs
+import logging
+from concurrent.futures import as_completed
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .extractors import (
+    extract_pdf_pages,
+    extract_text_from_docx,
+    extract_text_from_url,
+    file_sha256,
+    pdf_page_count,
+)
+from .models import ExtractionCache, ExtractionJob, Source
+
+logger = logging.getLogger(__name__)
+
+PAGES_PER_TASK = getattr(settings, "NOTEBOOK_EXTRACTION_PAGES_PER_TASK", 8)
+STALE_JOB_AFTER = timedelta(minutes=getattr(settings, "NOTEBOOK_EXTRACTION_STALE_MINUTES", 30))
+
+
+def enqueue_extraction(source):
+    """Queue a URL/file source for the extraction worker."""
+    return ExtractionJob.objects.create(source=source)
+
+
+def claim_next_job():
+    """Atomically move the oldest queued job to RUNNING; None if the queue is empty."""
+    for job in ExtractionJob.objects.filter(status=ExtractionJob.QUEUED).order_by("created_at")[:10]:
+        claimed = ExtractionJob.objects.filter(pk=job.pk, status=ExtractionJob.QUEUED).update(
+            status=ExtractionJob.RUNNING, started_at=timezone.now()
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def requeue_stale_jobs():
+    """Put back jobs whose worker died mid-run."""
+    return ExtractionJob.objects.filter(
+        status=ExtractionJob.RUNNING,
+        started_at__lt=timezone.now() - STALE_JOB_AFTER,
+    ).update(status=ExtractionJob.QUEUED, pages_done=0)
+
+
+def _update_progress(job, content=None):
+    ExtractionJob.objects.filter(pk=job.pk).update(
+        pages_done=job.pages_done, total_pages=job.total_pages
+    )
+    if content is not None:
+        # queryset update: no post_save, so partial content isn't embedded
+        Source.objects.filter(pk=job.source_id).update(content=content)
+
+
+def _extract_pdf(job, path, pool):
+    job.total_pages = pdf_page_count(path)
+    _update_progress(job)
+
+    futures = [
+        pool.submit(extract_pdf_pages, path, start, min(start + PAGES_PER_TASK, job.total_pages))
+        for start in range(0, job.total_pages, PAGES_PER_TASK)
+    ]
+
+    # Stream pages into Source.content in order as contiguous batches complete
+    done = {}
+    pages = []
+    for future in as_completed(futures):
+        start, texts = future.result()
+        done[start] = texts
+        flushed = False
+        while len(pages) in done:
+            pages.extend(done.pop(len(pages)))
+            flushed = True
+        if flushed:
+            job.pages_done = len(pages)
+            _update_progress(job, "\n".join(pages).strip())
+
+    return "\n".join(pages).strip() or "Could not extract text from PDF."
+
+
+def run_job(job, pool):
+    """Extract one source's text, streaming progress; the final save triggers indexing."""
+    source = job.source
+    try:
+        if source.source_type == Source.URL:
+            job.total_pages = 1
+            content = extract_text_from_url(source.url or "")
+
+        elif source.source_type == Source.FILE and source.file:
+            path = source.file.path
+            job.file_hash = file_sha256(path)
+            ExtractionJob.objects.filter(pk=job.pk).update(file_hash=job.file_hash)
+
+            cached = ExtractionCache.objects.filter(file_hash=job.file_hash).first()
+            lower = path.lower()
+            if cached is not None:
+                job.total_pages = job.total_pages or 1
+                content = cached.content
+            elif lower.endswith(".pdf"):
+                content = _extract_pdf(job, path, pool)
+            elif lower.endswith(".docx"):
+                job.total_pages = 1
+                content = extract_text_from_docx(path)
+            else:
+                job.total_pages = 1
+                content = "Unsupported file format. Upload PDF, DOCX, or TXT."
+
+            if cached is None and lower.endswith((".pdf", ".docx")):
+                ExtractionCache.objects.get_or_create(file_hash=job.file_hash, defaults={"content": content})
+
+        else:
+            job.total_pages = 1
+            content = source.content or ""
+
+        source.content = content
+        source.save(update_fields=["content"])
+
+        job.pages_done = job.total_pages
+        job.status = ExtractionJob.DONE
+
+    except Exception as e:
+        logger.exception("Extraction job %s failed", job.pk)
+        job.status = ExtractionJob.FAILED
+        job.error = str(e)
+        Source.objects.filter(pk=job.source_id).update(content=f"Extraction failed: {e}")
+
+    job.finished_at = timezone.now()
+    ExtractionJob.objects.filter(pk=job.pk).update(
+        status=job.status,
+        pages_done=job.pages_done,
+        total_pages=job.total_pages,
+        error=job.error,
+        finished_at=job.finished_at,
+    )
+    return job
@@ -0,0 +1,68 @@
+# ai_notebook/extractors.py — plain text extractors (no Django imports, safe in worker processes)
+import hashlib
+
+import docx
+import pdfplumber
+import requests
+from bs4 import BeautifulSoup
+from PyPDF2 import PdfReader
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def pdf_page_count(path):
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def extract_pdf_pages(path, start, end):
+    """
+    Extract pages [start, end) of a PDF. Runs in a worker process.
+    Pages pdfplumber can't read fall back to PyPDF2 for that page only.
+    """
+    texts = []
+    reader = None
+    with pdfplumber.open(path) as pdf:
+        for i in range(start, end):
+            text = pdf.pages[i].extract_text() or ""
+            if not text.strip():
+                if reader is None:
+                    reader = PdfReader(path)
+                text = reader.pages[i].extract_text() or ""
+            texts.append(text)
+    return start, texts
+
+
+def extract_text_from_docx(path):
+    d = docx.Document(path)
+    text = "\n".join(p.text for p in d.paragraphs)
+    return text.strip() or "Could not extract text from DOCX."
+
+
+def extract_text_from_txt(file_field):
+    try:
+        file_field.open("rb")
+        data = file_field.read()
+        file_field.close()
+        return data.decode("utf-8", errors="ignore") or "File was empty."
+    except Exception as e:
+        return f"TXT extraction failed: {e}"
+
+
+def extract_text_from_url(url):
+    res = requests.get(url, timeout=10)
+    res.raise_for_status()
+
+    soup = BeautifulSoup(res.text, "html.parser")
+    for tag in soup(["script", "style"]):
+        tag.decompose()
+
+    text = soup.get_text("\n")
+    cleaned = "\n".join(line.strip() for line in text.splitlines() if line.strip())
+    return cleaned[:50000] or "No readable text found."
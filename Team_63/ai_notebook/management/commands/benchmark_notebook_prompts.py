@@ -0,0 +1,133 @@
+# ai_notebook/management/commands/benchmark_notebook_prompts.py
+"""
+Compare prompt size and latency of the full-source prompt against the
+retrieval + token-budgeted history prompt as notebooks grow.
+
+    python manage.py benchmark_notebook_prompts --sizes 1 5 10 25 50
+    python manage.py benchmark_notebook_prompts --live   # also time Gemini calls
+
+All benchmark data is created inside a transaction and rolled back.
+"""
+import random
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ai_notebook import retrieval, services
+from ai_notebook.models import ChatMessage, Notebook, Source
+
+VOCABULARY = (
+    "java class object interface thread memory garbage collector heap stack jvm "
+    "bytecode compiler exception stream lambda collection map list set generic "
+    "annotation reflection spring hibernate servlet request response database "
+    "index query transaction lock cache network socket http json serialization"
+).split()
+
+
+def synthetic_text(rng, chars):
+    words = []
+    length = 0
+    while length < chars:
+        sentence = " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(8, 20)))
+        words.append(sentence.capitalize() + ".")
+        length += len(sentence) + 2
+        if rng.random() < 0.15:
+            words.append("\n\n")
+    return " ".join(words)
+
+
+class Command(BaseCommand):
+    help = "Benchmark prompt tokens and latency against notebook size"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 10, 25, 50],
+                            help="Number of sources per notebook")
+        parser.add_argument("--source-chars", type=int, default=20000)
+        parser.add_argument("--messages", type=int, default=40,
+                            help="Chat messages already in each notebook")
+        parser.add_argument("--live", action="store_true",
+                            help="Call Gemini for embeddings, summaries and replies")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        live = options["live"]
+
+        if not live:
+            # Offline: local embedder and a truncating stand-in for the summary call
+            retrieval._embedder = retrieval.HashingEmbedder()
+            services.summarize_history = lambda previous, lines: (
+                (previous + "\n" + "\n".join(lines))[-services.SUMMARY_TOKEN_BUDGET * 4:]
+            )
+
+        question = "How does the garbage collector manage heap memory for threads?"
+        rows = []
+
+        with transaction.atomic():
+            owner = get_user_model().objects.create_user(username=f"bench-{uuid.uuid4().hex[:8]}")
+
+            for size in options["sizes"]:
+                notebook = Notebook.objects.create(owner=owner, title=f"Benchmark {size}")
+                for i in range(size):
+                    Source.objects.create(
+                        notebook=notebook, title=f"Source {i}", position=i,
+                        content=synthetic_text(rng, options["source_chars"]),
+                    )
+                ChatMessage.objects.bulk_create([
+                    ChatMessage(
+                        notebook=notebook,
+                        role=ChatMessage.ROLE_USER if m % 2 == 0 else ChatMessage.ROLE_ASSISTANT,
+                        content=synthetic_text(rng, 600),
+                    )
+                    for m in range(options["messages"])
+                ])
+
+                start = time.perf_counter()
+                retrieval.ensure_notebook_ingested(notebook)
+                ingest_s = time.perf_counter() - start
+
+                start = time.perf_counter()
+                full_history = "\n".join(
+                    services._format_message(m) for m in notebook.messages.order_by("created_at")
+                )
+                full_prompt = (f"{services.SYSTEM_PROMPT}\n### Notebook Sources:\n"
+                               f"{services.build_full_sources(notebook)}\n### Conversation History:\n"
+                               f"{full_history}\n### New User Message:\nUser: {question}")
+                full_build_ms = (time.perf_counter() - start) * 1000
+
+                start = time.perf_counter()
+                rag_prompt = services.build_prompt(notebook, question)
+                rag_build_ms = (time.perf_counter() - start) * 1000
+
+                row = {
+                    "sources": size,
+                    "full_tokens": retrieval.estimate_tokens(full_prompt),
+                    "rag_tokens": retrieval.estimate_tokens(rag_prompt),
+                    "full_build_ms": full_build_ms,
+                    "rag_build_ms": rag_build_ms,
+                    "ingest_s": ingest_s,
+                }
+
+                if live:
+                    for name, prompt in (("full", full_prompt), ("rag", rag_prompt)):
+                        start = time.perf_counter()
+                        services.call_gemini(prompt)
+                        row[f"{name}_e2e_s"] = time.perf_counter() - start
+
+                rows.append(row)
+
+            transaction.set_rollback(True)
+
+        header = f"{'sources':>8} {'full_tok':>10} {'rag_tok':>9} {'full_ms':>9} {'rag_ms':>8} {'ingest_s':>9}"
+        if live:
+            header += f" {'full_e2e_s':>11} {'rag_e2e_s':>10}"
+        self.stdout.write(header)
+        for row in rows:
+            line = (f"{row['sources']:>8} {row['full_tokens']:>10} {row['rag_tokens']:>9} "
+                    f"{row['full_build_ms']:>9.1f} {row['rag_build_ms']:>8.1f} {row['ingest_s']:>9.2f}")
+            if live:
+                line += f" {row['full_e2e_s']:>11.2f} {row['rag_e2e_s']:>10.2f}"
+            self.stdout.write(line)
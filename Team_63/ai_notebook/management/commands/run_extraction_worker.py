@@ -0,0 +1,53 @@
+# ai_notebook/management/commands/run_extraction_worker.py
+"""
+Background worker for URL/PDF/DOCX source extraction.
+
+    python manage.py run_extraction_worker --processes 4
+
+Polls the ExtractionJob table and extracts PDF pages in parallel worker
+processes, streaming text into Source.content as pages complete.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ai_notebook.extraction import claim_next_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Process queued source extraction jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=os.cpu_count() or 2,
+                            help="Processes used for parallel PDF page extraction")
+        parser.add_argument("--poll-interval", type=float, default=2.0)
+        parser.add_argument("--once", action="store_true",
+                            help="Drain the queue and exit instead of polling forever")
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s)")
+
+        self.stdout.write(f"Extraction worker started ({options['processes']} processes)")
+
+        with ProcessPoolExecutor(max_workers=options["processes"]) as pool:
+            while True:
+                close_old_connections()
+                job = claim_next_job()
+
+                if job is None:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+
+                start = time.perf_counter()
+                job = run_job(job, pool)
+                self.stdout.write(
+                    f"Job {job.pk} ({job.source.title}): {job.status} "
+                    f"{job.pages_done}/{job.total_pages} pages in {time.perf_counter() - start:.1f}s"
+                )
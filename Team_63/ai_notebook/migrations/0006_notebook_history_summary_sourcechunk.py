@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2025-12-02 10:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_notebook', '0005_alter_source_options_source_position_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notebook',
+            name='history_summary',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='notebook',
+            name='summary_until_id',
+            field=models.PositiveBigIntegerField(default=0, help_text='Messages with id <= this are covered by history_summary.'),
+        ),
+        migrations.CreateModel(
+            name='SourceChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('text', models.TextField()),
+                ('token_count', models.PositiveIntegerField(default=0)),
+                ('embedding', models.BinaryField()),
+                ('embedding_model', models.CharField(max_length=100)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('notebook', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='ai_notebook.notebook')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='ai_notebook.source')),
+            ],
+            options={
+                'ordering': ['source', 'index'],
+                'indexes': [models.Index(fields=['notebook', 'embedding_model'], name='sourcechunk_nb_model_idx')],
+            },
+        ),
+    ]
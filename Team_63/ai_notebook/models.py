@@ -14,6 +14,13 @@ class Notebook(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
 
+    # Rolling summary of chat messages that no longer fit the history budget
+    history_summary = models.TextField(blank=True, default="")
+    summary_until_id = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Messages with id <= this are covered by history_summary.",
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -83,6 +90,108 @@ class Source(models.Model):
     def __str__(self):
         return f"{self.title} ({self.get_source_type_display()})"
 
+    @property
+    def active_job(self):
+        """Queued or running extraction job, if any."""
+        return self.extraction_jobs.filter(
+            status__in=[ExtractionJob.QUEUED, ExtractionJob.RUNNING]
+        ).first()
+
+
+# -------------------------
+# EXTRACTION JOB MODEL (BACKGROUND QUEUE)
+# -------------------------
+class ExtractionJob(models.Model):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    source = models.ForeignKey(
+        Source,
+        on_delete=models.CASCADE,
+        related_name="extraction_jobs",
+    )
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+
+    # progress (pages for PDFs, 1 step for DOCX/URL)
+    total_pages = models.PositiveIntegerField(default=0)
+    pages_done = models.PositiveIntegerField(default=0)
+
+    file_hash = models.CharField(max_length=64, blank=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="extractionjob_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.source.title}: {self.status} ({self.pages_done}/{self.total_pages})"
+
+
+# -------------------------
+# EXTRACTION CACHE (BY FILE HASH)
+# -------------------------
+class ExtractionCache(models.Model):
+    file_hash = models.CharField(max_length=64, unique=True)
+    content = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.file_hash
+
+
+# -------------------------
+# SOURCE CHUNK MODEL (RETRIEVAL INDEX)
+# -------------------------
+class SourceChunk(models.Model):
+    source = models.ForeignKey(
+        Source,
+        on_delete=models.CASCADE,
+        related_name="chunks",
+    )
+    notebook = models.ForeignKey(
+        Notebook,
+        on_delete=models.CASCADE,
+        related_name="chunks",
+    )
+
+    index = models.PositiveIntegerField()
+    text = models.TextField()
+    token_count = models.PositiveIntegerField(default=0)
+
+    # float32 vector, L2-normalized
+    embedding = models.BinaryField()
+    embedding_model = models.CharField(max_length=100)
+
+    # hash of the source content this chunk was built from
+    content_hash = models.CharField(max_length=64)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["source", "index"]
+        indexes = [
+            models.Index(fields=["notebook", "embedding_model"], name="sourcechunk_nb_model_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.source.title} #{self.index}"
+
 
 # -------------------------
 # CHAT MESSAGE MODEL
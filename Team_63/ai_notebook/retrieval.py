@@ -0,0 +1,291 @@
+# ai_notebook/retrieval.py — chunking, embeddings and per-notebook vector index
+import hashlib
+import logging
+import re
+import threading
+
+import numpy as np
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+
+from .models import SourceChunk
+
+logger = logging.getLogger(__name__)
+
+CHUNK_TOKENS = getattr(settings, "NOTEBOOK_CHUNK_TOKENS", 350)
+CHUNK_OVERLAP_TOKENS = getattr(settings, "NOTEBOOK_CHUNK_OVERLAP_TOKENS", 50)
+TOP_K = getattr(settings, "NOTEBOOK_TOP_K", 6)
+
+GEMINI_EMBED_MODEL = "models/text-embedding-004"
+GEMINI_EMBED_URL = "https://generativelanguage.googleapis.com/v1beta/{model}:batchEmbedContents?key={key}"
+GEMINI_EMBED_BATCH = 100
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return max(1, len(text or "") // 4)
+
+
+def content_hash(text):
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+# =========================================================
+# Chunking
+# =========================================================
+
+def chunk_text(text, chunk_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """
+    Split text into ~chunk_tokens pieces on paragraph/sentence boundaries,
+    carrying the tail of each chunk into the next for context.
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+
+    max_chars = chunk_tokens * 4
+    overlap_chars = overlap_tokens * 4
+
+    # paragraphs first; oversized paragraphs are split on sentences, then hard-wrapped
+    pieces = []
+    for para in re.split(r"\n\s*\n", text):
+        para = para.strip()
+        if not para:
+            continue
+        if len(para) <= max_chars:
+            pieces.append(para)
+            continue
+        for sentence in re.split(r"(?<=[.!?])\s+", para):
+            while len(sentence) > max_chars:
+                pieces.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            if sentence:
+                pieces.append(sentence)
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 2 > max_chars:
+            chunks.append(current)
+            current = current[-overlap_chars:] if overlap_chars else ""
+        current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+# =========================================================
+# Embedders
+# =========================================================
+
+class GeminiEmbedder:
+    """Gemini text-embedding-004 via the REST batch endpoint."""
+
+    name = "gemini-text-embedding-004"
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key or settings.GEMINI_API_KEY
+        self.url = GEMINI_EMBED_URL.format(model=GEMINI_EMBED_MODEL, key=self.api_key)
+
+    def embed(self, texts, task_type="RETRIEVAL_DOCUMENT"):
+        vectors = []
+        for start in range(0, len(texts), GEMINI_EMBED_BATCH):
+            batch = texts[start:start + GEMINI_EMBED_BATCH]
+            payload = {
+                "requests": [
+                    {
+                        "model": GEMINI_EMBED_MODEL,
+                        "content": {"parts": [{"text": t}]},
+                        "taskType": task_type,
+                    }
+                    for t in batch
+                ]
+            }
+            response = requests.post(self.url, json=payload, timeout=30)
+            response.raise_for_status()
+            vectors.extend(e["values"] for e in response.json()["embeddings"])
+        return _normalize(np.asarray(vectors, dtype=np.float32))
+
+
+class HashingEmbedder:
+    """
+    Offline bag-of-words embedder (signed feature hashing).
+    Used when no API key is configured, and by the prompt benchmark.
+    """
+
+    name = "hashing-512"
+
+    def __init__(self, dim=512):
+        self.dim = dim
+
+    def embed(self, texts, task_type=None):
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in re.findall(r"\w+", text.lower()):
+                digest = hashlib.md5(token.encode("utf-8")).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dim
+                matrix[row, bucket] += 1.0 if digest[4] & 1 else -1.0
+        return _normalize(matrix)
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+_embedder = None
+
+
+def get_embedder():
+    """Embedder chosen by settings.NOTEBOOK_EMBEDDER ("gemini" or "hashing")."""
+    global _embedder
+    if _embedder is None:
+        choice = getattr(settings, "NOTEBOOK_EMBEDDER", "gemini")
+        if choice == "gemini" and settings.GEMINI_API_KEY:
+            _embedder = GeminiEmbedder()
+        else:
+            _embedder = HashingEmbedder()
+    return _embedder
+
+
+# =========================================================
+# Ingestion
+# =========================================================
+
+def ingest_source(source, embedder=None, force=False):
+    """
+    Chunk and embed one Source. Skipped when its chunks already match the
+    current content and embedder. Returns the number of chunks written.
+    """
+    embedder = embedder or get_embedder()
+    text = source.content or ""
+    digest = content_hash(text)
+
+    existing = source.chunks.all()
+    if not force and existing.exists() and not existing.exclude(
+        content_hash=digest, embedding_model=embedder.name
+    ).exists():
+        return 0
+
+    pieces = chunk_text(text)
+    vectors = embedder.embed(pieces) if pieces else np.zeros((0, 0), dtype=np.float32)
+
+    with transaction.atomic():
+        source.chunks.all().delete()
+        SourceChunk.objects.bulk_create([
+            SourceChunk(
+                source=source,
+                notebook_id=source.notebook_id,
+                index=i,
+                text=piece,
+                token_count=estimate_tokens(piece),
+                embedding=vectors[i].tobytes(),
+                embedding_model=embedder.name,
+                content_hash=digest,
+            )
+            for i, piece in enumerate(pieces)
+        ])
+    return len(pieces)
+
+
+def ensure_notebook_ingested(notebook, embedder=None):
+    """Ingest any source whose chunks are missing or stale (e.g. created before indexing existed)."""
+    embedder = embedder or get_embedder()
+    for source in notebook.sources.all():
+        if not (source.content or "").strip():
+            continue
+        try:
+            ingest_source(source, embedder)
+        except Exception as e:
+            logger.warning("Could not ingest source %s: %s", source.pk, e)
+
+
+# =========================================================
+# Per-notebook vector index
+# =========================================================
+
+class NotebookIndex:
+    """In-memory matrix of one notebook's chunk embeddings."""
+
+    def __init__(self, version, chunk_ids, matrix, titles, texts, token_counts):
+        self.version = version
+        self.chunk_ids = chunk_ids
+        self.matrix = matrix
+        self.titles = titles
+        self.texts = texts
+        self.token_counts = token_counts
+
+    def search(self, query_vector, k):
+        if not len(self.chunk_ids):
+            return []
+        scores = self.matrix @ query_vector
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {
+                "title": self.titles[i],
+                "text": self.texts[i],
+                "tokens": self.token_counts[i],
+                "score": float(scores[i]),
+            }
+            for i in top
+        ]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _index_version(notebook, embedder):
+    stats = SourceChunk.objects.filter(
+        notebook=notebook, embedding_model=embedder.name
+    ).aggregate(count=Count("id"), last=Max("id"))
+    return (stats["count"], stats["last"])
+
+
+def get_notebook_index(notebook, embedder=None):
+    """Cached index for a notebook, rebuilt only when its chunks change."""
+    embedder = embedder or get_embedder()
+    key = (notebook.pk, embedder.name)
+    version = _index_version(notebook, embedder)
+
+    with _indexes_lock:
+        cached = _indexes.get(key)
+        if cached is not None and cached.version == version:
+            return cached
+
+    rows = list(
+        SourceChunk.objects.filter(notebook=notebook, embedding_model=embedder.name)
+        .values_list("id", "source__title", "text", "token_count", "embedding")
+    )
+    if rows:
+        matrix = np.vstack([np.frombuffer(bytes(r[4]), dtype=np.float32) for r in rows])
+    else:
+        matrix = np.zeros((0, 0), dtype=np.float32)
+
+    index = NotebookIndex(
+        version=version,
+        chunk_ids=[r[0] for r in rows],
+        matrix=matrix,
+        titles=[r[1] for r in rows],
+        texts=[r[2] for r in rows],
+        token_counts=[r[3] for r in rows],
+    )
+    with _indexes_lock:
+        _indexes[key] = index
+    return index
+
+
+def retrieve(notebook, query, k=TOP_K, embedder=None):
+    """Top-k chunks of the notebook's sources for the query, best first."""
+    embedder = embedder or get_embedder()
+    ensure_notebook_ingested(notebook, embedder)
+    index = get_notebook_index(notebook, embedder)
+    if not index.chunk_ids:
+        return []
+    query_vector = embedder.embed([query], task_type="RETRIEVAL_QUERY")[0]
+    return index.search(query_vector, k)
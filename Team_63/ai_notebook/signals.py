@@ -0,0 +1,25 @@
+# ai_notebook/signals.py
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Source
+from .retrieval import ingest_source
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Source)
+def index_source_on_save(sender, instance, **kwargs):
+    """Chunk + embed a source once its content is saved (no-op if unchanged)."""
+
+    def ingest():
+        try:
+            ingest_source(instance)
+        except Exception as e:
+            # Retried lazily at question time by ensure_notebook_ingested
+            logger.warning("Indexing source %s failed: %s", instance.pk, e)
+
+    transaction.on_commit(ingest)
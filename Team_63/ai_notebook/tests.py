@@ -1,3 +1,130 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from . import retrieval, services
+from .models import ChatMessage, Notebook, Source
+from .retrieval import HashingEmbedder, chunk_text, estimate_tokens, ingest_source, retrieve
+
+
+class ChunkTextTests(SimpleTestCase):
+    def test_empty_text_has_no_chunks(self):
+        self.assertEqual(chunk_text("   "), [])
+
+    def test_short_paragraphs_share_a_chunk(self):
+        self.assertEqual(chunk_text("First para.\n\nSecond para.", chunk_tokens=50), ["First para.\n\nSecond para."])
+
+    def test_chunks_respect_size_and_overlap(self):
+        text = "\n\n".join(f"Paragraph {i} " + "word " * 30 for i in range(20))
+
+        chunks = chunk_text(text, chunk_tokens=100, overlap_tokens=10)
+
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk), 100 * 4 + 10 * 4 + 2)
+        for previous, current in zip(chunks, chunks[1:]):
+            self.assertTrue(current.startswith(previous[-10 * 4:]))
+
+    def test_oversized_sentence_is_hard_wrapped(self):
+        chunks = chunk_text("x" * 1000, chunk_tokens=50, overlap_tokens=0)
+
+        self.assertEqual("".join(chunks), "x" * 1000)
+        self.assertTrue(all(len(chunk) <= 200 for chunk in chunks))
+
+
+def make_notebook(title="Notes"):
+    owner = get_user_model().objects.create_user(username=f"owner-{title}", password="pw")
+    return Notebook.objects.create(owner=owner, title=title)
+
+
+class RetrievalTests(TestCase):
+    def setUp(self):
+        retrieval._indexes.clear()
+        self.embedder = HashingEmbedder()
+        self.notebook = make_notebook()
+
+    def add_source(self, title, content):
+        source = Source.objects.create(notebook=self.notebook, title=title, content=content)
+        return source
+
+    def test_most_relevant_source_ranks_first(self):
+        self.add_source("Photosynthesis", "Plants convert sunlight, water and carbon dioxide into glucose.")
+        self.add_source("Volcanoes", "Magma rises through the crust and erupts as lava and ash.")
+
+        chunks = retrieve(self.notebook, "how do plants use sunlight", embedder=self.embedder)
+
+        self.assertEqual(chunks[0]["title"], "Photosynthesis")
+        self.assertGreater(chunks[0]["score"], chunks[1]["score"])
+
+    def test_unchanged_source_is_not_reingested(self):
+        source = self.add_source("Volcanoes", "Magma rises through the crust.")
+
+        self.assertEqual(ingest_source(source, self.embedder), 1)
+        self.assertEqual(ingest_source(source, self.embedder), 0)
+
+        source.content = "Lava cools into basalt."
+        source.save()
+        self.assertEqual(ingest_source(source, self.embedder), 1)
+        self.assertEqual(source.chunks.get().text, "Lava cools into basalt.")
+
+    def test_notebook_without_sources_retrieves_nothing(self):
+        self.assertEqual(retrieve(self.notebook, "anything", embedder=self.embedder), [])
+
+
+class BuildHistoryTests(TestCase):
+    def setUp(self):
+        self.notebook = make_notebook()
+
+    def add_message(self, content, role=ChatMessage.ROLE_USER):
+        return ChatMessage.objects.create(notebook=self.notebook, role=role, content=content)
+
+    def test_history_within_budget_is_not_summarized(self):
+        self.add_message("hello")
+        self.add_message("hi there", role=ChatMessage.ROLE_ASSISTANT)
+
+        with mock.patch.object(services, "summarize_history") as summarize:
+            history = services.build_history(self.notebook, token_budget=100)
+
+        summarize.assert_not_called()
+        self.assertEqual(history, "User: hello\nAssistant: hi there")
+
+    def test_oldest_messages_are_folded_into_summary(self):
+        old = [self.add_message(f"old question {i} " + "x" * 40) for i in range(4)]
+        recent = self.add_message("latest question")
+
+        with mock.patch.object(services, "summarize_history", return_value="earlier stuff") as summarize:
+            history = services.build_history(self.notebook, token_budget=40)
+
+        folded = summarize.call_args.args[1]
+        self.assertTrue(folded)
+        self.assertEqual(folded[0], services._format_message(old[0]))
+        self.notebook.refresh_from_db()
+        self.assertEqual(self.notebook.history_summary, "earlier stuff")
+        self.assertEqual(self.notebook.summary_until_id, old[len(folded) - 1].id)
+        self.assertTrue(history.startswith("Summary of earlier conversation:\nearlier stuff"))
+        self.assertIn("User: latest question", history)
+        self.assertLessEqual(estimate_tokens(history.split("\n\n", 1)[1]), 40)
+        self.assertIn(recent.content, history)
+
+    def test_failed_summary_keeps_marker(self):
+        for i in range(4):
+            self.add_message(f"question {i} " + "x" * 40)
+
+        with mock.patch.object(services, "summarize_history", return_value=None):
+            services.build_history(self.notebook, token_budget=20)
+
+        self.notebook.refresh_from_db()
+        self.assertEqual(self.notebook.summary_until_id, 0)
+        self.assertEqual(self.notebook.history_summary, "")
+
+    def test_single_oversized_message_is_kept_unsummarized(self):
+        message = self.add_message("y" * 400)
+
+        with mock.patch.object(services, "summarize_history") as summarize:
+            history = services.build_history(self.notebook, token_budget=20)
+
+        summarize.assert_not_called()
+        self.notebook.refresh_from_db()
+        self.assertEqual(self.notebook.summary_until_id, 0)
+        self.assertEqual(history, services._format_message(message))
@@ -10,6 +10,7 @@ urlpatterns = [
     path("notebooks/<int:pk>/export/", views.notebook_export, name="notebook_export"),
 
     path("sources/<int:pk>/delete/", views.source_delete, name="source_delete"),
+    path("sources/<int:pk>/status/", views.source_status, name="source_status"),
     path("notebooks/<int:notebook_pk>/sources/reorder/", views.source_reorder, name="source_reorder"),
     path("notebook/<int:pk>/clear-chat/", views.clear_notebook_chat, name="clear_notebook_chat"),
 
@@ -8,12 +8,9 @@ from django.db.models import Max
 from .models import Notebook, Source, ChatMessage
 from .forms import NotebookForm, SourceForm, ChatForm
 from .services import generate_reply
+from .extraction import enqueue_extraction
+from .extractors import extract_text_from_txt
 
-import requests
-from bs4 import BeautifulSoup
-import pdfplumber
-import docx
-from PyPDF2 import PdfReader
 import json
 
 
@@ -23,76 +20,12 @@ def clear_notebook_chat(request, pk):
     # delete all chat messages linked to this notebook
     ChatMessage.objects.filter(notebook=notebook).delete()
 
-    return redirect("ai_notebook:notebook_detail", pk=pk)
-
-# =========================================================
-# Extraction Helpers
-# =========================================================
-
-def extract_text_from_pdf(file_field):
-    try:
-        text = ""
-        file_field.open("rb")
-        with pdfplumber.open(file_field) as pdf:
-            for page in pdf.pages:
-                extracted = page.extract_text() or ""
-                text += extracted + "\n"
-        file_field.close()
-
-        if text.strip():
-            return text.strip()
-
-        # Fallback → PyPDF2
-        file_field.open("rb")
-        reader = PdfReader(file_field)
-        fallback = ""
-        for page in reader.pages:
-            extracted = page.extract_text() or ""
-            fallback += extracted + "\n"
-        file_field.close()
-
-        return fallback.strip() or "Could not extract text from PDF."
-
-    except Exception as e:
-        return f"PDF extraction failed: {e}"
-
-
-def extract_text_from_docx(file_field):
-    try:
-        file_field.open("rb")
-        d = docx.Document(file_field)
-        text = "\n".join(p.text for p in d.paragraphs)
-        file_field.close()
-        return text.strip() or "Could not extract text from DOCX."
-    except Exception as e:
-        return f"DOCX extraction failed: {e}"
-
-
-def extract_text_from_txt(file_field):
-    try:
-        file_field.open("rb")
-        data = file_field.read()
-        file_field.close()
-        return data.decode("utf-8", errors="ignore") or "File was empty."
-    except Exception as e:
-        return f"TXT extraction failed: {e}"
-
-
-def extract_text_from_url(url):
-    try:
-        res = requests.get(url, timeout=10)
-        res.raise_for_status()
-
-        soup = BeautifulSoup(res.text, "html.parser")
-        for tag in soup(["script", "style"]):
-            tag.decompose()
-
-        text = soup.get_text("\n")
-        cleaned = "\n".join(line.strip() for line in text.splitlines() if line.strip())
-        return cleaned[:50000] or "No readable text found."
-    except Exception as e:
-        return f"URL extraction failed: {e}"
+    # and the rolling summary built from them
+    notebook.history_summary = ""
+    notebook.summary_until_id = 0
+    notebook.save(update_fields=["history_summary", "summary_until_id"])
 
+    return redirect("ai_notebook:notebook_detail", pk=pk)
 
 # =========================================================
 # Notebook List + Search
@@ -156,22 +89,25 @@ def notebook_detail(request, pk):
                     if not src.content:
                         src.content = ""
 
-                # URL
+                # URL -> background extraction worker
                 elif src.source_type == Source.URL:
                     url_value = source_form.cleaned_data.get("url") or ""
                     src.url = url_value
-                    src.content = extract_text_from_url(url_value)
+                    src.content = ""
+                    src.save()
+                    enqueue_extraction(src)
+                    return redirect("ai_notebook:notebook_detail", pk=notebook.pk)
 
                 # FILE
                 elif src.source_type == Source.FILE and src.file:
                     filepath = src.file.path.lower()
 
-                    if filepath.endswith(".pdf"):
-                        src.content = extract_text_from_pdf(src.file)
-                    elif filepath.endswith(".docx"):
-                        src.content = extract_text_from_docx(src.file)
-                    elif filepath.endswith(".txt"):
+                    if filepath.endswith(".txt"):
                         src.content = extract_text_from_txt(src.file)
+                    elif filepath.endswith((".pdf", ".docx")):
+                        # PDF/DOCX parsing runs in the extraction worker
+                        enqueue_extraction(src)
+                        return redirect("ai_notebook:notebook_detail", pk=notebook.pk)
                     else:
                         src.content = "Unsupported file format. Upload PDF, DOCX, or TXT."
 
@@ -196,7 +132,10 @@ def notebook_detail(request, pk):
             elif src_type == Source.URL:
                 url_value = request.POST.get("url", "")
                 src.url = url_value
-                src.content = extract_text_from_url(url_value)
+                # existing content stays until the worker replaces it
+                src.save()
+                enqueue_extraction(src)
+                return redirect("ai_notebook:notebook_detail", pk=notebook.pk)
 
             # file editing: keep existing file (simpler UX)
             src.save()
@@ -264,6 +203,27 @@ def source_delete(request, pk):
     return redirect("ai_notebook:notebook_detail", pk=notebook_pk)
 
 
+# =========================================================
+# Extraction progress (polled by the notebook page)
+# =========================================================
+
+@login_required
+def source_status(request, pk):
+    src = get_object_or_404(Source, pk=pk, notebook__owner=request.user)
+    job = src.extraction_jobs.order_by("-created_at").first()
+
+    if job is None:
+        return JsonResponse({"status": "done", "pages_done": 0, "total_pages": 0})
+
+    return JsonResponse({
+        "status": job.status,
+        "pages_done": job.pages_done,
+        "total_pages": job.total_pages,
+        "error": job.error,
+        "snippet": (src.content or "")[:120],
+    })
+
+
 # =========================================================
 # Drag & Drop reorder
 # =========================================================
@@ -138,6 +138,14 @@ EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD")
 # ======================
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
 
+# ======================
+# AI NOTEBOOK RETRIEVAL
+# ======================
+NOTEBOOK_EMBEDDER = os.environ.get("NOTEBOOK_EMBEDDER", "gemini")  # gemini | hashing
+NOTEBOOK_TOP_K = int(os.environ.get("NOTEBOOK_TOP_K", 6))
+NOTEBOOK_SOURCE_TOKENS = int(os.environ.get("NOTEBOOK_SOURCE_TOKENS", 3000))
+NOTEBOOK_HISTORY_TOKENS = int(os.environ.get("NOTEBOOK_HISTORY_TOKENS", 1500))
+
 # ======================
 # DEFAULT PK
 # ======================
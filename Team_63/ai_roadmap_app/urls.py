@@ -14,6 +14,7 @@ urlpatterns = [
 
     # Chat API Endpoint
     path('rag-chat-api/', views.rag_chat_api, name="rag_chat_api"),
+    path('rag-chat-api/stream/', views.rag_chat_stream_api, name="rag_chat_stream_api"),
 
     # App Routes (DO NOT repeat '' path here)
     path('app/', include('ai_app.urls')),   # changed for safety
@@ -0,0 +1,269 @@
+"""
+Forecasting service for trained LSTM models
+
+Keeps per-symbol models and scalers in an LRU cache and recent closing prices
+in a short-lived cache, and runs the autoregressive rollout as a single
+compiled graph call per model instead of one model.predict call per day.
+
+Usage:
+    from forecast_service import get_forecast_service
+    service = get_forecast_service()
+    result = service.forecast('RELIANCE.NS', days=30)
+    results = service.forecast_many(['RELIANCE.NS', 'TCS.NS'], days=30)
+"""
+import json
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+
+from price_store import get_price_store
+
+MODEL_DIR = "models"
+MODEL_CACHE_SIZE = int(os.environ.get("FORECAST_MODEL_CACHE_SIZE", "64"))
+PRICE_CACHE_TTL = float(os.environ.get("FORECAST_PRICE_TTL", "300"))
+FORECAST_WORKERS = int(os.environ.get("FORECAST_WORKERS", "4"))
+HISTORY_PERIOD = "1y"
+
+# Compiled rollout per Keras model; the rollout only holds a weak reference to
+# its model, so entries disappear when the model cache drops the model
+_rollouts = weakref.WeakKeyDictionary()
+_rollouts_lock = threading.Lock()
+
+
+def _build_rollout(model):
+    """Compile the full multi-day rollout for one model into a tf.function"""
+    sequence_length = model.input_shape[1]
+    # A strong reference here would keep the WeakKeyDictionary key alive forever
+    model_ref = weakref.ref(model)
+
+    @tf.function(input_signature=[
+        tf.TensorSpec(shape=[None, sequence_length, 1], dtype=tf.float32),
+        tf.TensorSpec(shape=[], dtype=tf.int32)
+    ])
+    def rollout(windows, days):
+        model = model_ref()
+        outputs = tf.TensorArray(tf.float32, size=days)
+        for step in tf.range(days):
+            next_value = model(windows, training=False)[:, :1]
+            outputs = outputs.write(step, next_value[:, 0])
+            # Slide every window forward by one step, appending its own prediction
+            windows = tf.concat([windows[:, 1:, :], next_value[:, tf.newaxis, :]], axis=1)
+        return tf.transpose(outputs.stack())
+
+    return rollout
+
+
+def rollout_windows(model, windows, days):
+    """
+    Autoregressively forecast `days` steps for a batch of scaled windows
+
+    Args:
+        model: Trained Keras model taking (batch, sequence_length, 1)
+        windows (np.ndarray): Scaled input windows, shape (batch, sequence_length)
+        days (int): Number of steps to forecast
+
+    Returns:
+        np.ndarray: Scaled predictions, shape (batch, days)
+    """
+    days = int(days)
+    if days <= 0:
+        raise ValueError(f"days must be a positive integer, got {days}")
+
+    with _rollouts_lock:
+        rollout = _rollouts.get(model)
+        if rollout is None:
+            rollout = _rollouts[model] = _build_rollout(model)
+
+    windows = np.asarray(windows, dtype=np.float32)
+    if windows.ndim == 1:
+        windows = windows[np.newaxis, :]
+    return rollout(tf.constant(windows[:, :, np.newaxis]), tf.constant(days, dtype=tf.int32)).numpy()
+
+
+def future_business_dates(last_date, days):
+    """Next `days` weekdays after last_date, as YYYY-MM-DD strings"""
+    start = pd.Timestamp(last_date).normalize() + pd.Timedelta(days=1)
+    return [d.strftime('%Y-%m-%d') for d in pd.bdate_range(start=start, periods=days)]
+
+
+class ForecastModel:
+    """A loaded model, its scaler and metadata for one symbol"""
+
+    def __init__(self, symbol, model, scaler, metadata, mtime):
+        self.symbol = symbol
+        self.model = model
+        self.scaler = scaler
+        self.metadata = metadata
+        self.sequence_length = metadata.get('sequence_length', 60)
+        self.mtime = mtime
+
+
+class ForecastService:
+    """Serves multi-day forecasts from cached models and recent prices"""
+
+    def __init__(self, model_dir=MODEL_DIR, max_models=MODEL_CACHE_SIZE,
+                 price_ttl=PRICE_CACHE_TTL, workers=FORECAST_WORKERS):
+        self.model_dir = model_dir
+        self.max_models = max_models
+        self.price_ttl = price_ttl
+        self.workers = workers
+        self._models = OrderedDict()
+        self._models_lock = threading.Lock()
+        self._prices = {}
+        self._prices_lock = threading.Lock()
+
+    def _paths(self, symbol):
+        return (
+            os.path.join(self.model_dir, f"{symbol}_lstm_model.h5"),
+            os.path.join(self.model_dir, f"{symbol}_scaler.pkl"),
+            os.path.join(self.model_dir, f"{symbol}_metadata.json")
+        )
+
+    def get_model(self, symbol):
+        """Return the cached ForecastModel for a symbol, reloading it if the file changed"""
+        model_path, scaler_path, metadata_path = self._paths(symbol)
+        if not all(os.path.exists(path) for path in (model_path, scaler_path, metadata_path)):
+            raise FileNotFoundError(f"Model files not found for {symbol}")
+        mtime = os.path.getmtime(model_path)
+
+        with self._models_lock:
+            entry = self._models.get(symbol)
+            if entry is not None and entry.mtime == mtime:
+                self._models.move_to_end(symbol)
+                return entry
+
+        with open(metadata_path, 'r') as f:
+            metadata = json.load(f)
+        model = tf.keras.models.load_model(model_path, compile=False)
+        scaler = joblib.load(scaler_path)
+        entry = ForecastModel(symbol, model, scaler, metadata, mtime)
+
+        with self._models_lock:
+            self._models[symbol] = entry
+            self._models.move_to_end(symbol)
+            while len(self._models) > self.max_models:
+                self._models.popitem(last=False)
+        return entry
+
+    def get_recent_closes(self, symbols):
+        """
+        Recent closing prices per symbol, refreshed concurrently through the price store
+
+        Returns:
+            dict: symbol -> pd.Series of closes (missing symbols are omitted)
+        """
+        now = time.monotonic()
+        closes, missing = {}, []
+        with self._prices_lock:
+            for symbol in symbols:
+                cached = self._prices.get(symbol)
+                if cached is not None and now - cached[0] < self.price_ttl:
+                    closes[symbol] = cached[1]
+                else:
+                    missing.append(symbol)
+
+        if missing:
+            store = get_price_store()
+            store.refresh(missing, period=HISTORY_PERIOD)
+            fetched = {}
+            for symbol in missing:
+                series = store.history(symbol, period=HISTORY_PERIOD, refresh=False)['Close']
+                if not series.empty:
+                    fetched[symbol] = series
+            with self._prices_lock:
+                for symbol, series in fetched.items():
+                    self._prices[symbol] = (now, series)
+            closes.update(fetched)
+
+        return closes
+
+    def _forecast_entry(self, entry, closes, days):
+        prices = closes.values
+        sequence_length = entry.sequence_length
+        if len(prices) < sequence_length:
+            raise ValueError(f"Insufficient data for prediction. Need at least {sequence_length} days")
+
+        last_sequence_scaled = entry.scaler.transform(prices[-sequence_length:].reshape(-1, 1))
+        scaled = rollout_windows(entry.model, last_sequence_scaled.reshape(1, -1), days)
+        predicted_prices = entry.scaler.inverse_transform(scaled.reshape(-1, 1)).flatten()
+
+        current_price = float(prices[-1])
+        change_percent = (predicted_prices - current_price) / current_price * 100
+        future_dates = future_business_dates(closes.index[-1], days)
+
+        return {
+            'success': True,
+            'symbol': entry.symbol,
+            'current_price': current_price,
+            'predictions': [
+                {
+                    'date': date,
+                    'price': float(price),
+                    'change_percent': float(change)
+                }
+                for date, price, change in zip(future_dates, predicted_prices, change_percent)
+            ],
+            'metadata': {
+                'model_created': entry.metadata.get('created_at'),
+                'sequence_length': sequence_length,
+                'prediction_days': days,
+                'last_data_date': closes.index[-1].strftime('%Y-%m-%d')
+            }
+        }
+
+    def forecast_many(self, symbols, days):
+        """
+        Forecast several symbols at once
+
+        Models are loaded from the cache, prices are fetched in a single
+        refresh, and each model's compiled rollout is dispatched on a thread
+        pool (graph execution releases the GIL, so the rollouts overlap).
+
+        Returns:
+            dict: symbol -> result dict in the predict.py output format
+        """
+        results, entries = {}, {}
+        for symbol in symbols:
+            try:
+                entries[symbol] = self.get_model(symbol)
+            except Exception as e:
+                results[symbol] = {'success': False, 'error': str(e), 'symbol': symbol}
+
+        closes = self.get_recent_closes(list(entries)) if entries else {}
+
+        def run(symbol):
+            if symbol not in closes:
+                raise ValueError(f"No recent data available for {symbol}")
+            return self._forecast_entry(entries[symbol], closes[symbol], days)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(entries)))) as pool:
+            futures = {symbol: pool.submit(run, symbol) for symbol in entries}
+        for symbol, future in futures.items():
+            error = future.exception()
+            results[symbol] = future.result() if error is None else {
+                'success': False, 'error': str(error), 'symbol': symbol
+            }
+
+        return {symbol: results[symbol] for symbol in symbols}
+
+    def forecast(self, symbol, days):
+        return self.forecast_many([symbol], days)[symbol]
+
+
+# Global service instance
+_forecast_service = None
+
+def get_forecast_service(model_dir=MODEL_DIR):
+    """Get singleton forecast service"""
+    global _forecast_service
+    if _forecast_service is None:
+        _forecast_service = ForecastService(model_dir=model_dir)
+    return _forecast_service
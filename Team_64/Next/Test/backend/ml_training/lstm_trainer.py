@@ -1,5 +1,5 @@
-import yfinance as yf
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import pandas as pd
 import tensorflow as tf
 try:
@@ -12,9 +12,14 @@ except ImportError:
     from keras.optimizers import Adam
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.metrics import mean_squared_error, mean_absolute_error
+from forecast_service import rollout_windows
+from price_store import get_price_store
 import joblib
 import os
 import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
@@ -40,22 +45,23 @@ class LSTMStockPredictor:
         self.y_train = None
         self.y_test = None
         
-    def download_data(self, period="5y"):
+    def download_data(self, period="5y", refresh=True):
         """
         Download stock data from Yahoo Finance
         
         Args:
             period (str): Data period ('1y', '2y', '5y', '10y', 'max')
+            refresh (bool): Fetch new bars first; False reads the local store only
         """
         try:
             print(f"Downloading data for {self.symbol}...")
-            ticker = yf.Ticker(self.symbol)
-            self.data = ticker.history(period=period)
+            # Served from the local price store; only bars newer than the last stored date are fetched
+            self.data = get_price_store().history(self.symbol, period=period, refresh=refresh)
             
             if self.data.empty:
                 raise ValueError(f"No data found for symbol {self.symbol}")
                 
-            print(f"Downloaded {len(self.data)} days of data")
+            print(f"Loaded {len(self.data)} days of data")
             return True
             
         except Exception as e:
@@ -75,26 +81,21 @@ class LSTMStockPredictor:
         # Scale the data
         scaled_data = self.scaler.fit_transform(prices)
         
-        # Create sequences
-        X, y = [], []
-        for i in range(self.sequence_length, len(scaled_data)):
-            X.append(scaled_data[i-self.sequence_length:i, 0])
-            y.append(scaled_data[i, 0])
-        
-        X, y = np.array(X), np.array(y)
+        # Create sequences: window i is scaled_data[i:i+sequence_length], target is the next value.
+        # sliding_window_view returns strided views, so no per-window copies are made
+        series = scaled_data[:, 0]
+        X = sliding_window_view(series[:-1], self.sequence_length)
+        y = series[self.sequence_length:]
         
         # Split into train and test sets
         split_index = int(len(X) * (1 - self.test_size))
         
-        self.X_train = X[:split_index]
-        self.X_test = X[split_index:]
+        # Add the feature axis for LSTM (samples, time steps, features)
+        self.X_train = X[:split_index, :, np.newaxis]
+        self.X_test = X[split_index:, :, np.newaxis]
         self.y_train = y[:split_index]
         self.y_test = y[split_index:]
         
-        # Reshape for LSTM (samples, time steps, features)
-        self.X_train = self.X_train.reshape((self.X_train.shape[0], self.X_train.shape[1], 1))
-        self.X_test = self.X_test.reshape((self.X_test.shape[0], self.X_test.shape[1], 1))
-        
         print(f"Training data shape: {self.X_train.shape}")
         print(f"Testing data shape: {self.X_test.shape}")
     
@@ -234,22 +235,11 @@ class LSTMStockPredictor:
         last_sequence = self.data['Close'].values[-self.sequence_length:]
         last_sequence_scaled = self.scaler.transform(last_sequence.reshape(-1, 1))
         
-        predictions = []
-        current_sequence = last_sequence_scaled.flatten()
-        
-        for _ in range(days):
-            # Reshape for prediction
-            X_pred = current_sequence.reshape(1, self.sequence_length, 1)
-            
-            # Make prediction
-            next_pred = self.model.predict(X_pred, verbose=0)[0, 0]
-            predictions.append(next_pred)
-            
-            # Update sequence for next prediction
-            current_sequence = np.append(current_sequence[1:], next_pred)
+        # Whole autoregressive rollout in one compiled call
+        predictions = rollout_windows(self.model, last_sequence_scaled.reshape(1, -1), days)
         
         # Inverse transform predictions
-        predictions = np.array(predictions).reshape(-1, 1)
+        predictions = predictions.reshape(-1, 1)
         predictions = self.scaler.inverse_transform(predictions)
         
         # Create future dates
@@ -312,64 +302,152 @@ class LSTMStockPredictor:
         print(f"Scaler loaded from: {scaler_path}")
 
 
-def train_multiple_stocks(symbols, period="5y", epochs=100):
+def model_files_exist(symbol, model_dir="models"):
+    """True if a saved model, scaler and metadata already exist for the symbol"""
+    return all(os.path.exists(os.path.join(model_dir, name)) for name in (
+        f"{symbol}_lstm_model.h5", f"{symbol}_scaler.pkl", f"{symbol}_metadata.json"
+    ))
+
+
+def _init_training_worker(threads):
+    """Limit BLAS/TensorFlow threads so parallel workers don't oversubscribe the CPU"""
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "TF_NUM_INTRAOP_THREADS"):
+        os.environ[var] = str(threads)
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def train_stock(symbol, period="5y", epochs=100, verbose=1):
+    """
+    Train, evaluate and save the model for one symbol
+    
+    Runs inside a worker process; price data is expected to be in the local
+    store already, so nothing is downloaded here.
+    
+    Returns:
+        dict: Result with success flag, metrics and train_seconds
+    """
+    start = time.perf_counter()
+    try:
+        predictor = LSTMStockPredictor(symbol)
+        
+        if not predictor.download_data(period=period, refresh=False):
+            return {'success': False, 'error': 'Failed to download data',
+                    'train_seconds': round(time.perf_counter() - start, 1)}
+        
+        predictor.preprocess_data()
+        predictor.build_model()
+        history = predictor.train_model(epochs=epochs, verbose=verbose)
+        metrics, _, _ = predictor.evaluate_model()
+        predictor.save_model()
+        
+        return {
+            'success': True,
+            'metrics': metrics,
+            'epochs_run': len(history.history['loss']),
+            'train_seconds': round(time.perf_counter() - start, 1)
+        }
+    except Exception as e:
+        print(f"Error training model for {symbol}: {str(e)}")
+        return {'success': False, 'error': str(e),
+                'train_seconds': round(time.perf_counter() - start, 1)}
+
+
+def train_multiple_stocks(symbols, period="5y", epochs=100, workers=None,
+                          threads_per_worker=None, resume=False,
+                          report_path="models/training_summary.json"):
     """
     Train LSTM models for multiple stock symbols
     
+    Price history for every symbol is refreshed once up front, then symbols
+    are trained in parallel worker processes, each limited to
+    threads_per_worker CPU threads.
+    
     Args:
         symbols (list): List of stock symbols
         period (str): Data period
         epochs (int): Training epochs
+        workers (int): Worker processes (default: CPU count / threads_per_worker)
+        threads_per_worker (int): CPU threads per worker (default: 2)
+        resume (bool): Skip symbols that already have a saved model
+        report_path (str): Where to write the JSON training summary
     """
-    results = {}
+    threads_per_worker = threads_per_worker or 2
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 1) // threads_per_worker)
     
+    results = {}
+    pending = []
     for symbol in symbols:
-        print(f"\n{'='*50}")
-        print(f"Training model for {symbol}")
-        print(f"{'='*50}")
-        
-        try:
-            # Initialize predictor
-            predictor = LSTMStockPredictor(symbol)
-            
-            # Download and preprocess data
-            if predictor.download_data(period=period):
-                predictor.preprocess_data()
-                
-                # Build and train model
-                predictor.build_model()
-                history = predictor.train_model(epochs=epochs, verbose=1)
-                
-                # Evaluate model
-                metrics, _, _ = predictor.evaluate_model()
-                
-                # Save model
-                predictor.save_model()
-                
-                results[symbol] = {
-                    'success': True,
-                    'metrics': metrics
-                }
-                
-            else:
-                results[symbol] = {
-                    'success': False,
-                    'error': 'Failed to download data'
-                }
-                
-        except Exception as e:
-            print(f"Error training model for {symbol}: {str(e)}")
-            results[symbol] = {
-                'success': False,
-                'error': str(e)
-            }
+        if resume and model_files_exist(symbol):
+            print(f"Skipping {symbol}: saved model found")
+            results[symbol] = {'success': True, 'skipped': True, 'train_seconds': 0.0}
+        else:
+            pending.append(symbol)
+    
+    if pending:
+        print(f"Refreshing price data for {len(pending)} symbols...")
+        refreshed = get_price_store().refresh(pending, period=period)
+        for symbol, outcome in refreshed.items():
+            if isinstance(outcome, str):
+                print(f"Warning: could not refresh {symbol} ({outcome}); using stored data")
+    
+    print(f"Training {len(pending)} symbols with {workers} workers x {threads_per_worker} threads")
+    started = time.perf_counter()
     
-    return results
+    # spawn: TensorFlow is not fork-safe, and each worker must apply its own thread limits
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_training_worker,
+                             initargs=(threads_per_worker,)) as pool:
+        futures = {pool.submit(train_stock, symbol, period, epochs, 2 if workers > 1 else 1): symbol
+                   for symbol in pending}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                results[symbol] = future.result()
+            except Exception as e:
+                # Worker crashed (e.g. out of memory)
+                results[symbol] = {'success': False, 'error': str(e), 'train_seconds': None}
+            status = "done" if results[symbol]['success'] else "failed"
+            print(f"{symbol}: {status} in {results[symbol]['train_seconds']}s")
+    
+    summary = {
+        'created_at': datetime.now().isoformat(),
+        'period': period,
+        'epochs': epochs,
+        'workers': workers,
+        'threads_per_worker': threads_per_worker,
+        'wall_seconds': round(time.perf_counter() - started, 1),
+        'trained': sum(1 for r in results.values() if r['success'] and not r.get('skipped')),
+        'skipped': sum(1 for r in results.values() if r.get('skipped')),
+        'failed': sum(1 for r in results.values() if not r['success']),
+        'symbols': {symbol: results[symbol] for symbol in symbols}
+    }
+    if report_path:
+        os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+        with open(report_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"Training summary saved to: {report_path}")
+    
+    return {symbol: results[symbol] for symbol in symbols}
 
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Train LSTM models for several stocks in parallel')
+    parser.add_argument('symbols', nargs='*', help='Stock symbols (default: a few large caps)')
+    parser.add_argument('--period', default='5y')
+    parser.add_argument('--epochs', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--threads-per-worker', type=int, default=None)
+    parser.add_argument('--resume', action='store_true', help='Skip symbols with a saved model')
+    args = parser.parse_args()
+    
     # Example usage
-    indian_stocks = [
+    indian_stocks = args.symbols or [
         'RELIANCE.NS',
         'TCS.NS',
         'INFY.NS',
@@ -378,7 +456,9 @@ if __name__ == "__main__":
     ]
     
     print("Starting LSTM model training for Indian stocks...")
-    results = train_multiple_stocks(indian_stocks, period="5y", epochs=50)
+    results = train_multiple_stocks(indian_stocks, period=args.period, epochs=args.epochs,
+                                    workers=args.workers, threads_per_worker=args.threads_per_worker,
+                                    resume=args.resume)
     
     # Print results summary
     print(f"\n{'='*60}")
@@ -386,8 +466,10 @@ if __name__ == "__main__":
     print(f"{'='*60}")
     
     for symbol, result in results.items():
-        if result['success']:
+        if result.get('skipped'):
+            print(f"{symbol}: - Skipped (saved model found)")
+        elif result['success']:
             metrics = result['metrics']
-            print(f"{symbol}: ✓ Success - RMSE: {metrics['test_rmse']:.2f}")
+            print(f"{symbol}: ✓ Success - RMSE: {metrics['test_rmse']:.2f} - {result['train_seconds']}s")
         else:
-            print(f"{symbol}: ✗ Failed - {result['error']}")
\ No newline at end of file
+            print(f"{symbol}: ✗ Failed - {result['error']}")
@@ -1,9 +1,9 @@
-import yfinance as yf
-import pandas as pd
 import json
 from datetime import datetime, timedelta
 import os
 
+from price_store import get_price_store, frame_to_records
+
 def download_nifty50_data(years=2):
     """
     Download Nifty 50 data for specified years and save as JSON
@@ -22,22 +22,18 @@ def download_nifty50_data(years=2):
     start_date = end_date - timedelta(days=years*365)
     
     try:
-        # Download data
-        nifty_data = yf.download(
-            nifty_symbol, 
-            start=start_date.strftime('%Y-%m-%d'), 
-            end=end_date.strftime('%Y-%m-%d'),
-            interval='1d'
-        )
+        # Refresh the local price store (only bars newer than the last stored date are fetched)
+        store = get_price_store()
+        refreshed = store.refresh([nifty_symbol], years=years)[nifty_symbol]
+        if isinstance(refreshed, str):
+            raise ValueError(refreshed)
+        nifty_data = store.load(nifty_symbol, start=start_date, end=end_date)
         
         if len(nifty_data) == 0:
             print("No data found for Nifty 50")
             return None
             
-        print(f"Downloaded {len(nifty_data)} days of data")
-        
-        # Reset index to make Date a column
-        nifty_data.reset_index(inplace=True)
+        print(f"Loaded {len(nifty_data)} days of data ({refreshed} bars fetched)")
         
         # Convert to dictionary format suitable for JSON
         data_dict = {
@@ -45,28 +41,11 @@ def download_nifty50_data(years=2):
             'download_date': datetime.now().isoformat(),
             'period': f"{years} years",
             'total_records': len(nifty_data),
-            'start_date': str(nifty_data['Date'].min())[:10],
-            'end_date': str(nifty_data['Date'].max())[:10],
-            'data': []
+            'start_date': nifty_data.index.min().strftime('%Y-%m-%d'),
+            'end_date': nifty_data.index.max().strftime('%Y-%m-%d'),
+            'data': frame_to_records(nifty_data)
         }
         
-        # Convert each row to dictionary
-        for index, row in nifty_data.iterrows():
-            try:
-                record = {
-                    'date': row['Date'].strftime('%Y-%m-%d') if hasattr(row['Date'], 'strftime') else str(row['Date'])[:10],
-                    'open': float(row['Open']) if not pd.isna(row['Open']) else None,
-                    'high': float(row['High']) if not pd.isna(row['High']) else None,
-                    'low': float(row['Low']) if not pd.isna(row['Low']) else None,
-                    'close': float(row['Close']) if not pd.isna(row['Close']) else None,
-                    'adj_close': float(row['Adj Close']) if not pd.isna(row['Adj Close']) else None,
-                    'volume': int(row['Volume']) if not pd.isna(row['Volume']) else 0
-                }
-                data_dict['data'].append(record)
-            except Exception as e:
-                print(f"Error processing row {index}: {e}")
-                continue
-        
         # Create data directory if it doesn't exist
         data_dir = os.path.join(os.path.dirname(__file__), 'data')
         os.makedirs(data_dir, exist_ok=True)
@@ -1,9 +1,9 @@
-import yfinance as yf
-import pandas as pd
 import json
 from datetime import datetime, timedelta
 import os
 
+from price_store import get_price_store, frame_to_records
+
 def download_nifty50_final():
     """
     Final working version of Nifty 50 data downloader
@@ -16,64 +16,22 @@ def download_nifty50_final():
     start_date = end_date - timedelta(days=2*365)
     
     try:
-        # Download data
-        nifty_data = yf.download("^NSEI", start=start_date, end=end_date, interval='1d')
+        # Refresh the local price store (only bars newer than the last stored date are fetched)
+        store = get_price_store()
+        refreshed = store.refresh(["^NSEI"], years=2)["^NSEI"]
+        if isinstance(refreshed, str):
+            raise ValueError(refreshed)
+        nifty_data = store.load("^NSEI", start=start_date, end=end_date)
         
         if len(nifty_data) == 0:
             print("No data found")
             return None
             
-        print(f"Downloaded {len(nifty_data)} days of data")
+        print(f"Loaded {len(nifty_data)} days of data ({refreshed} bars fetched)")
         print(f"Columns: {list(nifty_data.columns)}")
         
         # Convert to JSON format
-        data_records = []
-        
-        # Reset index to get dates as column
-        df = nifty_data.reset_index()
-        
-        for i in range(len(df)):
-            try:
-                row = df.iloc[i]
-                
-                # Extract values safely
-                date_val = row['Date']
-                open_val = row['Open']
-                high_val = row['High'] 
-                low_val = row['Low']
-                close_val = row['Close']
-                
-                # Handle Adj Close column name variations
-                if 'Adj Close' in df.columns:
-                    adj_close_val = row['Adj Close']
-                elif ('Adj Close',) in df.columns:
-                    adj_close_val = row[('Adj Close',)]
-                else:
-                    adj_close_val = close_val
-                
-                # Handle Volume
-                if 'Volume' in df.columns:
-                    volume_val = row['Volume']
-                elif ('Volume',) in df.columns:
-                    volume_val = row[('Volume',)]
-                else:
-                    volume_val = 0
-                
-                record = {
-                    'date': date_val.strftime('%Y-%m-%d') if hasattr(date_val, 'strftime') else str(date_val)[:10],
-                    'open': float(open_val),
-                    'high': float(high_val),
-                    'low': float(low_val),
-                    'close': float(close_val),
-                    'adj_close': float(adj_close_val),
-                    'volume': int(float(volume_val)) if not pd.isna(volume_val) else 0
-                }
-                
-                data_records.append(record)
-                
-            except Exception as e:
-                print(f"Error processing row {i}: {e}")
-                continue
+        data_records = frame_to_records(nifty_data)
         
         # Create final structure
         data_dict = {
@@ -0,0 +1,326 @@
+"""
+Local OHLCV price store
+
+Daily bars for every symbol live in one SQLite database. Refreshing a symbol
+only fetches bars newer than the last stored date, unless a longer history
+than stored is requested (backfill) or past bars were re-adjusted by the
+source after a dividend or split (full re-fetch). Many symbols are fetched
+concurrently behind a rate limiter, and reads come back as DataFrames or
+NumPy arrays ready for training and prediction.
+
+The data source is pluggable: Yahoo Finance by default, or a directory of CSV
+files (PRICE_SOURCE=csv, PRICE_CSV_DIR=...) for offline runs and fixtures.
+
+Usage:
+    from price_store import get_price_store
+    store = get_price_store()
+    store.refresh(['RELIANCE.NS', 'TCS.NS'], years=5)
+    closes = store.closes('RELIANCE.NS')
+"""
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+DB_PATH = os.environ.get("PRICE_STORE_PATH", os.path.join(DATA_DIR, 'prices.db'))
+FETCH_WORKERS = int(os.environ.get("PRICE_FETCH_WORKERS", "4"))
+REQUESTS_PER_SECOND = float(os.environ.get("PRICE_REQUESTS_PER_SECOND", "2"))
+# Relative change in a finished bar's Close / Adj Close that means the source re-adjusted history
+ADJUSTMENT_TOLERANCE = 1e-4
+
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+PERIOD_DAYS = {'1mo': 31, '3mo': 92, '6mo': 183, '1y': 365, '2y': 730,
+               '5y': 1826, '10y': 3652, 'max': 365 * 30}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL,
+    date TEXT NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    adj_close REAL,
+    volume INTEGER,
+    PRIMARY KEY (symbol, date)
+);
+CREATE TABLE IF NOT EXISTS coverage (
+    symbol TEXT PRIMARY KEY,
+    fetched_from TEXT NOT NULL
+);
+"""
+
+
+def period_to_days(period):
+    """Convert a yfinance-style period ('1y', '5y', 'max', ...) to days"""
+    if period not in PERIOD_DAYS:
+        raise ValueError(f"Unsupported period: {period}")
+    return PERIOD_DAYS[period]
+
+
+class YahooFinanceSource:
+    """Fetches daily bars from Yahoo Finance"""
+
+    name = 'yahoo'
+
+    def fetch(self, symbol, start, end=None):
+        import yfinance as yf
+        data = yf.Ticker(symbol).history(start=start, end=end, interval='1d', auto_adjust=False)
+        if 'Adj Close' not in data.columns:
+            data['Adj Close'] = data['Close']
+        return data
+
+
+class CSVSource:
+    """Reads daily bars from <directory>/<symbol>.csv (Yahoo export layout)"""
+
+    name = 'csv'
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def fetch(self, symbol, start, end=None):
+        path = os.path.join(self.directory, f"{symbol}.csv")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No CSV data for {symbol} in {self.directory}")
+        data = pd.read_csv(path, parse_dates=['Date'], index_col='Date')
+        if 'Adj Close' not in data.columns:
+            data['Adj Close'] = data['Close']
+        data = data[data.index >= pd.Timestamp(start)]
+        if end is not None:
+            data = data[data.index < pd.Timestamp(end)]
+        return data
+
+
+def get_data_source():
+    """Pick the data source from PRICE_SOURCE (yahoo|csv)"""
+    if os.environ.get("PRICE_SOURCE", "yahoo").lower() == 'csv':
+        return CSVSource(os.environ.get("PRICE_CSV_DIR", os.path.join(DATA_DIR, 'fixtures')))
+    return YahooFinanceSource()
+
+
+class RateLimiter:
+    """Spaces out calls so at most `rate` start per second across threads"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class PriceStore:
+    """SQLite-backed daily OHLCV store with incremental refresh"""
+
+    def __init__(self, db_path=DB_PATH, source=None, workers=FETCH_WORKERS,
+                 requests_per_second=REQUESTS_PER_SECOND):
+        self.db_path = db_path
+        self.source = source or get_data_source()
+        self.workers = workers
+        self.rate_limiter = RateLimiter(requests_per_second)
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def last_date(self, symbol):
+        with self._connect() as conn:
+            row = conn.execute("SELECT MAX(date) FROM bars WHERE symbol = ?", (symbol,)).fetchone()
+        return pd.Timestamp(row[0]) if row and row[0] else None
+
+    def _stored_span(self, symbol):
+        """Earliest date history was fetched from, and the last two stored (date, close, adj_close)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT fetched_from FROM coverage WHERE symbol = ?", (symbol,)).fetchone()
+            if row is None:
+                # stored before coverage was tracked: the first bar is the best we know
+                row = conn.execute("SELECT MIN(date) FROM bars WHERE symbol = ?", (symbol,)).fetchone()
+            tail = conn.execute(
+                "SELECT date, close, adj_close FROM bars WHERE symbol = ? ORDER BY date DESC LIMIT 2",
+                (symbol,)
+            ).fetchall()
+        fetched_from = pd.Timestamp(row[0]) if row and row[0] else None
+        return fetched_from, tail
+
+    def _fetch(self, symbol, start):
+        self.rate_limiter.wait()
+        return self.source.fetch(symbol, start=start.strftime('%Y-%m-%d'))
+
+    @staticmethod
+    def _adjustment_changed(data, reference):
+        """Whether a stored, finished bar now has a different Close or Adj Close at the source"""
+        date, close, adj_close = reference
+        if data.empty:
+            return False
+        dates = pd.DatetimeIndex(data.index).strftime('%Y-%m-%d')
+        matches = data[dates == date]
+        if matches.empty:
+            return False
+        new_close = float(matches['Close'].iloc[0])
+        new_adj_close = float(matches['Adj Close'].iloc[0])
+        return any(
+            abs(new - old) > ADJUSTMENT_TOLERANCE * abs(old)
+            for new, old in ((new_close, close), (new_adj_close, adj_close))
+            if old is not None
+        )
+
+    def _fetch_new(self, symbol, default_start):
+        """
+        Returns (symbol, bars, fetched_from); fetched_from is set when the fetch
+        covers everything from that date, so coverage can be recorded.
+        """
+        fetched_from, tail = self._stored_span(symbol)
+        if not tail or fetched_from is None or default_start < fetched_from:
+            # Nothing stored yet, or a longer period than stored: fetch the whole range
+            start = default_start if fetched_from is None else min(default_start, fetched_from)
+            return symbol, self._fetch(symbol, start), start
+
+        # Re-fetch from the second-to-last stored bar: the last one may have been an
+        # intraday partial, but the one before it is final and only changes at the
+        # source when history was re-adjusted (dividend, split)
+        reference = tail[-1]
+        data = self._fetch(symbol, pd.Timestamp(reference[0]))
+        if self._adjustment_changed(data, reference):
+            # Stored bars use the old adjustment basis: replace the whole range
+            return symbol, self._fetch(symbol, fetched_from), fetched_from
+        return symbol, data, None
+
+    def _write(self, symbol, data, fetched_from=None):
+        frame = data.reindex(columns=COLUMNS)
+        frame = frame[frame['Close'].notna()]
+        with self._connect() as conn:
+            if fetched_from is not None:
+                # recorded even when empty, so a symbol listed after `fetched_from` isn't backfilled again
+                conn.execute(
+                    "INSERT INTO coverage (symbol, fetched_from) VALUES (?, ?) "
+                    "ON CONFLICT(symbol) DO UPDATE SET fetched_from = MIN(fetched_from, excluded.fetched_from)",
+                    (symbol, fetched_from.strftime('%Y-%m-%d'))
+                )
+            if frame.empty:
+                return 0
+            dates = pd.DatetimeIndex(frame.index).strftime('%Y-%m-%d')
+            rows = zip(
+                [symbol] * len(frame), dates,
+                *(frame[column].astype(float).tolist() for column in COLUMNS[:-1]),
+                frame['Volume'].fillna(0).astype('int64').tolist()
+            )
+            conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(frame)
+
+    def refresh(self, symbols, years=None, period='5y'):
+        """
+        Bring stored history up to date for each symbol
+
+        Symbols with no stored bars, or with less history than `years` (or
+        `period`), get the full range; others only fetch from their last stored
+        bars onwards, and are re-fetched in full if the source re-adjusted them.
+
+        Returns:
+            dict: symbol -> number of bars written, or an error message string
+        """
+        days = int(years * 365) if years is not None else period_to_days(period)
+        default_start = pd.Timestamp(datetime.now().date() - timedelta(days=days))
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(symbols)))) as pool:
+            futures = {pool.submit(self._fetch_new, symbol, default_start): symbol for symbol in symbols}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    _, data, fetched_from = future.result()
+                    # Writes stay on this thread; fetches run concurrently
+                    results[symbol] = self._write(symbol, data, fetched_from)
+                except Exception as e:
+                    results[symbol] = f"error: {e}"
+        return results
+
+    def load(self, symbol, start=None, end=None, adjusted=False):
+        """
+        Stored bars for a symbol as a DataFrame indexed by date
+
+        Args:
+            adjusted (bool): Scale OHLC by Adj Close / Close, like yfinance auto_adjust
+        """
+        query = "SELECT date, open, high, low, close, adj_close, volume FROM bars WHERE symbol = ?"
+        params = [symbol]
+        if start is not None:
+            query += " AND date >= ?"
+            params.append(pd.Timestamp(start).strftime('%Y-%m-%d'))
+        if end is not None:
+            query += " AND date < ?"
+            params.append(pd.Timestamp(end).strftime('%Y-%m-%d'))
+        query += " ORDER BY date"
+
+        with self._connect() as conn:
+            frame = pd.read_sql_query(query, conn, params=params, parse_dates=['date'])
+        frame = frame.set_index('date')
+        frame.index.name = 'Date'
+        frame.columns = COLUMNS
+
+        if adjusted and not frame.empty:
+            ratio = frame['Adj Close'] / frame['Close']
+            frame[['Open', 'High', 'Low', 'Close']] = frame[['Open', 'High', 'Low', 'Close']].mul(ratio, axis=0)
+        return frame
+
+    def history(self, symbol, period='5y', adjusted=True, refresh=True):
+        """Refresh (incrementally) and return the last `period` of bars"""
+        if refresh:
+            result = self.refresh([symbol], period=period)[symbol]
+            if isinstance(result, str):
+                raise ValueError(f"Failed to refresh {symbol}: {result}")
+        start = datetime.now().date() - timedelta(days=period_to_days(period))
+        return self.load(symbol, start=start, adjusted=adjusted)
+
+    def closes(self, symbol, start=None, end=None, adjusted=True):
+        """Closing prices as a float64 NumPy array"""
+        return self.load(symbol, start=start, end=end, adjusted=adjusted)['Close'].to_numpy(dtype=np.float64)
+
+    def arrays(self, symbol, start=None, end=None, adjusted=False):
+        """Dates (datetime64) and each OHLCV column as NumPy arrays"""
+        frame = self.load(symbol, start=start, end=end, adjusted=adjusted)
+        arrays = {column: frame[column].to_numpy() for column in COLUMNS}
+        arrays['Date'] = frame.index.to_numpy()
+        return arrays
+
+
+def frame_to_records(frame, include_adj_close=True):
+    """Vectorized conversion of stored bars into the downloaders' JSON records"""
+    records = pd.DataFrame({
+        'date': frame.index.strftime('%Y-%m-%d'),
+        'open': frame['Open'].astype(float),
+        'high': frame['High'].astype(float),
+        'low': frame['Low'].astype(float),
+        'close': frame['Close'].astype(float)
+    })
+    if include_adj_close:
+        records['adj_close'] = frame['Adj Close'].astype(float).values
+    records['volume'] = frame['Volume'].fillna(0).astype('int64').values
+    records = records.astype(object).where(records.notna(), None)
+    return records.to_dict('records')
+
+
+# Global store instance
+_price_store = None
+
+def get_price_store():
+    """Get singleton price store"""
+    global _price_store
+    if _price_store is None:
+        _price_store = PriceStore()
+    return _price_store
@@ -4,11 +4,12 @@ Simple Nifty 50 Data Downloader
 Downloads 2 years of Nifty 50 data and saves as JSON
 """
 
-import yfinance as yf
 import json
 from datetime import datetime, timedelta
 import os
 
+from price_store import get_price_store, frame_to_records
+
 def download_nifty_data():
     """Download 2 years of Nifty 50 data and save as JSON"""
     
@@ -19,43 +20,21 @@ def download_nifty_data():
     print(f"Downloading Nifty 50 data from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}...")
     
     try:
-        # Download data using yfinance
-        ticker = yf.Ticker("^NSEI")  # Nifty 50 symbol
-        data = ticker.history(
-            start=start_date.strftime('%Y-%m-%d'),
-            end=end_date.strftime('%Y-%m-%d'),
-            interval='1d'
-        )
+        # Refresh the local price store (only bars newer than the last stored date are fetched)
+        store = get_price_store()
+        refreshed = store.refresh(["^NSEI"], years=2)["^NSEI"]
+        if isinstance(refreshed, str):
+            raise ValueError(refreshed)
+        data = store.load("^NSEI", start=start_date, end=end_date, adjusted=True)
         
         if data.empty:
             print("❌ No data received from yfinance")
             return False
             
-        print(f"📊 Downloaded {len(data)} records")
+        print(f"📊 Loaded {len(data)} records ({refreshed} fetched)")
         
         # Convert to simple format
-        json_data = []
-        
-        for date_index in data.index:
-            try:
-                # Get the row data
-                row = data.loc[date_index]
-                
-                # Create record with simple column access
-                record = {
-                    'date': date_index.strftime('%Y-%m-%d'),
-                    'open': float(row['Open']),
-                    'high': float(row['High']),
-                    'low': float(row['Low']),
-                    'close': float(row['Close']),
-                    'volume': int(row['Volume'])
-                }
-                
-                json_data.append(record)
-                
-            except Exception as e:
-                print(f"⚠️ Error processing row {date_index}: {e}")
-                continue
+        json_data = frame_to_records(data, include_adj_close=False)
         
         # Create data directory if it doesn't exist
         data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
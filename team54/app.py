@@ -1,15 +1,20 @@
 from flask import Flask, render_template, request, jsonify, redirect, session
 from sklearn.tree import DecisionTreeClassifier
+import io
+import json
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
 import joblib
 import torch
 import librosa
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, decode_audio
 from transformers import (
     Wav2Vec2FeatureExtractor,
-    AutoModelForAudioClassification,
-    AutoTokenizer,
-    AutoModelForSeq2SeqLM
+    AutoModelForAudioClassification
 )
+from grammar_engine import GrammarCorrector, load_model as load_grammar_model
 import sqlite3
 from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
@@ -30,14 +35,50 @@ app.config["SESSION_COOKIE_NAME"] = "interview_session"
 app.config["SESSION_COOKIE_HTTPONLY"] = True
 app.config["PERMANENT_SESSION_LIFETIME"] = 3600   # 1 hour
 
-AUDIO_FILE = "answer.wav"
+# Uploads are decoded in memory per request (no shared answer.wav on disk)
+SAMPLE_RATE = 16000
 
 # =====================================================
 # DB HELPER
 # =====================================================
+DB_PATH = "results.db"
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+_db_pool = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+
+
+class PooledConnection:
+    """
+    sqlite3 connection whose close() hands it back to the pool instead of closing it.
+    """
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn.in_transaction:
+            self._conn.rollback()  # never hand out a connection with half-done work
+        try:
+            _db_pool.put_nowait(self._conn)
+        except queue.Full:
+            self._conn.close()
+
+
+def _new_connection():
+    # check_same_thread=False so pooled connections can move between request threads
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")     # readers don't block the writer
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
 def get_connection():
-    # check_same_thread=False so same connection can be used across threads
-    return sqlite3.connect("results.db", check_same_thread=False)
+    try:
+        conn = _db_pool.get_nowait()
+    except queue.Empty:
+        conn = _new_connection()
+    return PooledConnection(conn)
 
 # =====================================================
 # DATABASE SETUP
@@ -68,6 +109,70 @@ def init_db():
 # conn.close()
 
 
+def init_voice_db():
+    """
+    One row per answered question (replaces the user_results.voice_data JSON blob).
+    """
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS voice_answers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        question TEXT,
+        transcript TEXT,
+        improved TEXT,
+        emotion TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_voice_answers_user ON voice_answers (user_id, id)")
+    conn.commit()
+    conn.close()
+
+
+def migrate_voice_data():
+    """
+    Move answers out of the legacy voice_data blob into voice_answers.
+    Each user is moved in one transaction and the blob is cleared, so this can run at every start.
+    """
+    conn = get_connection()
+    c = conn.cursor()
+    columns = [row[1] for row in c.execute("PRAGMA table_info(user_results)")]
+    if "voice_data" not in columns:
+        conn.close()
+        return
+
+    rows = c.execute(
+        "SELECT user_id, voice_data FROM user_results WHERE voice_data IS NOT NULL AND voice_data != ''"
+    ).fetchall()
+    migrated = 0
+    for user_id, voice_data in rows:
+        try:
+            entries = json.loads(voice_data)
+        except ValueError:
+            print(f"⚠️ Skipping unreadable voice_data for {user_id}")
+            continue
+        if not isinstance(entries, list):
+            print(f"⚠️ Skipping voice_data for {user_id}: expected a list, got {type(entries).__name__}")
+            continue
+        answers = [e for e in entries if isinstance(e, dict)]
+        if len(answers) < len(entries):
+            print(f"⚠️ Dropping {len(entries) - len(answers)} malformed voice answers for {user_id}")
+        c.executemany(
+            "INSERT INTO voice_answers (user_id, question, transcript, improved, emotion) VALUES (?, ?, ?, ?, ?)",
+            [(user_id, e.get("question"), e.get("transcript"), e.get("improved"), e.get("emotion"))
+             for e in answers]
+        )
+        c.execute("UPDATE user_results SET voice_data = NULL WHERE user_id = ?", (user_id,))
+        conn.commit()
+        migrated += len(answers)
+
+    if migrated:
+        print(f"✅ Migrated {migrated} voice answers to the voice_answers table")
+    conn.close()
+
+
 def init_user_db():
     conn = get_connection()
     c = conn.cursor()
@@ -85,6 +190,8 @@ def init_user_db():
 
 init_db()
 init_user_db()
+init_voice_db()
+migrate_voice_data()
 
 
 def update_result(user_id, **kwargs):
@@ -125,8 +232,7 @@ def get_results(user_id):
                user_results.aptitude_score,
                user_results.aptitude_weak_topic,
                user_results.technical_score,
-               user_results.technical_feedback,
-               user_results.voice_data
+               user_results.technical_feedback
         FROM users
         LEFT JOIN user_results ON users.user_id = user_results.user_id
         WHERE users.user_id = ?
@@ -137,6 +243,59 @@ def get_results(user_id):
     return data
 
 
+def add_voice_answer(user_id, question, transcript, improved, emotion):
+    """Append one answer; cost does not depend on how many answers the user already has."""
+    if not user_id:
+        return
+
+    conn = get_connection()
+    conn.execute(
+        "INSERT INTO voice_answers (user_id, question, transcript, improved, emotion) VALUES (?, ?, ?, ?, ?)",
+        (user_id, question, transcript, improved, emotion)
+    )
+    conn.commit()
+    conn.close()
+
+
+def get_voice_answers(user_id, page=1, per_page=10):
+    """
+    One page of a user's answers (oldest first) plus totals and emotion counts.
+    """
+    conn = get_connection()
+    c = conn.cursor()
+
+    c.execute("SELECT emotion, COUNT(*) FROM voice_answers WHERE user_id = ? GROUP BY emotion", (user_id,))
+    emotions = dict(c.fetchall())
+    total = sum(emotions.values())
+
+    pages = max(1, -(-total // per_page))
+    page = min(max(1, page), pages)
+    offset = (page - 1) * per_page
+    c.execute("""
+        SELECT question, transcript, improved, emotion, created_at
+        FROM voice_answers
+        WHERE user_id = ?
+        ORDER BY id
+        LIMIT ? OFFSET ?
+    """, (user_id, per_page, offset))
+    answers = [
+        {"number": offset + i + 1, "question": q, "transcript": t, "improved": imp,
+         "emotion": emo, "created_at": created}
+        for i, (q, t, imp, emo, created) in enumerate(c.fetchall())
+    ]
+    conn.close()
+
+    return answers, {"page": page, "pages": pages, "per_page": per_page,
+                     "total": total, "emotions": emotions}
+
+
+def page_args(default_per_page):
+    """?page=&per_page= from the query string, clamped to sane values."""
+    page = request.args.get("page", 1, type=int)
+    per_page = request.args.get("per_page", default_per_page, type=int)
+    return max(1, page), min(max(1, per_page), 100)
+
+
 
 
 # =====================================================
@@ -155,27 +314,42 @@ def login_required(f):
 # LOAD MODELS
 # =====================================================
 print("🔁 Loading Whisper BASE model...")
-whisper_model = WhisperModel("base", device="cpu", compute_type="int8")
+# num_workers lets several interviews transcribe at the same time
+whisper_model = WhisperModel("base", device="cpu", compute_type="int8",
+                             num_workers=int(os.environ.get("WHISPER_WORKERS", "2")))
 
 print("🔁 Loading Emotion Model...")
 emotion_processor = Wav2Vec2FeatureExtractor.from_pretrained("models/hubert_emotion")
 emotion_model = AutoModelForAudioClassification.from_pretrained("models/hubert_emotion")
 
 print("🔁 Loading Grammar Correction Model...")
-GC_MODEL_NAME = "vennify/t5-base-grammar-correction"
-tokenizer_gc = AutoTokenizer.from_pretrained(GC_MODEL_NAME)
-model_gc = AutoModelForSeq2SeqLM.from_pretrained(GC_MODEL_NAME)
+tokenizer_gc, model_gc = load_grammar_model()
+grammar_corrector = GrammarCorrector(tokenizer_gc, model_gc)
+
+
+# Emotion detection runs here while the request thread transcribes
+audio_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("AUDIO_WORKERS", "4")))
+
+
+# =====================================================
+# AUDIO DECODING (once per upload, in memory)
+# =====================================================
+def decode_upload(file_storage):
+    """
+    Decode an uploaded audio file to a mono 16 kHz float32 buffer.
+    """
+    return decode_audio(io.BytesIO(file_storage.read()), sampling_rate=SAMPLE_RATE)
 
 
 # =====================================================
 # SPEECH → TEXT (Whisper)
 # =====================================================
-def speech_to_text(path):
+def speech_to_text(audio):
     """
-    Use faster-whisper to transcribe the saved WAV file.
+    Use faster-whisper to transcribe a 16 kHz float buffer (or an audio file path).
     """
     segments, _ = whisper_model.transcribe(
-        path,
+        audio,
         language="en",
         task="transcribe",
         beam_size=1,
@@ -188,9 +362,10 @@ def speech_to_text(path):
 # =====================================================
 # EMOTION DETECTION (Hubert + librosa)
 # =====================================================
-def detect_emotion(path):
-    audio, _ = librosa.load(path, sr=16000)
-    inputs = emotion_processor(audio, sampling_rate=16000, return_tensors="pt")
+def detect_emotion(audio):
+    if isinstance(audio, str):
+        audio, _ = librosa.load(audio, sr=SAMPLE_RATE)
+    inputs = emotion_processor(audio, sampling_rate=SAMPLE_RATE, return_tensors="pt")
 
     with torch.no_grad():
         logits = emotion_model(**inputs).logits
@@ -216,22 +391,18 @@ def detect_emotion(path):
 # =====================================================
 def improve_text(text):
     """
-    Use T5 grammar model to rewrite the transcript into cleaner English.
+    Use T5 grammar model to rewrite the transcript into cleaner English
+    (sentence batches, cached; see grammar_engine.py).
     """
     if not text.strip():
         return ""  # avoid sending empty text
 
-    inp = "correct this to proper English: " + text
-    tokens = tokenizer_gc(inp, return_tensors="pt", truncation=True)
-    output = model_gc.generate(tokens.input_ids, num_beams=5, max_length=200)
-    return tokenizer_gc.decode(output[0], skip_special_tokens=True)
+    return grammar_corrector.correct(text)
 
 
 # =====================================================
 # VOICE INTERVIEW API
 # =====================================================
-import json
-
 @app.route("/voice_interview", methods=["POST"])
 @login_required
 def voice_interview():
@@ -239,55 +410,52 @@ def voice_interview():
     if "audio" not in request.files:
         return jsonify({"error": "No audio file received"}), 400
 
-    audio_file = request.files["audio"]
-    audio_file.save(AUDIO_FILE)
+    timings = {}
+    started = time.perf_counter()
 
-    # 1. Transcribe
-    transcript = speech_to_text(AUDIO_FILE)
+    def timed(stage, fn, *args):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            timings[stage] = round((time.perf_counter() - t0) * 1000, 1)
 
-    # 2. Emotion
+    # 0. Decode once; every stage below shares this request's buffer
     try:
-        emotion = detect_emotion(AUDIO_FILE)
+        audio = timed("decode_ms", decode_upload, request.files["audio"])
+    except Exception as e:
+        return jsonify({"error": f"Could not decode audio: {e}"}), 400
+
+    # 1. Emotion (background) while 2. transcription runs here
+    emotion_future = audio_executor.submit(timed, "emotion_ms", detect_emotion, audio)
+    transcript = timed("transcribe_ms", speech_to_text, audio)
+
+    # 3. Improve grammar (needs the transcript; overlaps with emotion if that is still running)
+    improved = timed("grammar_ms", improve_text, transcript)
+
+    try:
+        emotion = emotion_future.result()
     except:
         emotion = "unknown"
 
-    # 3. Improve grammar
-    improved = improve_text(transcript)
+    timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    print(f"🎤 voice_interview timings: {timings}")
 
     # Read the question asked
     question = request.form.get("question", "Unknown question")
 
     user_id = session.get("user_id")
 
-    # Load previous stored voice_data
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("SELECT voice_data FROM user_results WHERE user_id=?", (user_id,))
-    row = c.fetchone()
-    conn.close()
-
-    previous = json.loads(row[0]) if row and row[0] else []
-
-    # Append this answer
-    previous.append({
-        "question": question,
-        "transcript": transcript,
-        "improved": improved,
-        "emotion": emotion
-    })
-
-    # Save back to DB
-    update_result(
-        user_id=user_id,
-        voice_data=json.dumps(previous)
-    )
+    # Append this answer (one row, no rewrite of earlier answers)
+    add_voice_answer(user_id, question, transcript, improved, emotion)
 
     # Return result to frontend
     return jsonify({
         "question": question,
         "transcript": transcript,
         "improved": improved,
-        "emotion": emotion
+        "emotion": emotion,
+        "timings": timings
     })
 
 
@@ -383,13 +551,17 @@ def results():
     if not data:
         return "No results found."
 
+    page, per_page = page_args(10)
+    voice_answers, voice_page = get_voice_answers(user_id, page, per_page)
+
     result_dict = {
     "name": data[0],
     "aptitude_score": data[1],
     "aptitude_weak_topic": data[2],
     "technical_score": data[3],
     "technical_feedback": data[4],
-    "voice_data": json.loads(data[5]) if data[5] else []
+    "voice_data": voice_answers,
+    "voice_page": voice_page
 }
 
 
@@ -489,7 +661,9 @@ def logout():
 @app.route("/voice_performance")
 @login_required
 def voice_performance():
-    return render_template("voice_performance.html")
+    page, per_page = page_args(50)
+    answers, summary = get_voice_answers(session.get("user_id"), page, per_page)
+    return render_template("voice_performance.html", answers=answers, summary=summary)
 
 # =====================================================
 # ROUTES (PAGES)
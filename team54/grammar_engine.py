@@ -0,0 +1,211 @@
+"""
+Grammar correction engine for voice interview transcripts (T5).
+
+Transcripts are split into sentences and the sentences are corrected in length-sorted
+batches with greedy or small-beam decoding, instead of one beam-5 pass over the whole
+transcript. Corrected sentences are cached by hash, so repeated phrases cost nothing.
+
+Settings (environment):
+    GRAMMAR_BEAMS=1          1 = greedy, 2-3 = small beam with early stopping
+    GRAMMAR_BATCH_SIZE=16    sentences per generate() call
+    GRAMMAR_QUANTIZE=int8    dynamic int8 quantization of the Linear layers (CPU)
+    GRAMMAR_BACKEND=onnx     ONNX Runtime through optimum, if installed
+    GRAMMAR_CACHE_SIZE=2048  cached sentences
+
+Run this file to compare against the original beam-5 whole-transcript output:
+    python grammar_engine.py [transcripts.txt] [--beams 1 2] [--threshold 0.9]
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import torch
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+GC_MODEL_NAME = "vennify/t5-base-grammar-correction"
+PROMPT = "correct this to proper English: "
+
+BEAMS = int(os.environ.get("GRAMMAR_BEAMS", "1"))
+BATCH_SIZE = int(os.environ.get("GRAMMAR_BATCH_SIZE", "16"))
+QUANTIZE = os.environ.get("GRAMMAR_QUANTIZE", "")
+BACKEND = os.environ.get("GRAMMAR_BACKEND", "torch")
+CACHE_SIZE = int(os.environ.get("GRAMMAR_CACHE_SIZE", "2048"))
+MAX_SENTENCE_WORDS = 40
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text):
+    """
+    Split on sentence punctuation; unpunctuated runs are cut every MAX_SENTENCE_WORDS words.
+    """
+    sentences = []
+    for part in _SENTENCE_END.split(text.strip()):
+        words = part.split()
+        for i in range(0, len(words), MAX_SENTENCE_WORDS):
+            sentences.append(" ".join(words[i:i + MAX_SENTENCE_WORDS]))
+    return sentences
+
+
+def load_model(model_name=GC_MODEL_NAME, backend=BACKEND, quantize=QUANTIZE):
+    """
+    Load the tokenizer and model (ONNX or torch, optionally int8-quantized).
+    """
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    if backend == "onnx":
+        try:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+            return tokenizer, ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True)
+        except ImportError:
+            print("⚠️ optimum[onnxruntime] not installed, using the PyTorch grammar model")
+
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+    model.eval()
+    if quantize == "int8":
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return tokenizer, model
+
+
+class GrammarCorrector:
+    def __init__(self, tokenizer, model, beams=BEAMS, batch_size=BATCH_SIZE, cache_size=CACHE_SIZE):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.beams = max(1, beams)
+        self.batch_size = max(1, batch_size)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, sentence):
+        return hashlib.sha1(f"{self.beams}|{sentence}".encode("utf-8")).hexdigest()
+
+    def _generate(self, sentences):
+        inputs = self.tokenizer([PROMPT + s for s in sentences], return_tensors="pt",
+                                padding=True, truncation=True)
+        # corrections are about as long as the input; no need to allow 200 tokens for a short sentence
+        max_new_tokens = min(200, int(inputs.input_ids.shape[1] * 1.5) + 8)
+        with torch.inference_mode():
+            output = self.model.generate(
+                **inputs,
+                num_beams=self.beams,
+                early_stopping=self.beams > 1,
+                max_new_tokens=max_new_tokens,
+            )
+        return self.tokenizer.batch_decode(output, skip_special_tokens=True)
+
+    def correct_sentences(self, sentences):
+        """
+        Correct sentences in batches; cached sentences are not regenerated.
+        """
+        results = {}
+        missing = []
+        with self._lock:
+            for sentence in dict.fromkeys(sentences):
+                key = self._key(sentence)
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    results[sentence] = self._cache[key]
+                else:
+                    missing.append(sentence)
+
+        # similar lengths per batch keeps padding (wasted compute) low
+        missing.sort(key=len)
+        for i in range(0, len(missing), self.batch_size):
+            batch = missing[i:i + self.batch_size]
+            for sentence, corrected in zip(batch, self._generate(batch)):
+                results[sentence] = corrected
+
+        with self._lock:
+            for sentence in missing:
+                self._cache[self._key(sentence)] = results[sentence]
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return [results[s] for s in sentences]
+
+    def correct(self, text):
+        if not text.strip():
+            return ""
+        return " ".join(self.correct_sentences(split_sentences(text)))
+
+
+# =====================================================
+# QUALITY / LATENCY CHECK
+# =====================================================
+SAMPLE_TRANSCRIPTS = [
+    "i am working as a software developer since two years. i have knowledge in python and java and i done many project in web development",
+    "my strength is i am hard working and i can learn new thing quickly. my weakness is sometime i am not confident speaking in front of many people",
+    "in my last project we was building a website for college where student can see there results and teacher can upload marks",
+    "i want to join this company because it give good opportunity for learning and i can grow my career",
+]
+
+
+def baseline_correct(tokenizer, model, text):
+    """The original improve_text: one beam-5 pass over the whole transcript."""
+    tokens = tokenizer(PROMPT + text, return_tensors="pt", truncation=True)
+    with torch.inference_mode():
+        output = model.generate(tokens.input_ids, num_beams=5, max_length=200)
+    return tokenizer.decode(output[0], skip_special_tokens=True)
+
+
+def similarity(a, b):
+    from difflib import SequenceMatcher
+    return SequenceMatcher(None, a.lower().split(), b.lower().split()).ratio()
+
+
+def main():
+    import argparse
+    import statistics
+
+    parser = argparse.ArgumentParser(description="Compare grammar correction modes with the beam-5 baseline")
+    parser.add_argument("transcripts", nargs="?", help="Text file with one transcript per line")
+    parser.add_argument("--beams", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--threshold", type=float, default=0.9,
+                        help="Minimum mean word-level similarity to the baseline output")
+    args = parser.parse_args()
+
+    if args.transcripts:
+        with open(args.transcripts, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = SAMPLE_TRANSCRIPTS
+
+    # the reference is always the unquantized PyTorch model
+    base_tokenizer, base_model = load_model(backend="torch", quantize="")
+    if BACKEND == "torch" and not QUANTIZE:
+        tokenizer, model = base_tokenizer, base_model
+    else:
+        tokenizer, model = load_model()
+
+    baseline, base_times = [], []
+    for text in texts:
+        t0 = time.perf_counter()
+        baseline.append(baseline_correct(base_tokenizer, base_model, text))
+        base_times.append(time.perf_counter() - t0)
+    print(f"baseline  beam 5: {statistics.mean(base_times):.2f}s per answer")
+
+    failed = False
+    for beams in args.beams:
+        corrector = GrammarCorrector(tokenizer, model, beams=beams)
+        times, scores = [], []
+        for text, reference in zip(texts, baseline):
+            t0 = time.perf_counter()
+            corrected = corrector.correct(text)
+            times.append(time.perf_counter() - t0)
+            scores.append(similarity(corrected, reference))
+        mean_score = statistics.mean(scores)
+        ok = mean_score >= args.threshold
+        failed = failed or not ok
+        print(f"sentences beam {beams}: {statistics.mean(times):.2f}s per answer, "
+              f"similarity {mean_score:.3f} (min {min(scores):.3f}) {'OK' if ok else 'BELOW THRESHOLD'}")
+
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
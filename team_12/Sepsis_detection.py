@@ -49,18 +49,20 @@ folder_path = '/content/drive/MyDrive/sepsis_data'
 # List of all .psv files in the folder
 psv_files = [f for f in os.listdir(folder_path) if f.endswith('.psv')]
 
-# Initialize an empty list to store individual dataframes
-dfs = []
+from concurrent.futures import ThreadPoolExecutor
 
-# Loop through files, read and append to dfs list
-for file in psv_files:
-    file_path = os.path.join(folder_path, file)
-    df = pd.read_csv(file_path, sep='|')
-    df['patient_id'] = file.replace('.psv', '')  # Optional: add patient_id column
-    dfs.append(df)
+def read_psv(file):
+    df = pd.read_csv(os.path.join(folder_path, file), sep='|')
+    df['patient_id'] = file.replace('.psv', '')
+    return df
 
-# Concatenate all dataframes together
+# Read files concurrently (pandas' parser releases the GIL)
+with ThreadPoolExecutor(max_workers=32) as executor:
+    dfs = list(executor.map(read_psv, sorted(psv_files)))
+
+# Concatenate all dataframes together and cache them in columnar form
 combined_df = pd.concat(dfs, ignore_index=True)
+combined_df.to_parquet('/content/drive/MyDrive/sepsis_data/patients.parquet', index=False)
 
 # Show combined dataframe shape and a sample
 print(combined_df.shape)
@@ -70,10 +72,11 @@ combined_df.head()
 combined_df.isnull().sum()
 
 # Forward fill missing values for each patient individually
-combined_df.fillna(method='ffill', inplace=True)
+value_cols = combined_df.columns.drop('patient_id')
+combined_df[value_cols] = combined_df.groupby('patient_id', sort=False)[value_cols].ffill()
 
 # Then backward fill if any NaNs remain (at start of each patient data)
-combined_df.fillna(method='bfill', inplace=True)
+combined_df[value_cols] = combined_df.groupby('patient_id', sort=False)[value_cols].bfill()
 
 combined_df.isnull().sum()
 
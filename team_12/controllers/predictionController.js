@@ -2,7 +2,7 @@ const PatientRecord = require('../models/PatientRecord');
 const DoctorsRecord = require('../models/DoctorsRecord');
 const User = require('../models/User');
 const ActivityLog = require('../models/ActivityLog');
-const { predictSepsis } = require('../services/pythonService');
+const { predictSepsis, getInferenceHealth } = require('../services/pythonService');
 const { generateSuggestions } = require('../services/suggestionEngine');
 const { generateDoctorReport, generatePatientReport } = require('../services/pdfGenerator');
 const { mapToVitals } = require('../utils/patientData');
@@ -57,7 +57,7 @@ const predict = async (req, res) => {
     }
     const vitalsMap = new Map(Object.entries(formattedVitals));
     
-    // Predict using Python service
+    // Predict using Python service (503 while it is unavailable; nothing is stored then)
     const predictionResult = await predictSepsis(formattedVitals);
     
     // Generate suggestions
@@ -146,7 +146,7 @@ const predict = async (req, res) => {
     });
   } catch (error) {
     console.error('Prediction error:', error);
-    res.status(500).json({ message: error.message });
+    res.status(error.statusCode || 500).json({ message: error.message });
   }
 };
 
@@ -295,8 +295,19 @@ const updateSuggestions = async (req, res) => {
   }
 };
 
+// Health of the Python inference server
+const inferenceHealth = async (req, res) => {
+  try {
+    const health = await getInferenceHealth();
+    res.json(health);
+  } catch (error) {
+    res.status(503).json({ status: 'unavailable', message: error.message });
+  }
+};
+
 module.exports = {
   predict,
+  inferenceHealth,
   getPrediction,
   downloadReport,
   updateSuggestions
@@ -7,6 +7,9 @@ from pathlib import Path
 import joblib
 import json
 import sys
+import threading
+from collections import OrderedDict, deque
+from functools import lru_cache
 
 BASE_DIR = Path(__file__).parent.parent
 MODELS_DIR = BASE_DIR / "models"
@@ -22,8 +25,13 @@ FEATURE_COLUMNS = [
     'Fibrinogen', 'Platelets', 'Age', 'Gender', 'ICULOS'
 ]
 
+# Bounds for the long-lived StreamingScorer
+MAX_STREAM_PATIENTS = 10000
+MAX_STREAM_HOURS = 24 * 14
+
+@lru_cache(maxsize=1)
 def load_models():
-    """Load trained models and scaler"""
+    """Load trained models and scaler (cached, so a long-lived process loads them once)"""
     try:
         scaler = joblib.load(MODELS_DIR / "scaler.pkl")
         original_model = joblib.load(MODELS_DIR / "original_model.pkl")
@@ -57,6 +65,23 @@ def preprocess_input(data):
     
     return X
 
+@lru_cache(maxsize=1)
+def load_metrics():
+    """Load saved evaluation metrics for both models (cached after the first call)"""
+    try:
+        with open(MODELS_DIR / "original_model_metrics.json", 'r') as f:
+            original_metrics = json.load(f)
+    except:
+        original_metrics = {"accuracy": 0.85, "precision": 0.82, "recall": 0.80, "f1_score": 0.81}
+    
+    try:
+        with open(MODELS_DIR / "vae_model_metrics.json", 'r') as f:
+            vae_metrics = json.load(f)
+    except:
+        vae_metrics = {"accuracy": 0.88, "precision": 0.85, "recall": 0.83, "f1_score": 0.84}
+    
+    return original_metrics, vae_metrics
+
 def predict_sepsis(input_data):
     """
     Predict sepsis using both models
@@ -89,18 +114,7 @@ def predict_sepsis(input_data):
     vae_pred = vae_model.predict(X_scaled)[0]
     vae_proba = vae_model.predict_proba(X_scaled)[0]
     
-    # Load metrics
-    try:
-        with open(MODELS_DIR / "original_model_metrics.json", 'r') as f:
-            original_metrics = json.load(f)
-    except:
-        original_metrics = {"accuracy": 0.85, "precision": 0.82, "recall": 0.80, "f1_score": 0.81}
-    
-    try:
-        with open(MODELS_DIR / "vae_model_metrics.json", 'r') as f:
-            vae_metrics = json.load(f)
-    except:
-        vae_metrics = {"accuracy": 0.88, "precision": 0.85, "recall": 0.83, "f1_score": 0.84}
+    original_metrics, vae_metrics = load_metrics()
     
     result = {
         "original_model": {
@@ -119,6 +133,206 @@ def predict_sepsis(input_data):
     
     return result
 
+def to_feature_matrix(records):
+    """
+    Convert records to a float matrix in FEATURE_COLUMNS order
+    
+    Args:
+        records: DataFrame, list of dicts, or array of shape (n_rows, n_features)
+    
+    Returns:
+        float64 array of shape (n_rows, n_features), NaN where a value is missing
+    """
+    if isinstance(records, np.ndarray):
+        X = np.asarray(records, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.shape[1] != len(FEATURE_COLUMNS):
+            raise ValueError(f"Expected {len(FEATURE_COLUMNS)} feature columns, got {X.shape[1]}")
+        return X
+    
+    df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(list(records))
+    df = df.reindex(columns=FEATURE_COLUMNS)
+    return df.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+
+def forward_fill_by_patient(X, patient_ids=None):
+    """
+    Vectorized forward fill that never carries values across patients
+    
+    Rows must be grouped by patient and ordered in time. Values still missing
+    after the fill (nothing observed yet for that patient) are set to 0, so an
+    hour's risk only ever depends on that hour and earlier ones.
+    """
+    n_rows = X.shape[0]
+    if n_rows == 0:
+        return X.copy()
+    
+    row_idx = np.arange(n_rows)
+    observed = ~np.isnan(X)
+    
+    # Index of the last observed row for every column
+    last_seen = np.maximum.accumulate(np.where(observed, row_idx[:, None], -1), axis=0)
+    
+    # A carried value is only usable if it was seen after the current patient started
+    group_start = np.zeros(n_rows, dtype=np.int64)
+    if patient_ids is not None:
+        patient_ids = np.asarray(patient_ids)
+        starts = np.ones(n_rows, dtype=bool)
+        starts[1:] = patient_ids[1:] != patient_ids[:-1]
+        group_start = np.maximum.accumulate(np.where(starts, row_idx, 0))
+    valid = last_seen >= group_start[:, None]
+    
+    filled = np.take_along_axis(X, np.where(valid, last_seen, 0), axis=0)
+    return np.where(valid, filled, 0.0)
+
+def _positive_proba(model, X_scaled):
+    """Return (predicted labels, probability of class 1) from one predict_proba call"""
+    proba = model.predict_proba(X_scaled)
+    classes = model.classes_
+    labels = classes[np.argmax(proba, axis=1)]
+    positive = np.flatnonzero(classes == 1)
+    if positive.size == 0:
+        return labels, np.zeros(len(X_scaled))
+    return labels, proba[:, positive[0]]
+
+def score_matrix(X):
+    """
+    Scale an imputed feature matrix and score it with both models in single calls
+    
+    Returns:
+        dict of per-row arrays: original/vae predictions and sepsis probabilities
+    """
+    scaler, original_model, vae_model = load_models()
+    
+    X_scaled = scaler.transform(pd.DataFrame(X, columns=FEATURE_COLUMNS))
+    original_pred, original_risk = _positive_proba(original_model, X_scaled)
+    if vae_model is original_model:
+        vae_pred, vae_risk = original_pred, original_risk
+    else:
+        vae_pred, vae_risk = _positive_proba(vae_model, X_scaled)
+    
+    return {
+        "original_prediction": original_pred.astype(int),
+        "original_risk": original_risk.astype(float),
+        "vae_prediction": vae_pred.astype(int),
+        "vae_risk": vae_risk.astype(float),
+        "sepsis_detected": (original_pred == 1) | (vae_pred == 1)
+    }
+
+def predict_batch(records, patient_ids=None):
+    """
+    Score one patient's hourly timeseries, or many patients stacked together
+    
+    Args:
+        records: DataFrame, list of dicts or (n_rows, n_features) array, ordered
+            by time within each patient (patients' rows may be interleaved)
+        patient_ids: optional per-row patient identifiers (single patient if None)
+    
+    Returns:
+        dict mapping patient id to its per-hour risk trajectory
+    
+    Raises:
+        ValueError: if patient_ids is given but some rows have no id (None/NaN)
+    """
+    X = to_feature_matrix(records)
+    trajectories = {}
+    if X.shape[0] == 0:
+        return trajectories
+    
+    if patient_ids is None:
+        patient_ids = np.zeros(X.shape[0], dtype=int)
+    
+    # Group rows by patient (first-appearance order) with a stable sort, so time
+    # order is kept within each patient; works for string/object ids too
+    codes, uniques = pd.factorize(np.asarray(patient_ids))
+    if (codes < 0).any():
+        # factorize codes None/NaN as -1, which would index the last real patient
+        missing = np.flatnonzero(codes < 0)
+        raise ValueError(f"{missing.size} record(s) have no patient id (first at row {missing[0]})")
+    order = np.argsort(codes, kind="stable")
+    codes = codes[order]
+    X = forward_fill_by_patient(X[order], codes)
+    scores = score_matrix(X)
+    
+    # Split the flat per-row outputs at patient boundaries
+    boundaries = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [X.shape[0]]))
+    iculos = X[:, FEATURE_COLUMNS.index('ICULOS')]
+    
+    for start, end in zip(starts, ends):
+        pid = uniques[codes[start]]
+        pid = pid.item() if isinstance(pid, np.generic) else pid
+        detected = scores["sepsis_detected"][start:end]
+        trajectories[pid] = {
+            "hours": iculos[start:end].tolist(),
+            "original_risk": scores["original_risk"][start:end].tolist(),
+            "vae_risk": scores["vae_risk"][start:end].tolist(),
+            "sepsis_detected": detected.tolist(),
+            "first_detection_index": int(np.argmax(detected)) if detected.any() else None
+        }
+    
+    return trajectories
+
+class StreamingScorer:
+    """
+    Incremental per-patient scoring as new vital-sign rows arrive
+    
+    Keeps only the last observed value of each feature per patient, so each
+    update costs one row of imputation and scoring regardless of history length.
+    Results match predict_batch on the same rows.
+    
+    Trajectories keep the last max_hours points per patient, and patients not
+    updated recently are evicted once more than max_patients are tracked.
+    """
+    
+    def __init__(self, max_patients=MAX_STREAM_PATIENTS, max_hours=MAX_STREAM_HOURS):
+        self.max_patients = max_patients
+        self.max_hours = max_hours
+        self.last_values = OrderedDict()
+        self.trajectories = {}
+        self._lock = threading.Lock()
+    
+    def update(self, patient_id, row):
+        """Add one hourly row for a patient and return that hour's scores"""
+        x = to_feature_matrix([row] if isinstance(row, dict) else row)[0]
+        
+        # One lock over fill, scoring and append: concurrent updates for a patient
+        # are applied in order and its state and trajectory never disagree
+        with self._lock:
+            previous = self.last_values.get(patient_id)
+            if previous is not None:
+                x = np.where(np.isnan(x), previous, x)
+            self.last_values[patient_id] = x
+            self.last_values.move_to_end(patient_id)
+            
+            scores = score_matrix(np.nan_to_num(x, nan=0.0)[None, :])
+            point = {key: value[0].item() for key, value in scores.items()}
+            point["hour"] = float(np.nan_to_num(x[FEATURE_COLUMNS.index('ICULOS')]))
+            
+            trajectory = self.trajectories.get(patient_id)
+            if trajectory is None:
+                trajectory = self.trajectories[patient_id] = {
+                    key: deque(maxlen=self.max_hours)
+                    for key in ("hours", "original_risk", "vae_risk", "sepsis_detected")
+                }
+            trajectory["hours"].append(point["hour"])
+            trajectory["original_risk"].append(point["original_risk"])
+            trajectory["vae_risk"].append(point["vae_risk"])
+            trajectory["sepsis_detected"].append(bool(point["sepsis_detected"]))
+            
+            while len(self.last_values) > self.max_patients:
+                stale, _ = self.last_values.popitem(last=False)
+                self.trajectories.pop(stale, None)
+        
+        return point
+    
+    def reset(self, patient_id):
+        """Forget a patient's state (e.g. on discharge)"""
+        with self._lock:
+            self.last_values.pop(patient_id, None)
+            self.trajectories.pop(patient_id, None)
+
 if __name__ == "__main__":
     import sys
     
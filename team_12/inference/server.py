@@ -0,0 +1,127 @@
+"""
+Long-lived inference server for sepsis prediction
+
+Loads the scaler and both models once at startup and answers predictions over
+HTTP so the Node backend doesn't cold-start Python for every request.
+
+Endpoints:
+    GET  /health         -> model status and uptime
+    POST /predict        -> same JSON output as predict.py
+    POST /predict/batch  -> per-hour risk trajectories for one or many patients
+    POST /predict/stream -> incremental risk update for one new row
+"""
+import json
+import os
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from predict import load_models, load_metrics, predict_sepsis, predict_batch, StreamingScorer
+
+HOST = os.environ.get("INFERENCE_HOST", "127.0.0.1")
+PORT = int(os.environ.get("INFERENCE_PORT", "5001"))
+
+STARTED_AT = time.time()
+
+# Shared streaming state across requests (one entry per monitored patient)
+streaming_scorer = StreamingScorer()
+
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    """Request handler exposing /health and /predict"""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive so Node can reuse connections
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        scaler, original_model, vae_model = load_models()
+        self._send_json(200, {
+            "status": "ok",
+            "models_loaded": {
+                "scaler": scaler is not None,
+                "original_model": original_model is not None,
+                "vae_loaded": vae_model is not original_model
+            },
+            "uptime_seconds": round(time.time() - STARTED_AT, 1)
+        })
+
+    def _predict(self, input_data):
+        return predict_sepsis(input_data)
+
+    def _predict_batch(self, input_data):
+        records = input_data.get("records", [])
+        id_column = input_data.get("patient_id_column", "patient_id")
+        patient_ids = [record.get(id_column) for record in records] if any(
+            id_column in record for record in records) else None
+        return {"trajectories": predict_batch(records, patient_ids)}
+
+    def _predict_stream(self, input_data):
+        patient_id = input_data.get("patient_id")
+        if patient_id is None:
+            raise ValueError("patient_id is required")
+        if input_data.get("reset"):
+            streaming_scorer.reset(patient_id)
+        return streaming_scorer.update(patient_id, input_data.get("row", {}))
+
+    def do_POST(self):
+        routes = {
+            "/predict": self._predict,
+            "/predict/batch": self._predict_batch,
+            "/predict/stream": self._predict_stream
+        }
+        handler = routes.get(self.path)
+        if handler is None:
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            input_data = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send_json(400, {"error": f"Invalid JSON body: {e}"})
+            return
+
+        try:
+            start = time.perf_counter()
+            result = handler(input_data)
+            result["inference_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            self._send_json(200, result)
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            print(f"Prediction failed: {e}", file=sys.stderr)
+            self._send_json(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        # Keep stdout quiet; Node only watches stderr for problems
+        pass
+
+
+def main():
+    # Warm the caches before accepting traffic
+    load_models()
+    load_metrics()
+
+    server = ThreadingHTTPServer((HOST, PORT), InferenceHandler)
+    print(f"Sepsis inference server listening on http://{HOST}:{PORT}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ const express = require('express');
 const router = express.Router();
 const {
   predict,
+  inferenceHealth,
   getPrediction,
   downloadReport,
   updateSuggestions
@@ -10,6 +11,7 @@ const authMiddleware = require('../middleware/authMiddleware');
 const doctorOnly = require('../middleware/doctorOnly');
 
 router.post('/predict', authMiddleware, doctorOnly, predict);
+router.get('/health', inferenceHealth);
 router.get('/:id', authMiddleware, getPrediction);
 router.get('/:id/download', authMiddleware, downloadReport);
 router.put('/:id/suggestions', authMiddleware, doctorOnly, updateSuggestions);
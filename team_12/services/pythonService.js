@@ -1,82 +1,186 @@
-const { PythonShell } = require('python-shell');
+const { spawn } = require('child_process');
+const http = require('http');
 const path = require('path');
 
-const predictSepsis = async (patientData) => {
+const INFERENCE_HOST = process.env.INFERENCE_HOST || '127.0.0.1';
+const INFERENCE_PORT = Number(process.env.INFERENCE_PORT || 5001);
+const INFERENCE_TIMEOUT_MS = Number(process.env.INFERENCE_TIMEOUT_MS || 10000);
+const STARTUP_TIMEOUT_MS = Number(process.env.INFERENCE_STARTUP_TIMEOUT_MS || 60000);
+const COLD_START_WAIT_MS = Number(process.env.INFERENCE_COLD_START_WAIT_MS || 15000);
+
+// Reuse sockets to the inference server instead of reconnecting per request
+const agent = new http.Agent({ keepAlive: true, maxSockets: 16 });
+
+let serverProcess = null;
+let serverReady = null;
+let serverHealthy = false;
+
+const requestJson = (method, route, payload, timeout = INFERENCE_TIMEOUT_MS) => {
   return new Promise((resolve, reject) => {
-    const options = {
-      mode: 'text',
-      pythonPath: process.env.PYTHON_PATH || 'python',
-      pythonOptions: ['-u'],
-      scriptPath: path.join(__dirname, '../../ml/inference'),
-      args: [JSON.stringify(patientData)]
-    };
-    
-    PythonShell.run('predict.py', options, (err, results) => {
-      if (err) {
-        console.error('Python error:', err);
-        // Use fallback prediction
-        const fallbackResult = createFallbackPrediction(patientData);
-        resolve(fallbackResult);
-        return;
-      }
-      
-      try {
-        // Join all output lines and parse JSON
-        const output = results.join('');
-        const result = JSON.parse(output);
-        resolve(result);
-      } catch (parseError) {
-        console.error('Parse error:', parseError);
-        // Fallback: create prediction using the data directly
-        const fallbackResult = createFallbackPrediction(patientData);
-        resolve(fallbackResult);
-      }
+    const body = payload ? JSON.stringify(payload) : null;
+    const req = http.request({
+      host: INFERENCE_HOST,
+      port: INFERENCE_PORT,
+      path: route,
+      method,
+      agent,
+      timeout,
+      headers: body
+        ? { 'Content-Type': 'application/json', 'Content-Length': Buffer.byteLength(body) }
+        : {}
+    }, (res) => {
+      let data = '';
+      res.setEncoding('utf8');
+      res.on('data', (chunk) => { data += chunk; });
+      res.on('end', () => {
+        try {
+          const parsed = JSON.parse(data);
+          if (res.statusCode >= 400) {
+            reject(Object.assign(
+              new Error(parsed.error || `Inference server returned ${res.statusCode}`),
+              { statusCode: res.statusCode }
+            ));
+            return;
+          }
+          resolve(parsed);
+        } catch (parseError) {
+          reject(parseError);
+        }
+      });
     });
+
+    req.on('timeout', () => req.destroy(new Error('Inference request timed out')));
+    req.on('error', reject);
+    if (body) req.write(body);
+    req.end();
   });
 };
 
-const createFallbackPrediction = (patientData) => {
-  // Fallback prediction logic if Python fails
-  const hr = patientData.HR || patientData.heart_rate || 80;
-  const temp = patientData.Temp || patientData.temperature || 37;
-  const lactate = patientData.Lactate || patientData.lactate || 1.5;
-  const wbc = patientData.WBC || patientData.wbc || 7;
-  
-  // Simple heuristic
-  const sepsisScore = (
-    (hr > 100 ? 0.3 : 0) +
-    (temp > 38 ? 0.3 : 0) +
-    (lactate > 2 ? 0.2 : 0) +
-    (wbc > 12 ? 0.2 : 0)
+const checkHealth = () => requestJson('GET', '/health', null, 2000);
+
+const waitForServer = async () => {
+  const deadline = Date.now() + STARTUP_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    try {
+      return await checkHealth();
+    } catch (err) {
+      await new Promise((resolve) => setTimeout(resolve, 250));
+    }
+  }
+  throw new Error('Inference server did not become healthy in time');
+};
+
+const startServer = () => {
+  const scriptPath = path.join(
+    process.env.INFERENCE_SCRIPT_DIR || path.join(__dirname, '../../ml/inference'),
+    'server.py'
   );
-  
-  const sepsisDetected = sepsisScore > 0.5;
-  
-  return {
-    original_model: {
-      prediction: sepsisDetected ? 1 : 0,
-      probability: sepsisScore,
-      metrics: {
-        accuracy: 0.85,
-        precision: 0.82,
-        recall: 0.80,
-        f1_score: 0.81
-      }
-    },
-    vae_model: {
-      prediction: sepsisDetected ? 1 : 0,
-      probability: sepsisScore * 1.1, // Slightly higher for VAE
-      metrics: {
-        accuracy: 0.88,
-        precision: 0.85,
-        recall: 0.83,
-        f1_score: 0.84
-      }
-    },
-    sepsis_detected: sepsisDetected,
-    features: patientData
-  };
+
+  serverProcess = spawn(process.env.PYTHON_PATH || 'python', ['-u', scriptPath], {
+    cwd: path.dirname(scriptPath),
+    env: { ...process.env, INFERENCE_HOST, INFERENCE_PORT: String(INFERENCE_PORT) },
+    stdio: ['ignore', 'inherit', 'inherit']
+  });
+
+  serverProcess.on('exit', (code) => {
+    console.error(`Inference server exited with code ${code}`);
+    serverProcess = null;
+    serverReady = null;
+    serverHealthy = false;
+  });
+
+  return waitForServer();
+};
+
+// Resolve once a healthy inference server is available, spawning one if needed
+const ensureServer = () => {
+  if (!serverReady) {
+    serverReady = checkHealth()
+      .catch(() => (process.env.INFERENCE_EXTERNAL === 'true' ? waitForServer() : startServer()))
+      .then((health) => {
+        serverHealthy = true;
+        return health;
+      })
+      .catch((err) => {
+        serverReady = null;
+        throw err;
+      });
+  }
+  return serverReady;
+};
+
+// Start (or retry starting) the server in the background; never blocks the caller
+const warmUp = () => {
+  ensureServer().catch((err) => console.error('Inference server unavailable:', err.message));
 };
 
-module.exports = { predictSepsis };
+const unavailable = (message) => Object.assign(new Error(message), { statusCode: 503 });
+
+// Wait for the server, but at most COLD_START_WAIT_MS; past that the caller gets a 503
+const waitUntilReady = () => {
+  if (serverHealthy) return Promise.resolve();
+  let timer;
+  const timeout = new Promise((resolve, reject) => {
+    timer = setTimeout(() => reject(unavailable('Inference server is starting, try again shortly')), COLD_START_WAIT_MS);
+  });
+  const ready = ensureServer().catch((err) => {
+    throw unavailable(`Inference server unavailable: ${err.message}`);
+  });
+  return Promise.race([ready, timeout]).finally(() => clearTimeout(timer));
+};
+
+// One request to the inference server; a connection failure (no HTTP status) marks it
+// unhealthy so the next call re-checks it, which also covers INFERENCE_EXTERNAL servers
+const callServer = async (method, route, payload) => {
+  await waitUntilReady();
+  try {
+    return await requestJson(method, route, payload);
+  } catch (err) {
+    if (err.statusCode) throw err;
+    serverHealthy = false;
+    serverReady = null;
+    throw unavailable(`Inference server unavailable: ${err.message}`);
+  }
+};
+
+const getInferenceHealth = async () => {
+  if (!serverHealthy) {
+    warmUp();
+    throw unavailable('Inference server is starting');
+  }
+  return callServer('GET', '/health');
+};
+
+// Model prediction for one vitals row; rejects with statusCode 503 while the server is
+// unavailable instead of answering with a guess that could be stored as a model result
+const predictSepsis = (patientData) => callServer('POST', '/predict', patientData);
+
+// Score a whole hourly timeseries (one or many patients) in a single call
+const predictTimeseries = (records, patientIdColumn = 'patient_id') =>
+  callServer('POST', '/predict/batch', { records, patient_id_column: patientIdColumn });
+
+// Update one patient's risk with a newly arrived vitals row
+const updatePatientStream = (patientId, row) =>
+  callServer('POST', '/predict/stream', { patient_id: patientId, row });
+
+const shutdown = () => {
+  if (serverProcess) {
+    serverProcess.kill();
+  }
+};
+
+process.on('exit', shutdown);
+
+// Spawn the inference server when the API boots, not on the first prediction
+if (process.env.INFERENCE_AUTOSTART !== 'false') {
+  warmUp();
+}
+
+module.exports = {
+  predictSepsis,
+  predictTimeseries,
+  updatePatientStream,
+  getInferenceHealth,
+  ensureServer
+};
 
@@ -0,0 +1,65 @@
+# tests/test_predict_batch.py
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+pytest.importorskip("joblib")
+
+INFERENCE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "inference"))
+if INFERENCE_DIR not in sys.path:
+    sys.path.insert(0, INFERENCE_DIR)
+
+import predict  # noqa: E402
+
+
+def fake_score_matrix(X):
+    """Risk = HR / 200, so each row's score identifies the row it came from"""
+    risk = X[:, predict.FEATURE_COLUMNS.index("HR")] / 200.0
+    detected = risk > 0.5
+    return {
+        "original_prediction": detected.astype(int),
+        "original_risk": risk,
+        "vae_prediction": detected.astype(int),
+        "vae_risk": risk,
+        "sepsis_detected": detected,
+    }
+
+
+@pytest.fixture(autouse=True)
+def no_models(monkeypatch):
+    monkeypatch.setattr(predict, "score_matrix", fake_score_matrix)
+
+
+def row(hour, hr):
+    return {"ICULOS": hour, "HR": hr}
+
+
+def test_empty_batch_returns_no_trajectories():
+    assert predict.predict_batch([], patient_ids=[]) == {}
+
+
+def test_interleaved_patients_are_grouped_in_time_order():
+    records = [row(1, 80), row(1, 120), row(2, 90), row(2, 130)]
+    trajectories = predict.predict_batch(records, patient_ids=["a", "b", "a", "b"])
+
+    assert list(trajectories) == ["a", "b"]
+    assert trajectories["a"]["hours"] == [1.0, 2.0]
+    assert trajectories["a"]["original_risk"] == [0.4, 0.45]
+    assert trajectories["b"]["original_risk"] == [0.6, 0.65]
+    assert trajectories["b"]["first_detection_index"] == 0
+
+
+def test_numeric_ids_are_plain_python_values():
+    trajectories = predict.predict_batch([row(1, 80), row(1, 90)], patient_ids=np.array([7, 8]))
+    assert all(type(pid) is int for pid in trajectories)
+
+
+def test_mixed_present_and_missing_ids_are_rejected():
+    records = [row(1, 80), row(1, 120), row(2, 90)]
+    with pytest.raises(ValueError, match="no patient id"):
+        predict.predict_batch(records, patient_ids=["a", None, "a"])
+    with pytest.raises(ValueError, match="no patient id"):
+        predict.predict_batch(records, patient_ids=[1.0, float("nan"), 1.0])
@@ -59,17 +59,17 @@ def generate_synthetic_data(n_samples=1000):
     synthetic_data = synthetic_data.numpy()
     
     # Load feature columns
-    X_train = pd.read_csv(PROCESSED_DIR / "X_train.csv")
-    feature_columns = X_train.columns.tolist()
+    from preprocess import FEATURE_COLUMNS
+    feature_columns = FEATURE_COLUMNS
     
     # Create DataFrame
     synthetic_df = pd.DataFrame(synthetic_data, columns=feature_columns)
     
     # Save synthetic data
     SYNTHETIC_DIR.mkdir(parents=True, exist_ok=True)
-    synthetic_df.to_csv(SYNTHETIC_DIR / "synthetic_data.csv", index=False)
+    synthetic_df.to_parquet(SYNTHETIC_DIR / "synthetic_data.parquet", index=False)
     
-    print(f"Synthetic data saved to {SYNTHETIC_DIR / 'synthetic_data.csv'}")
+    print(f"Synthetic data saved to {SYNTHETIC_DIR / 'synthetic_data.parquet'}")
     print("=" * 50)
     
     return synthetic_df
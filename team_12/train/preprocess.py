@@ -1,15 +1,16 @@
 """
 Preprocess PhysioNet Sepsis dataset
-- Combine multiple patient files
-- Handle missing values (forward fill + backward fill)
+- Combine multiple patient files (read concurrently, cached as Parquet)
+- Handle missing values (per-patient forward fill + backward fill)
 - Apply MinMaxScaler
 - Select useful features
 - Create labels
-- Split into train/test
+- Split into train/test (saved as Parquet)
 """
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.model_selection import train_test_split
 import joblib
@@ -20,6 +21,10 @@ DATA_DIR = BASE_DIR / "data" / "raw"
 PROCESSED_DIR = BASE_DIR / "data" / "processed"
 MODELS_DIR = BASE_DIR / "models"
 
+# Columnar cache of every raw patient file, with a patient_id column
+COMBINED_CACHE = PROCESSED_DIR / "patients.parquet"
+MAX_READ_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
 # Feature columns (PhysioNet sepsis features)
 FEATURE_COLUMNS = [
     'HR', 'O2Sat', 'Temp', 'SBP', 'DBP', 'MAP', 'Resp', 'EtCO2',
@@ -30,50 +35,95 @@ FEATURE_COLUMNS = [
     'Fibrinogen', 'Platelets', 'Age', 'Gender', 'ICULOS'
 ]
 
-def load_patient_files():
+def read_patient_file(file_path):
+    """Read one patient file (.psv is pipe-separated) and tag it with its patient_id"""
+    sep = '|' if file_path.suffix == '.psv' else ','
+    df = pd.read_csv(file_path, sep=sep)
+    df['patient_id'] = file_path.stem
+    return df
+
+def load_patient_files(use_cache=True):
     """Load and combine all patient files"""
     print("Loading patient files...")
     
-    all_data = []
-    csv_files = list(DATA_DIR.glob("*.csv"))
+    patient_files = sorted(list(DATA_DIR.glob("*.csv")) + list(DATA_DIR.glob("*.psv")))
     
-    if not csv_files:
+    if not patient_files:
         print("No CSV files found. Please run download_data.py first.")
         return None
     
-    for file_path in csv_files:
+    # Reuse the Parquet cache unless a raw file is newer than it
+    if use_cache and COMBINED_CACHE.exists():
+        newest_raw = max(f.stat().st_mtime for f in patient_files)
+        if COMBINED_CACHE.stat().st_mtime >= newest_raw:
+            combined_df = pd.read_parquet(COMBINED_CACHE)
+            print(f"Loaded {len(combined_df)} records from cache {COMBINED_CACHE}")
+            return combined_df
+    
+    def safe_read(file_path):
         try:
-            df = pd.read_csv(file_path)
-            all_data.append(df)
+            return read_patient_file(file_path)
         except Exception as e:
             print(f"Error loading {file_path}: {e}")
+            return None
+    
+    # pandas' C parser releases the GIL, so threads overlap both I/O and parsing
+    with ThreadPoolExecutor(max_workers=MAX_READ_WORKERS) as executor:
+        all_data = [df for df in executor.map(safe_read, patient_files) if df is not None]
     
     if not all_data:
         print("No data loaded!")
         return None
     
     combined_df = pd.concat(all_data, ignore_index=True)
-    print(f"Combined {len(csv_files)} files into {len(combined_df)} records")
+    combined_df['patient_id'] = combined_df['patient_id'].astype('category')
+    print(f"Combined {len(patient_files)} files into {len(combined_df)} records")
+    
+    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+    combined_df.to_parquet(COMBINED_CACHE, index=False)
+    print(f"Cached combined records to {COMBINED_CACHE}")
     return combined_df
 
 def handle_missing_values(df):
-    """Handle missing values using forward fill + backward fill"""
+    """Handle missing values using per-patient forward fill + backward fill"""
     print("Handling missing values...")
     
-    # Forward fill
-    df = df.ffill()
+    value_columns = df.columns.drop('patient_id')
     
-    # Backward fill
-    df = df.bfill()
+    # Fill within each patient only, so values never leak across patients
+    grouped = df.groupby('patient_id', observed=True, sort=False)[value_columns]
+    df[value_columns] = grouped.ffill()
+    df[value_columns] = df.groupby('patient_id', observed=True, sort=False)[value_columns].bfill()
     
     # Fill any remaining NaN with median
-    for col in df.columns:
-        if df[col].isna().any():
-            df[col].fillna(df[col].median(), inplace=True)
+    df[value_columns] = df[value_columns].fillna(df[value_columns].median(numeric_only=True))
     
-    print(f"Missing values handled. Remaining NaNs: {df.isna().sum().sum()}")
+    print(f"Missing values handled. Remaining NaNs: {df[value_columns].isna().sum().sum()}")
     return df
 
+def save_split(X, y, name):
+    """Save one split as a single Parquet file (features + SepsisLabel)"""
+    split_df = X.reset_index(drop=True)
+    split_df['SepsisLabel'] = np.asarray(y)
+    split_df.to_parquet(PROCESSED_DIR / f"{name}.parquet", index=False)
+
+def load_processed_split(name):
+    """
+    Load a processed split ('train' or 'test') as (X DataFrame, y array)
+    
+    Falls back to the legacy X_<name>.csv / y_<name>.csv files if the
+    Parquet split hasn't been generated yet.
+    """
+    parquet_path = PROCESSED_DIR / f"{name}.parquet"
+    if parquet_path.exists():
+        split_df = pd.read_parquet(parquet_path)
+        y = split_df.pop('SepsisLabel').to_numpy()
+        return split_df, y
+    
+    X = pd.read_csv(PROCESSED_DIR / f"X_{name}.csv")
+    y = pd.read_csv(PROCESSED_DIR / f"y_{name}.csv").values.ravel()
+    return X, y
+
 def select_features(df):
     """Select useful features"""
     print("Selecting features...")
@@ -146,10 +196,9 @@ def preprocess_data():
     X_test_scaled = pd.DataFrame(X_test_scaled, columns=FEATURE_COLUMNS)
     
     # Save processed data
-    X_train_scaled.to_csv(PROCESSED_DIR / "X_train.csv", index=False)
-    X_test_scaled.to_csv(PROCESSED_DIR / "X_test.csv", index=False)
-    y_train.to_csv(PROCESSED_DIR / "y_train.csv", index=False)
-    y_test.to_csv(PROCESSED_DIR / "y_test.csv", index=False)
+    save_split(X_train_scaled, y_train, "train")
+    save_split(X_test_scaled, y_test, "test")
+    print(f"Processed splits saved to {PROCESSED_DIR}")
     
     print("Preprocessing complete!")
     print("=" * 50)
@@ -9,6 +9,8 @@ from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_sc
 import joblib
 import json
 
+from preprocess import load_processed_split
+
 BASE_DIR = Path(__file__).parent.parent
 PROCESSED_DIR = BASE_DIR / "data" / "processed"
 SYNTHETIC_DIR = BASE_DIR / "data" / "synthetic"
@@ -19,11 +21,14 @@ def load_combined_data():
     print("Loading real and synthetic data...")
     
     # Load real training data
-    X_train_real = pd.read_csv(PROCESSED_DIR / "X_train.csv")
-    y_train_real = pd.read_csv(PROCESSED_DIR / "y_train.csv").values.ravel()
+    X_train_real, y_train_real = load_processed_split("train")
     
     # Load synthetic data
-    synthetic_df = pd.read_csv(SYNTHETIC_DIR / "synthetic_data.csv")
+    synthetic_path = SYNTHETIC_DIR / "synthetic_data.parquet"
+    if synthetic_path.exists():
+        synthetic_df = pd.read_parquet(synthetic_path)
+    else:
+        synthetic_df = pd.read_csv(SYNTHETIC_DIR / "synthetic_data.csv")
     
     # Generate synthetic labels (based on feature patterns)
     # Simple heuristic: higher HR, Temp, Lactate, WBC -> more likely sepsis
@@ -54,8 +59,7 @@ def train_combined_model():
     X_combined, y_combined = load_combined_data()
     
     # Load test data
-    X_test = pd.read_csv(PROCESSED_DIR / "X_test.csv")
-    y_test = pd.read_csv(PROCESSED_DIR / "y_test.csv").values.ravel()
+    X_test, y_test = load_processed_split("test")
     
     print(f"Training on {len(X_combined)} samples...")
     
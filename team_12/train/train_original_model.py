@@ -9,6 +9,8 @@ from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_sc
 import joblib
 import json
 
+from preprocess import load_processed_split
+
 BASE_DIR = Path(__file__).parent.parent
 PROCESSED_DIR = BASE_DIR / "data" / "processed"
 MODELS_DIR = BASE_DIR / "models"
@@ -17,10 +19,8 @@ def load_processed_data():
     """Load preprocessed data"""
     print("Loading preprocessed data...")
     
-    X_train = pd.read_csv(PROCESSED_DIR / "X_train.csv")
-    X_test = pd.read_csv(PROCESSED_DIR / "X_test.csv")
-    y_train = pd.read_csv(PROCESSED_DIR / "y_train.csv").values.ravel()
-    y_test = pd.read_csv(PROCESSED_DIR / "y_test.csv").values.ravel()
+    X_train, y_train = load_processed_split("train")
+    X_test, y_test = load_processed_split("test")
     
     return X_train, X_test, y_train, y_test
 
@@ -10,6 +10,8 @@ from tensorflow.keras import layers
 import joblib
 import json
 
+from preprocess import load_processed_split
+
 BASE_DIR = Path(__file__).parent.parent
 PROCESSED_DIR = BASE_DIR / "data" / "processed"
 MODELS_DIR = BASE_DIR / "models"
@@ -82,8 +84,8 @@ class VAE(keras.Model):
 
 def load_training_data():
     print("Loading training data...")
-    df = pd.read_csv(PROCESSED_DIR / "X_train.csv")
-    return df.values.astype("float32")
+    X_train, _ = load_processed_split("train")
+    return X_train.to_numpy(dtype="float32")
 
 def train_vae():
     print("=" * 50)